@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { AudioCaptureButton } from './components/AudioCaptureButton';
 import { FileDropZone } from './components/FileDropZone';
 import { TranscriptBlock } from './components/TranscriptBlock';
@@ -8,10 +8,20 @@ import { InfoCard } from './components/InfoCard';
 import { Button } from './components/ui/button';
 import { Progress } from './components/ui/progress';
 import { Skeleton } from './components/ui/skeleton';
+import { Badge } from './components/ui/badge';
 import { Toaster } from './components/ui/sonner';
 import { ArrowLeft, FileAudio } from 'lucide-react';
 import { toast } from 'sonner@2.0.3';
-import { transcribeAudio, extractKeywords, fetchExplainer } from './lib/api';
+import {
+  streamTranscription,
+  segmentsToBlocks,
+  toExplainer,
+  extractKeywords,
+  fetchExplainer,
+  openLiveSession,
+  sendLiveChunk,
+  closeLiveSession
+} from './lib/api';
 
 type AppState = 'landing' | 'processing' | 'transcription' | 'extracting' | 'keywords';
 
@@ -44,6 +54,77 @@ export default function App() {
   const [explainer, setExplainer] = useState<Explainer | null>(null);
   const [isLoadingExplainer, setIsLoadingExplainer] = useState(false);
   const [progress, setProgress] = useState(0);
+  const [recordingSha, setRecordingSha] = useState<string | null>(null);
+
+  // Keywords and explanations the transcription stream computed for the unedited transcript
+  const [streamedKeywords, setStreamedKeywords] = useState<Keyword[] | null>(null);
+  const [streamedExplanations, setStreamedExplanations] = useState<Record<string, string>>({});
+  const streamIdRef = useRef(0);
+
+  // Live session while recording: chunk texts by index, and terms with their explanations
+  const [liveChunks, setLiveChunks] = useState<Record<number, string>>({});
+  const [liveTerms, setLiveTerms] = useState<Array<{ term: string; explanation?: string }>>([]);
+  const liveSessionRef = useRef<Promise<string | null> | null>(null);
+  const liveSeqRef = useRef(0);
+  const liveUploadsRef = useRef<Promise<void>[]>([]);
+
+  // Open a live session as recording starts
+  const handleRecordingStart = () => {
+    liveSeqRef.current = 0;
+    liveUploadsRef.current = [];
+    setLiveChunks({});
+    setLiveTerms([]);
+    liveSessionRef.current = openLiveSession().catch((error) => {
+      console.error('Live session error:', error);
+      return null;
+    });
+  };
+
+  // Send each recorded clip to the live session as soon as it is ready
+  const handleChunk = (chunk: Blob, duration: number) => {
+    const session = liveSessionRef.current;
+    if (!session) return;
+
+    const seq = liveSeqRef.current++;
+    const upload = session
+      .then(async (sessionId) => {
+        if (!sessionId) return;
+        const result = await sendLiveChunk(sessionId, seq, chunk, duration);
+        setLiveChunks(prev => {
+          const next = { ...prev };
+          result.chunks.forEach(c => { next[c.index] = c.text; });
+          return next;
+        });
+        if (result.new_terms.length > 0) {
+          setLiveTerms(prev => [
+            ...prev,
+            ...result.new_terms.map(term => ({ term, explanation: result.explanations[term] }))
+          ]);
+        }
+      })
+      .catch((error) => console.error('Live chunk error:', error));
+    liveUploadsRef.current.push(upload);
+  };
+
+  // Close the live session once the last clip has been sent
+  const handleChunksEnd = async () => {
+    const session = liveSessionRef.current;
+    liveSessionRef.current = null;
+    if (!session) return;
+
+    await Promise.allSettled(liveUploadsRef.current);
+    const sessionId = await session;
+    if (sessionId) {
+      closeLiveSession(sessionId).catch((error) => console.error('Live session error:', error));
+    }
+  };
+
+  const liveTranscript = Object.keys(liveChunks)
+    .map(Number)
+    .sort((a, b) => a - b)
+    .map(index => liveChunks[index])
+    .filter(text => text.length > 0)
+    .join(' ');
 
   // Handle recording complete
   const handleRecordingComplete = async (blobUrl: string, duration: number) => {
@@ -62,26 +143,55 @@ export default function App() {
     });
   };
 
-  // Process audio and transcribe
+  // Process audio and transcribe, showing segments as they are transcribed
   const processAudio = async (blobUrl: string, filename: string) => {
+    const streamId = ++streamIdRef.current;
+    let blocks: TranscriptBlock[] = [];
+    let transcribed = false;
+
     setProgress(0);
+    setTranscriptBlocks([]);
+    setStreamedKeywords(null);
+    setStreamedExplanations({});
     const progressInterval = setInterval(() => {
       setProgress(prev => Math.min(prev + 10, 90));
     }, 200);
 
-    try {
-      const blocks = await transcribeAudio(blobUrl, filename);
-      setTranscriptBlocks(blocks);
-      setOriginalBlocks(JSON.parse(JSON.stringify(blocks)));
-      setProgress(100);
-      clearInterval(progressInterval);
-
-      setTimeout(() => {
+    // Events from a stream the user has since left are ignored
+    const onEvent = (event: string, data: any) => {
+      if (streamId !== streamIdRef.current) return;
+
+      if (event === 'upload') {
+        setRecordingSha(data.sha256);
+      } else if (event === 'segment') {
+        blocks = [...blocks, ...segmentsToBlocks([data], blocks.length)];
+        setTranscriptBlocks(blocks);
+      } else if (event === 'transcript') {
+        transcribed = true;
+        clearInterval(progressInterval);
+        setOriginalBlocks(JSON.parse(JSON.stringify(blocks)));
+        setProgress(100);
         setState('transcription');
         toast.success('Transcription complete');
-      }, 500);
+      } else if (event === 'keywords') {
+        setStreamedKeywords(data.keywords || []);
+      } else if (event === 'explanation') {
+        setStreamedExplanations(prev => ({ ...prev, [data.term]: data.explanation }));
+      } else if (event === 'error') {
+        console.error('Transcription stream error:', data);
+      }
+    };
+
+    try {
+      // Local cleaning only: the UI shows the raw transcript
+      await streamTranscription(blobUrl, onEvent, filename, 'local');
     } catch (error) {
+      console.error('Transcription stream error:', error);
+    } finally {
       clearInterval(progressInterval);
+    }
+
+    if (!transcribed && streamId === streamIdRef.current) {
       toast.error('Transcription failed. Make sure Flask backend is running.');
       setState('landing');
     }
@@ -119,7 +229,10 @@ export default function App() {
 
     try {
       const fullText = transcriptBlocks.map(b => b.text).join(' ');
-      const extractedKeywords = await extractKeywords(fullText);
+      // The stream already extracted keywords from the unedited transcript
+      const extractedKeywords = !hasEdits && streamedKeywords
+        ? streamedKeywords
+        : await extractKeywords(fullText, 'auto', recordingSha);
       setKeywords(extractedKeywords);
       setProgress(100);
       clearInterval(progressInterval);
@@ -149,10 +262,16 @@ export default function App() {
 
     setSelectedKeyword(term);
     setExplainer(null);
+
+    if (streamedExplanations[term]) {
+      setExplainer(toExplainer(term, streamedExplanations[term]));
+      return;
+    }
+
     setIsLoadingExplainer(true);
 
     try {
-      const explanation = await fetchExplainer(term);
+      const explanation = await fetchExplainer(term, recordingSha);
       setExplainer(explanation);
     } catch (error) {
       toast.error('Failed to fetch explanation');
@@ -163,10 +282,16 @@ export default function App() {
 
   // Reset to landing
   const handleReset = () => {
+    streamIdRef.current++;
     setState('landing');
     setAudioSource(null);
     setTranscriptBlocks([]);
     setOriginalBlocks([]);
+    setRecordingSha(null);
+    setStreamedKeywords(null);
+    setStreamedExplanations({});
+    setLiveChunks({});
+    setLiveTerms([]);
     setKeywords([]);
     setSelectedKeyword(null);
     setExplainer(null);
@@ -189,9 +314,32 @@ export default function App() {
             </div>
 
             <div className="py-8">
-              <AudioCaptureButton onRecordingComplete={handleRecordingComplete} />
+              <AudioCaptureButton
+                onRecordingComplete={handleRecordingComplete}
+                onRecordingStart={handleRecordingStart}
+                onChunk={handleChunk}
+                onChunksEnd={handleChunksEnd}
+              />
             </div>
 
+            {/* Live transcript and terms while recording */}
+            {(liveTranscript || liveTerms.length > 0) && (
+              <div className="space-y-3 text-left">
+                {liveTranscript && (
+                  <p className="text-sm text-muted-foreground leading-relaxed">{liveTranscript}</p>
+                )}
+                {liveTerms.length > 0 && (
+                  <div className="flex flex-wrap gap-2">
+                    {liveTerms.map(({ term, explanation }) => (
+                      <Badge key={term} variant="secondary" title={explanation}>
+                        {term}
+                      </Badge>
+                    ))}
+                  </div>
+                )}
+              </div>
+            )}
+
             <div className="relative">
               <div className="absolute inset-0 flex items-center">
                 <div className="w-full border-t" />
@@ -226,6 +374,17 @@ export default function App() {
               </p>
             </div>
             <Progress value={progress} className="w-full" />
+
+            {/* Segments transcribed so far */}
+            {state === 'processing' && transcriptBlocks.length > 0 && (
+              <div className="space-y-2 text-left">
+                {transcriptBlocks.map((block) => (
+                  <p key={block.id} className="text-sm text-muted-foreground leading-relaxed">
+                    {block.text}
+                  </p>
+                ))}
+              </div>
+            )}
           </div>
         </div>
       )}
@@ -5,22 +5,68 @@ import { toast } from 'sonner@2.0.3';
 
 interface AudioCaptureButtonProps {
   onRecordingComplete: (blobUrl: string, duration: number) => void;
+  onRecordingStart?: () => void;
+  // Live mode: called with a self-contained clip every chunkSeconds while recording,
+  // then onChunksEnd once the last clip has been delivered
+  onChunk?: (chunk: Blob, duration: number) => void;
+  onChunksEnd?: () => void;
+  chunkSeconds?: number;
 }
 
-export function AudioCaptureButton({ onRecordingComplete }: AudioCaptureButtonProps) {
+export function AudioCaptureButton({
+  onRecordingComplete,
+  onRecordingStart,
+  onChunk,
+  onChunksEnd,
+  chunkSeconds = 5
+}: AudioCaptureButtonProps) {
   const [isRecording, setIsRecording] = useState(false);
   const [recordingTime, setRecordingTime] = useState(0);
   const mediaRecorderRef = useRef<MediaRecorder | null>(null);
   const chunksRef = useRef<Blob[]>([]);
   const timerRef = useRef<NodeJS.Timeout | null>(null);
   const startTimeRef = useRef<number>(0);
+  const chunkRecorderRef = useRef<MediaRecorder | null>(null);
+  const chunkTimerRef = useRef<NodeJS.Timeout | null>(null);
 
   useEffect(() => {
     return () => {
       if (timerRef.current) clearInterval(timerRef.current);
+      if (chunkTimerRef.current) clearTimeout(chunkTimerRef.current);
     };
   }, []);
 
+  // Record back-to-back short clips on the same stream. Each clip gets its own
+  // recorder so it has a container header and can be transcribed on its own.
+  const startChunkRecorder = (stream: MediaStream) => {
+    if (!onChunk) return;
+
+    const recorder = new MediaRecorder(stream);
+    const parts: Blob[] = [];
+    const chunkStart = Date.now();
+    chunkRecorderRef.current = recorder;
+
+    recorder.ondataavailable = (e) => {
+      if (e.data.size > 0) {
+        parts.push(e.data);
+      }
+    };
+
+    recorder.onstop = () => {
+      if (parts.length > 0) {
+        onChunk(new Blob(parts, { type: 'audio/webm' }), (Date.now() - chunkStart) / 1000);
+      }
+      if (mediaRecorderRef.current?.state === 'recording') {
+        startChunkRecorder(stream);
+      } else {
+        onChunksEnd?.();
+      }
+    };
+
+    recorder.start();
+    chunkTimerRef.current = setTimeout(() => recorder.stop(), chunkSeconds * 1000);
+  };
+
   const startRecording = async () => {
     try {
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
@@ -43,6 +89,8 @@ export function AudioCaptureButton({ onRecordingComplete }: AudioCaptureButtonPr
       };
 
       mediaRecorder.start();
+      onRecordingStart?.();
+      startChunkRecorder(stream);
       setIsRecording(true);
       startTimeRef.current = Date.now();
       setRecordingTime(0);
@@ -60,6 +108,13 @@ export function AudioCaptureButton({ onRecordingComplete }: AudioCaptureButtonPr
   const stopRecording = () => {
     if (mediaRecorderRef.current && isRecording) {
       mediaRecorderRef.current.stop();
+      if (chunkTimerRef.current) {
+        clearTimeout(chunkTimerRef.current);
+        chunkTimerRef.current = null;
+      }
+      if (chunkRecorderRef.current?.state === 'recording') {
+        chunkRecorderRef.current.stop();
+      }
       setIsRecording(false);
       if (timerRef.current) {
         clearInterval(timerRef.current);
@@ -9,6 +9,12 @@ interface TranscriptBlock {
   timestamps: { start: number; end: number };
 }
 
+interface TranscriptSegment {
+  start: number;
+  end: number | null;
+  text: string;
+}
+
 interface Keyword {
   term: string;
   score: number;
@@ -31,9 +37,47 @@ async function blobUrlToFile(blobUrl: string, filename: string): Promise<File> {
 }
 
 /**
- * Transcribe audio by uploading to backend
+ * Convert timestamped segments into transcript blocks.
+ * Segments are split by sentences for better UX, spreading each segment's time
+ * span across its sentences in proportion to their length. Block ids continue
+ * from firstIndex, so blocks for segments that arrive later can be appended.
+ */
+export function segmentsToBlocks(segments: TranscriptSegment[], firstIndex: number = 0): TranscriptBlock[] {
+  const blocks: TranscriptBlock[] = [];
+
+  segments.forEach((segment) => {
+    const sentences: string[] = segment.text.match(/[^.!?]+[.!?]+/g) || [segment.text];
+    const totalLength = sentences.reduce((sum, sentence) => sum + sentence.length, 0) || 1;
+    const span = segment.end !== null ? segment.end - segment.start : null;
+    let cursor = segment.start;
+
+    sentences.forEach((sentence) => {
+      const index = firstIndex + blocks.length;
+      const duration = span !== null ? span * (sentence.length / totalLength) : 5;
+      const start = span !== null ? cursor : index * 5;
+
+      blocks.push({
+        id: String(index + 1),
+        text: sentence.trim(),
+        confidence: 0.95, // Backend doesn't provide confidence scores yet
+        timestamps: { start, end: start + duration }
+      });
+      cursor += duration;
+    });
+  });
+
+  return blocks;
+}
+
+/**
+ * Transcribe audio by uploading to backend.
+ * Returns the transcript blocks and the audio's sha256, which identifies the
+ * recording in the backend's session archive.
  */
-export async function transcribeAudio(blobUrl: string, filename: string = 'recording.webm'): Promise<TranscriptBlock[]> {
+export async function transcribeAudio(
+  blobUrl: string,
+  filename: string = 'recording.webm'
+): Promise<{ blocks: TranscriptBlock[]; sha256: string }> {
   try {
     // Convert blob URL to file
     const file = await blobUrlToFile(blobUrl, filename);
@@ -53,17 +97,9 @@ export async function transcribeAudio(blobUrl: string, filename: string = 'recor
     }
 
     const data = await response.json();
+    const segments: TranscriptSegment[] = data.segments || [{ start: 0, end: null, text: data.transcript }];
 
-    // Convert the transcript text into blocks
-    // Split by sentences for better UX
-    const sentences = data.transcript.match(/[^.!?]+[.!?]+/g) || [data.transcript];
-
-    return sentences.map((sentence: string, index: number) => ({
-      id: String(index + 1),
-      text: sentence.trim(),
-      confidence: 0.95, // Backend doesn't provide confidence scores yet
-      timestamps: { start: index * 5, end: (index + 1) * 5 }
-    }));
+    return { blocks: segmentsToBlocks(segments), sha256: data.sha256 };
 
   } catch (error) {
     console.error('Transcription error:', error);
@@ -71,6 +107,134 @@ export async function transcribeAudio(blobUrl: string, filename: string = 'recor
   }
 }
 
+/**
+ * Upload audio and stream the processing pipeline as Server-Sent Events.
+ * onEvent is called with each event name and its JSON payload as soon as it
+ * arrives: 'segment', 'transcript', 'cleaned', 'cleaned_done', 'keywords',
+ * 'explanation', 'error' and finally 'done'.
+ * cleaning picks the backend's cleaning tier ('local' makes no LLM call).
+ */
+export async function streamTranscription(
+  blobUrl: string,
+  onEvent: (event: string, data: any) => void,
+  filename: string = 'recording.webm',
+  cleaning?: string
+): Promise<void> {
+  // Convert blob URL to file
+  const file = await blobUrlToFile(blobUrl, filename);
+
+  // Create FormData and append the audio file
+  const formData = new FormData();
+  formData.append('audio', file);
+  if (cleaning) {
+    formData.append('cleaning', cleaning);
+  }
+
+  const response = await fetch(`${API_BASE_URL}/transcribe-stream`, {
+    method: 'POST',
+    body: formData,
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error(`Transcription stream failed: ${response.statusText}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      rawEvent.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      });
+      onEvent(event, data ? JSON.parse(data) : null);
+
+      boundary = buffer.indexOf('\n\n');
+    }
+  }
+}
+
+interface LiveChunkResult {
+  session_id: string;
+  seq: number;
+  // Chunks appended to the transcript by this call, in order; empty while this one waits for an earlier chunk
+  chunks: { index: number; start: number; end: number | null; text: string }[];
+  pending: number[];
+  new_terms: string[];
+  explanations: Record<string, string>;
+}
+
+/**
+ * Open a live session for incremental transcription
+ */
+export async function openLiveSession(): Promise<string> {
+  const response = await fetch(`${API_BASE_URL}/sessions`, { method: 'POST' });
+
+  if (!response.ok) {
+    throw new Error(`Could not open session: ${response.statusText}`);
+  }
+
+  const data = await response.json();
+  return data.session_id;
+}
+
+/**
+ * Send one short, self-contained audio chunk to a live session.
+ * seq numbers the chunks from 0 in recording order; chunks may be sent concurrently.
+ * Returns the chunks put in order by this call plus only the terms first seen in them.
+ */
+export async function sendLiveChunk(
+  sessionId: string,
+  seq: number,
+  chunk: Blob,
+  duration?: number,
+  filename: string = 'chunk.webm'
+): Promise<LiveChunkResult> {
+  const formData = new FormData();
+  formData.append('audio', new File([chunk], filename, { type: chunk.type }));
+  formData.append('seq', String(seq));
+  if (duration !== undefined) {
+    formData.append('duration', String(duration));
+  }
+
+  const response = await fetch(`${API_BASE_URL}/sessions/${sessionId}/chunks`, {
+    method: 'POST',
+    body: formData,
+  });
+
+  if (!response.ok) {
+    throw new Error(`Chunk upload failed: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
+/**
+ * Close a live session and return its final transcript and terms
+ */
+export async function closeLiveSession(sessionId: string): Promise<any> {
+  const response = await fetch(`${API_BASE_URL}/sessions/${sessionId}`, { method: 'DELETE' });
+
+  if (!response.ok) {
+    throw new Error(`Could not close session: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
 /**
  * Upload audio file without transcribing
  */
@@ -103,16 +267,18 @@ export async function uploadAudio(blobUrl: string, filename: string = 'recording
 }
 
 /**
- * Extract biological keywords from transcript
+ * Extract biological keywords from transcript.
+ * Pass mode 'lexicon' for an instant, local-only pass over known terms.
+ * With the recording's sha256, the terms are saved to its archived session.
  */
-export async function extractKeywords(text: string): Promise<Keyword[]> {
+export async function extractKeywords(text: string, mode: string = 'auto', sha256?: string | null): Promise<Keyword[]> {
   try {
     const response = await fetch(`${API_BASE_URL}/extract`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ transcript: text }),
+      body: JSON.stringify({ transcript: text, mode, ...(sha256 ? { sha256 } : {}) }),
     });
 
     if (!response.ok) {
@@ -121,7 +287,16 @@ export async function extractKeywords(text: string): Promise<Keyword[]> {
 
     const data = await response.json();
 
-    // Transform backend response to frontend format
+    // Backend returns terms with scores and character offsets
+    if (data.keywords) {
+      return data.keywords.map((keyword: Keyword) => ({
+        term: keyword.term,
+        score: keyword.score,
+        offsetRanges: keyword.offsetRanges
+      }));
+    }
+
+    // Transform a bare term list to frontend format
     const keywords = data.keyword || [];
     return keywords.map((term: string, index: number) => ({
       term,
@@ -136,16 +311,41 @@ export async function extractKeywords(text: string): Promise<Keyword[]> {
 }
 
 /**
- * Mock explainer fetching - can be replaced with real API later
+ * Build the info card content for a term from its explanation, if any
  */
-export async function fetchExplainer(term: string): Promise<Explainer> {
-  // For now, return a Google search URL
-  // This can be replaced with a real explainer API in the future
-  await new Promise(resolve => setTimeout(resolve, 500));
-
+export function toExplainer(term: string, explanation?: string): Explainer {
   return {
-    summary: `${term} is a biological term. Click the link below to learn more.`,
+    summary: explanation || `${term} is a biological term. Click the link below to learn more.`,
     url: `https://www.google.com/search?q=${encodeURIComponent(term + ' biology')}`,
     sourceName: 'Search Online'
   };
 }
+
+/**
+ * Fetch a plain-language explanation for a term from the backend.
+ * With the recording's sha256, the explanation is saved to its archived session.
+ */
+export async function fetchExplainer(term: string, sha256?: string | null): Promise<Explainer> {
+  try {
+    const response = await fetch(`${API_BASE_URL}/explain`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ terms: [term], ...(sha256 ? { sha256 } : {}) }),
+    });
+
+    if (!response.ok) {
+      throw new Error(`Explanation failed: ${response.statusText}`);
+    }
+
+    const data = await response.json();
+    const explanations = data.explanations || {};
+
+    return toExplainer(term, explanations[term]);
+
+  } catch (error) {
+    console.error('Explanation error:', error);
+    throw error;
+  }
+}
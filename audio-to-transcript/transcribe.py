@@ -1,41 +1,63 @@
 print("🚀 Script successfully executed")
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from dotenv import load_dotenv
 
+# Manifest shared with the Flask /transcribe endpoint
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'flask'))
+import manifest
+
+MAX_WORKERS = int(os.environ.get("TRANSCRIBE_FILE_WORKERS", "4"))
+
 def transcribe_audio(
     input_dir="audio",
-    output_path="transcript/transcript.txt"
+    output_path="transcript/transcript.txt",
+    max_workers=MAX_WORKERS
 ):
     """
-    Read audio files from the 'audio/' folder, 
-    transcribe them using the OpenAI API, 
-    and write the results to 'transcript/transcript.txt'.
+    Read audio files from the 'audio/' folder,
+    transcribe the new or changed ones using the OpenAI API,
+    and rebuild 'transcript/transcript.txt' from every file's transcript.
+    Files already in the manifest ('transcript/transcript.parts/') are skipped.
     """
     load_dotenv()
     client = OpenAI()
 
-    # Ensure the output directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-    for filename in os.listdir(input_dir):
-        if not filename.lower().endswith((".wav", ".mp3", ".m4a")):
-            continue
-
-        file_path = os.path.join(input_dir, filename)
-        print(f"🎧 Transcribing: {filename} ...")
-
-        with open(file_path, "rb") as f:
+    filenames = [
+        filename for filename in os.listdir(input_dir)
+        if filename.lower().endswith((".wav", ".mp3", ".m4a"))
+    ]
+    runs = manifest.open_manifest(output_path)
+    pending = runs.plan(input_dir, filenames)
+    print(f"⏭️ {len(filenames) - len(pending)} unchanged, {len(pending)} to transcribe")
+
+    def transcribe_one(item):
+        if runs.reuse(item) is not None:
+            print(f"⏭️ {item['filename']} is unchanged")
+            return
+        print(f"🎧 Transcribing: {item['filename']} ...")
+
+        with open(item["path"], "rb") as f:
             result = client.audio.transcriptions.create(
                 model="gpt-4o-mini-transcribe",
                 file=f
             )
 
-        with open(output_path, "a") as out:
-            out.write(f"### {filename}\n")
-            out.write(result.text + "\n\n")
+        runs.record(item, result.text)
+        print(f"✅ {item['filename']} transcription completed")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(transcribe_one, item): item for item in pending}
+        for future, item in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠️ {item['filename']} transcription failed, it will be retried on the next run: {e}")
 
-        print(f"✅ {filename} transcription completed and saved to {output_path}")
+    runs.merge()
+    print(f"✅ Transcripts saved to {output_path}")
 
 if __name__ == "__main__":
     transcribe_audio()
@@ -1,25 +1,47 @@
 import os
 import sys
-from flask import Flask, request, jsonify
+import click
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
-import re
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional
+from dotenv import load_dotenv
 
 # Add parent directory to path to import the existing modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from anthropic import Anthropic
-from openai import OpenAI
-from dotenv import load_dotenv
-
+# Settings in .env apply to the module-level settings read by the imports below
 load_dotenv()
 
+import archive
+import audio_chunks
+import batch
+import cleaning
+import clients
+import explainer
+import ingest
+import jobs
+import keywords
+import manifest
+import metrics
+import prompts
+import scheduler
+import sessions
+import streaming
+import term_index
+import term_cache
+import transcript_cache
+
+
 app = Flask(__name__)
 
+# Parse uploaded files into hashing spools instead of werkzeug's default temp files
+app.request_class = ingest.IngestRequest
+
 # Configure CORS to allow all origins and common headers
 CORS(app, resources={
     r"/*": {
@@ -35,219 +57,540 @@ CORS(app, resources={
 # Configuration for file uploads
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'audio')
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'm4a', 'webm'}
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a")
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
+@app.before_request
+def start_request_metrics():
+    g.metrics = metrics.start_request(request.endpoint or "unknown")
+
+
+@app.after_request
+def finish_request_metrics(response):
+    """Count the request and, with SERVER_TIMING on, add its stage breakdown as a Server-Timing header"""
+    token = g.pop("metrics", None)
+    if token is not None:
+        timing = metrics.finish_request(token, response.status_code)
+        if timing:
+            response.headers["Server-Timing"] = timing
+    return response
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-client = Anthropic(
-    api_key=os.environ.get("ANTHROPIC_API_KEY")
-)
+# Upstream API clients are created on first use; set CLARIFY_EAGER_CLIENTS=1 to create them at boot
+if os.environ.get("CLARIFY_EAGER_CLIENTS"):
+    clients.warm_up()
 
-# Template for keyword extraction
-KEYWORD_EXTRACTION_TEMPLATE = """You are tasked with extracting biological terminology from a conference transcript. Your goal is to identify and catalog scientific terms specifically related to biology, genetics, molecular biology, and related fields.
+# Transcription model and content-addressed transcript cache (keyed on audio sha256)
+TRANSCRIBE_MODEL = "gpt-4o-mini-transcribe"
+transcripts = transcript_cache.TranscriptCache(namespace=TRANSCRIBE_MODEL)
 
-Here is the conference transcript to analyze:
+# Background worker pool for directory transcription jobs
+job_manager = jobs.JobManager()
 
-<transcript>
-{{TRANSCRIPT}}
-</transcript>
+# Files transcribed at once by a synchronous /transcribe call
+TRANSCRIBE_FILE_WORKERS = int(os.environ.get("TRANSCRIBE_FILE_WORKERS", "4"))
 
-## What Qualifies as a Biological Term
+# Local index of known terms (lexicon plus terms the LLM returned before)
+known_terms = term_index.TermIndex()
+EXTRACT_MODES = keywords.EXTRACTION_MODES + ("lexicon",)
 
-Include terms that fall into these categories:
-- Gene names (e.g., p53, BRCA1, myc)
-- Protein names (e.g., hemoglobin, insulin, collagen)
-- Biological processes (e.g., transcription, translation, mitosis)
-- Cellular components (e.g., mitochondria, ribosome, nucleus)
-- Organisms and species names (e.g., E. coli, Drosophila, Homo sapiens)
-- Biological molecules (e.g., DNA, RNA, ATP)
-- Medical/biological conditions (e.g., diabetes, cancer, mutation)
-- Biological techniques and methods (e.g., PCR, CRISPR, sequencing)
-- Anatomical terms (e.g., liver, neuron, tissue)
+# Searchable archive of processed recordings and live sessions
+session_archive = archive.SessionArchive()
 
-## What to Exclude
 
-Do not include:
-- General scientific terms that aren't specifically biological (like "data", "analysis", "significant")
-- Common words that aren't technical terminology
-- General laboratory equipment or basic scientific concepts
+def archive_session(session_id, source, **fields):
+    """Save a session to the archive; failures are logged and never fail the request"""
+    if not archive.ARCHIVE_SESSIONS:
+        return
+    try:
+        with metrics.span("archive"):
+            session_archive.save(session_id, source, **fields)
+    except Exception as e:
+        print(f"⚠️ Archiving {source} session {session_id} failed: {e}")
 
-## Extraction Requirements
 
-1. **Preserve exact formatting**: Capture each term exactly as it appears in the transcript - maintain original spelling, capitalization, and formatting
-2. **Include variants**: If both abbreviated forms (like "PCR") and full forms (like "polymerase chain reaction") appear, include both
-3. **Include all nomenclature**: Capture species names in both common and scientific formats
-4. **No duplicates**: List each unique term only once, even if it appears multiple times
-5. **Focus on technical terms**: Prioritize specialized biological terminology over general words
+def archive_target(data):
+    """The archived session a request refers to: its 'sha256' (recordings) or 'session_id' (live sessions)"""
+    target = data.get('sha256') or data.get('session_id')
+    return target if isinstance(target, str) and target else None
 
-## Analysis Process
 
-Before providing your final answer, work through the transcript systematically in <term_extraction> tags inside your thinking block:
+def archive_terms(session_id, text=None, terms=None, explanations=None):
+    """
+    Add terms and explanations to an archived session. Term offsets are found in
+    the archived transcript; a session that is not archived yet is created from
+    `text`. Explanations without terms are only added to existing sessions.
+    Failures are logged and never fail the request.
+    """
+    if not archive.ARCHIVE_SESSIONS or not session_id:
+        return
+    try:
+        with metrics.span("archive"):
+            transcript = session_archive.transcript(session_id)
+            if transcript is None and (text is None or terms is None):
+                return
+            records = None
+            if terms is not None:
+                records = term_index.keyword_records(term_index.find_offsets(transcript if transcript is not None else text, terms))
+            session_archive.save(
+                session_id, "extract",
+                transcript=text if transcript is None else None,
+                terms=records,
+                explanations=explanations
+            )
+    except Exception as e:
+        print(f"⚠️ Archiving terms for session {session_id} failed: {e}")
+
+
+def archive_live_session(session):
+    """Archive a live session once it is closed or expires, with the offsets of its terms"""
+    if not session.chunks:
+        return
+    offsets = term_index.find_offsets(session.transcript, list(session.seen.values()))
+    archive_session(
+        session.id, "live",
+        title=f"Live session {datetime.fromtimestamp(session.created_at).strftime('%Y-%m-%d %H:%M')}",
+        transcript=session.transcript,
+        segments=session.chunks,
+        terms=term_index.keyword_records(offsets),
+        explanations=session.explanations,
+        created_at=session.created_at
+    )
 
-1. Scan through the entire transcript and quote all potential biological terms exactly as they appear in the text. It's OK for this section to be quite long.
-2. For each quoted term, evaluate whether it qualifies based on the criteria above, noting your reasoning for including or excluding each term
-3. Create a running list of accepted terms, preserving their exact formatting and capitalization
-4. Check for and eliminate any duplicates from your accepted terms list
-5. Verify that your final list is sorted alphabetically while maintaining exact formatting
 
-## Output Format
+# Live recording sessions
+session_manager = sessions.SessionManager(on_end=archive_live_session)
 
-Provide your final answer as a JSON object with this exact structure:
+# Two-tier cache (in-process LRU + on-disk SQLite) for term explanations
+explanation_cache = term_cache.TieredCache()
 
-```json
-{
-  "biological_terms": [
-    "first_term_exactly_as_appears",
-    "second_term_exactly_as_appears",
-    "third_term_exactly_as_appears"
-  ],
-  "total_count": number_of_unique_terms
-}
-```
+def list_audio_files(input_dir):
+    """Return the names of the audio files in input_dir that can be transcribed"""
+    return [filename for filename in os.listdir(input_dir) if filename.lower().endswith(AUDIO_EXTENSIONS)]
 
-The biological_terms array should:
-- Be sorted alphabetically
-- Preserve exact capitalization, spelling, and formatting from the original transcript
-- Contain only unique terms
 
-Your final output should contain only the JSON object and should not duplicate or rehash any of the extraction work you did in the thinking block."""
+def transcribe_file(file_path, tier=cleaning.DEFAULT_CLEANING_TIER, digest=None):
+    """
+    Transcribe and filter one audio file, reusing cached results for identical audio.
+    tier selects how the transcript is cleaned (see cleaning.CLEANING_TIERS);
+    digest is the file's sha256 when the caller has already computed it.
+    Returns the filtered transcript text.
+    """
+    if digest is None:
+        digest = transcript_cache.hash_file(file_path)
+
+    def transcribe_chunk(chunk_path):
+        with open(chunk_path, "rb") as f:
+            result = clients.openai_client().audio.transcriptions.create(
+                model=TRANSCRIBE_MODEL,
+                file=f
+            )
+        return result.text
+
+    def transcribe():
+        with metrics.span("transcribe"), metrics.in_flight("transcription"):
+            result = audio_chunks.transcribe_audio(transcribe_chunk, file_path)
+        transcripts.update(digest, segments=result["segments"])
+        return result["text"]
+
+    raw_text, _ = transcripts.get_or_compute(digest, "raw", transcribe)
+    tier = cleaning.resolve_tier(raw_text, tier)
+    filtered_text, _ = transcripts.get_or_compute(digest, cleaning.cache_field(tier), lambda: filter(raw_text, tier))
+    archive_session(
+        digest, "file",
+        title=os.path.basename(file_path),
+        transcript=raw_text,
+        cleaned=filtered_text,
+        segments=transcripts.get(digest).get("segments"),
+        terms=term_index.keyword_records(known_terms.scan(raw_text)) if archive.ARCHIVE_SESSIONS else None
+    )
+    return filtered_text
 
 
-def transcribe_audio_files(input_dir, output_path):
+def iter_transcribe_upload(filename, spool, compact=True, max_seconds=audio_chunks.CHUNK_MAX_SECONDS):
     """
-    Transcribe audio files from input_dir using OpenAI API
-    and write results to output_path.
+    Transcribe an uploaded file straight from its spool, yielding timestamped segments.
+    Uploads held in memory are sent whole from the buffer; uploads that spilled to
+    disk may be split on silence, or re-encoded when over the transcription API's size limit.
+    When chunks shorter than CHUNK_MAX_SECONDS are asked for and ffmpeg is available,
+    in-memory uploads are written to disk too, so they are probed and split like the rest.
+    Without ffmpeg a file comes back as one segment whose 'end' is None.
     """
-    client = OpenAI()
+    def transcribe_chunk(chunk_path):
+        with open(chunk_path, "rb") as f:
+            result = clients.openai_client().audio.transcriptions.create(
+                model=TRANSCRIBE_MODEL,
+                file=f,
+                language="en"
+            )
+        return result.text
+
+    split = max_seconds < audio_chunks.CHUNK_MAX_SECONDS and audio_chunks.ffmpeg_available()
+    if spool.path is None and spool.size <= audio_chunks.TRANSCRIBE_MAX_BYTES and not split:
+        result = clients.openai_client().audio.transcriptions.create(
+            model=TRANSCRIBE_MODEL,
+            file=ingest.upload_source(filename, spool),
+            language="en"
+        )
+        yield {"start": 0.0, "end": None, "text": result.text}
+    else:
+        yield from audio_chunks.iter_transcribe_audio(
+            transcribe_chunk, spool.materialize(), compact=compact, max_seconds=max_seconds
+        )
 
-    # Ensure the output directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    transcript_text = ""
+def persist_upload(filename, spool, required=False, wait=False):
+    """
+    Keep a copy of an upload in the audio folder, in the background; failures are logged.
+    With wait, block until the copy exists and raise if it could not be written.
+    Returns the destination path, or None when persisting is disabled.
+    """
+    if not (required or ingest.PERSIST_UPLOADS):
+        return None
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    future = ingest.persist(spool, filepath)
+    if wait:
+        future.result()
+    return filepath
 
-    for filename in os.listdir(input_dir):
-        if not filename.lower().endswith((".wav", ".mp3", ".m4a")):
-            continue
 
-        file_path = os.path.join(input_dir, filename)
-        print(f"🎧 Transcribing: {filename} ...")
+def transcribe_audio_files(input_dir, output_path, tier=cleaning.DEFAULT_CLEANING_TIER, max_workers=TRANSCRIBE_FILE_WORKERS):
+    """
+    Transcribe the audio files in input_dir that are new or changed since the
+    last run into output_path, several at a time.
+    Each file's transcript is kept in the manifest's parts directory and
+    output_path is rebuilt from all of them, so reruns are idempotent.
+    Returns the merged transcript text.
+    """
+    options = {"cleaning": tier}
+    runs = manifest.open_manifest(output_path)
+    pending = runs.plan(input_dir, list_audio_files(input_dir), options)
+    if not pending:
+        print(f"✅ {output_path} is up to date")
+
+    def transcribe_one(item):
+        if runs.reuse(item, options) is not None:
+            print(f"⏭️ {item['filename']} is unchanged")
+            return
+        print(f"🎧 Transcribing: {item['filename']} ...")
+        filtered_text = transcribe_file(item["path"], tier, item["sha256"])
+        runs.record(item, filtered_text, options)
+        print(f"✅ {item['filename']} transcription completed")
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(scheduler.carry_lane(transcribe_one), item): item for item in pending}
+        for future, item in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠️ {item['filename']} transcription failed: {e}")
+                failures.append(f"{item['filename']}: {e}")
+
+    # Merge whatever succeeded; failed files are retried on the next run
+    transcript_text = runs.merge()
+    if failures:
+        raise RuntimeError(f"Transcription failed for {len(failures)} file(s): {'; '.join(failures)}")
+    return transcript_text
 
-        with open(file_path, "rb") as f:
-            result = client.audio.transcriptions.create(
-                model="gpt-4o-mini-transcribe",
-                file=f
-            )
 
-        filtered_text = filter(result.text)
-        with open(output_path, "a") as out:
-            out.write(f"### {filename}\n")
-            out.write(filtered_text + "\n\n")
+def submit_transcription_job(input_dir, output_path, tier=cleaning.DEFAULT_CLEANING_TIER):
+    """
+    Queue transcription of the new or changed audio files in input_dir as a
+    background job. Only file sizes and mtimes are compared before the job is
+    returned; changed files are hashed by their task. Each file's transcript is
+    recorded in the manifest as soon as it completes, and output_path is rebuilt
+    once the job finishes.
+    Returns the Job.
+    """
+    options = {"cleaning": tier}
+    runs = manifest.open_manifest(output_path)
+    filenames = list_audio_files(input_dir)
+    pending = runs.plan(input_dir, filenames, options)
+
+    def make_task(item):
+        def task():
+            unchanged = runs.reuse(item, options)
+            if unchanged is not None:
+                print(f"⏭️ {item['filename']} is unchanged")
+                return unchanged
+            print(f"🎧 Transcribing: {item['filename']} ...")
+            # Background work yields to interactive requests for upstream capacity
+            with scheduler.lane("batch"):
+                filtered_text = transcribe_file(item["path"], tier, item["sha256"])
+            runs.record(item, filtered_text, options)
+            print(f"✅ {item['filename']} transcription completed")
+            return filtered_text
+        return task
+
+    tasks = [(item["filename"], make_task(item)) for item in pending]
+    meta = {
+        "input_dir": input_dir,
+        "output_path": output_path,
+        "cleaning": tier,
+        "unchanged": len(filenames) - len(pending)
+    }
+    return job_manager.submit(tasks, meta=meta, on_done=lambda job: runs.merge())
+
 
-        transcript_text += f"### {filename}\n{filtered_text}\n\n"
-        print(f"✅ {filename} transcription completed")
+def job_response(job_id):
+    """Build the status payload for a transcription job, or None if it is unknown"""
+    data = job_manager.snapshot(job_id)
+    if data is None:
+        return None
+    data["transcript"] = "".join(
+        f"### {f['name']}\n{data['results'][f['name']]}\n\n"
+        for f in data["files"] if f["name"] in data["results"]
+    )
+    return data
 
-    return transcript_text
+
+def filter(transcript, tier=cleaning.DEFAULT_CLEANING_TIER):
+    """
+    Clean a transcript: remove filler words and fix grammar.
+    'local' uses rules only, keeping known terms; the other tiers call Anthropic API.
+    Returns the cleaned text.
+    """
+    tier = cleaning.resolve_tier(transcript, tier)
+    client = None if tier == "local" else clients.anthropic_client()
+    with metrics.span("filter"):
+        return cleaning.clean_transcript(client, transcript, tier, keep=known_terms.contains)
 
 
-def filter(transcript):
-    template = "You will be cleaning and formatting a transcript about technical topics. Here is the transcript to process:\n\n<transcript>\n{{TRANSCRIPT}}\n</transcript>\n\nYour task is to clean and format this transcript by applying the following filters and improvements:\n\n**Content Cleaning Rules:**\n- Remove all filler words such as \"um,\" \"uh,\" \"like,\" \"you know,\" \"so,\" \"well,\" \"actually,\" and similar verbal hesitations\n- Fix grammatical errors and improve sentence structure for clarity\n- Correct run-on sentences by breaking them into shorter, more readable sentences\n- Fix subject-verb agreement and other grammatical issues\n\n**Technical Accuracy Requirements:**\n- Keep all technical terms, jargon, and specialized vocabulary exactly as intended\n- Preserve the meaning and technical accuracy of all statements\n- Do not change or simplify technical concepts\n\n**Formatting and Structure:**\n- Maintain any existing structural elements (numbered lists, sections, etc.)\n- Preserve the logical flow and organization of ideas\n- Standardize capitalization - avoid ALL CAPS for emphasis unless it's a technical acronym or absolutely necessary\n- Ensure consistent punctuation and formatting\n\n**Readability Improvements:**\n- Improve sentence flow and transitions between ideas\n- Ensure paragraphs are well-structured and coherent\n- Make the text more professional and polished while keeping the original meaning intact\n\n**Output Requirements:**\n- Present the cleaned transcript in a clear, professional format\n- Maintain the same overall structure and organization as the original\n- Ensure the final result reads smoothly while preserving all important information\n\nProvide your cleaned and formatted transcript inside <cleaned_transcript> tags."
-    message = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=20000,
-        temperature=0,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": template.replace("{{TRANSCRIPT}}", transcript)
-                    }
-                ]
-            }
-        ]
-    )
-    clean_transcript = re.search(r"<cleaned_transcript>(.*?)</cleaned_transcript>", message.content[0].text, re.DOTALL).group(1).strip()
-    return clean_transcript
+def stream_filter(transcript, tier=cleaning.DEFAULT_CLEANING_TIER):
+    """
+    Clean a transcript like filter(), yielding the cleaned text in pieces
+    as they become available.
+    """
+    tier = cleaning.resolve_tier(transcript, tier)
+    client = None if tier == "local" else clients.anthropic_client()
+    with metrics.span("filter"):
+        yield from cleaning.iter_clean(client, transcript, tier, keep=known_terms.contains)
 
 
-def extract_keywords(transcript):
+def lexicon_keywords(transcript):
+    """
+    Find known terms in a transcript with the local term index, without an LLM call.
+    Returns dict with 'keyword', 'total_count' and 'keywords' (with offsets).
+    """
+    offsets = known_terms.scan(transcript)
+    terms = sorted(offsets, key=lambda term: (term.casefold(), term))
+    return {
+        "keyword": terms,
+        "total_count": len(terms),
+        "keywords": term_index.keyword_records({term: offsets[term] for term in terms}),
+        "source": "lexicon"
+    }
+
+
+def extract_keywords(transcript, mode="auto"):
     """
     Extract biological keywords from transcript using Anthropic API.
-    Returns dict with 'keyword' and 'total_count' fields.
-    """
-    message = client.messages.create(
-        model='claude-3-5-haiku-20241022',
-        max_tokens=1024,
-        temperature=0,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": KEYWORD_EXTRACTION_TEMPLATE.replace('{{TRANSCRIPT}}', transcript)
-                    }
-                ]
-            }
-        ]
-    )
+    Long transcripts are split into overlapping windows extracted in parallel.
+    'lexicon' mode, and 'auto' mode on short inputs fully covered by the known-term
+    lexicon, answer from the local term index without an LLM call.
+    Returns dict with 'keyword', 'total_count' and 'keywords' (terms with offsets).
+    """
+    if uses_lexicon(transcript, mode):
+        return lexicon_keywords(transcript)
 
-    match = re.search(r"```json\s*([\s\S]+?)\s*```", message.content[0].text)
+    try:
+        with metrics.span("extract_keywords"):
+            result = keywords.extract_keywords(clients.anthropic_client(), transcript, mode=mode)
+    except keywords.KeywordExtractionError as e:
+        return {"error": str(e)}, 500
 
-    if match:
-        json_string = match.group(1)
+    return annotate_keywords(transcript, result)
 
-        try:
-            data = json.loads(json_string)
-            # Transform to match expected output format
-            return {
-                "keyword": data.get("biological_terms", []),
-                "total_count": data.get("total_count", 0)
-            }
-
-        except json.JSONDecodeError as e:
-            return {"error": f"Error decoding JSON: {str(e)}"}, 500
+
+def uses_lexicon(transcript, mode):
+    """Whether a keyword request is answered from the local term index"""
+    return mode == "lexicon" or (mode == "auto" and known_terms.covers(transcript))
+
+
+def annotate_keywords(transcript, result):
+    """Add LLM-extracted terms to the term index and attach their offsets in the transcript"""
+    known_terms.add_terms(result["keyword"])
+    result["keywords"] = term_index.keyword_records(term_index.find_offsets(transcript, result["keyword"]))
+    result["source"] = "llm"
+    return result
+
+
+def explain_terms(terms, batch_size=explainer.EXPLAIN_BATCH_SIZE):
+    """
+    Explain biological terms using Anthropic API.
+    Terms are batched into multi-term prompts and explained concurrently.
+    Returns dict of term -> explanation.
+    """
+    return explainer.explain_terms(clients.anthropic_client(), terms, batch_size=batch_size)
+
+
+def explain_terms_cached(terms):
+    """
+    Explain terms, serving repeat terms from the explanation cache.
+    Returns (dict of term -> explanation, number of cache hits).
+    """
+    with metrics.span("explain"):
+        return explainer.explain_terms_cached(clients.anthropic_client(), terms, explanation_cache)
+
+
+def process_live_chunk(session, seq, filename, spool, duration=None):
+    """
+    Transcribe chunk `seq` of a live session and explain only the terms it introduces.
+    Chunks are appended in sequence order; one that arrives early is buffered, and
+    the request that fills a gap processes every chunk it puts in order. The session
+    lock is held only to append chunks and record terms, so slow chunks do not queue.
+    Keywords are extracted from the new text plus a short overlap with the previous chunk.
+    Returns dict with the chunks appended, those still buffered, new terms and their explanations.
+    """
+    # Reject duplicate and out-of-window chunks before paying for their transcription
+    with session.lock:
+        session.reserve(seq)
+
+    try:
+        with metrics.span("transcribe"), metrics.in_flight("transcription"):
+            # A chunk over the transcription API's size limit is re-encoded like a long upload
+            transcript = " ".join(segment["text"] for segment in iter_transcribe_upload(filename, spool))
+
+        if duration is None and spool.path is not None and audio_chunks.ffmpeg_available():
+            duration = audio_chunks.probe_duration(spool.materialize())
+    except BaseException:
+        with session.lock:
+            session.release(seq)
+        raise
+
+    with session.lock:
+        appended = session.add(seq, transcript, duration)
+        pending = sorted(session.pending)
+
+    chunks = [chunk for _, chunk in appended]
+    text = " ".join(chunk["text"] for chunk in chunks if chunk["text"])
+
+    new_terms = []
+    if text:
+        extraction = extract_keywords(f"{appended[0][0]} {text}".strip(), mode="single")
+        if isinstance(extraction, tuple):
+            # Error case
+            raise RuntimeError(extraction[0]["error"])
+        with session.lock:
+            new_terms = session.new_terms(extraction["keyword"])
+
+    # Terms count as reported only once explained, so a failed call is retried with a later chunk
+    try:
+        explanations = explain_terms_cached(new_terms)[0] if new_terms else {}
+    except BaseException:
+        with session.lock:
+            session.forget_terms(new_terms)
+        raise
+    with session.lock:
+        session.forget_terms([term for term in new_terms if term not in explanations])
+        session.explanations.update(explanations)
+
+    return {
+        "session_id": session.id,
+        "seq": seq,
+        "chunks": chunks,
+        "pending": pending,
+        "new_terms": new_terms,
+        "explanations": explanations
+    }
+
+
+def stream_transcript_segments(digest, filename, spool, compact=True):
+    """
+    Yield the transcript segments of an upload: from the cache, by tailing a
+    transcription of the same audio already in flight, or by transcribing it
+    while other requests for the same audio tail this one.
+    """
+    record = transcripts.get(digest)
+    if "raw" in record:
+        metrics.cache_result("transcript_raw", hits=1)
+        yield from record.get("segments") or [{"start": 0.0, "end": None, "text": record["raw"]}]
+        return
+
+    flight, owner = transcripts.begin(digest, "raw")
+    metrics.cache_result("transcript_raw", hits=int(not owner), misses=int(owner))
+    if not owner:
+        # Segments are only published by streaming owners; otherwise wait for the transcript
+        tailed = False
+        for segment in flight.tail():
+            tailed = True
+            yield segment
+        transcript = flight.result()
+        if not tailed:
+            yield from transcripts.get(digest).get("segments") or [{"start": 0.0, "end": None, "text": transcript}]
+        return
+
+    segments = []
+    try:
+        # Another request may have finished between our read and taking ownership
+        record = transcripts.get(digest)
+        if "raw" in record:
+            segments = record.get("segments") or [{"start": 0.0, "end": None, "text": record["raw"]}]
+            yield from segments
+        else:
+            with metrics.in_flight("transcription"):
+                for segment in iter_transcribe_upload(filename, spool, compact=compact, max_seconds=audio_chunks.STREAM_CHUNK_SECONDS):
+                    flight.publish(segment)
+                    segments.append(segment)
+                    yield segment
+            transcripts.update(digest, raw=" ".join(segment["text"] for segment in segments), segments=segments)
+    except BaseException as e:
+        transcripts.finish(digest, "raw", flight, error=e)
+        raise
+    transcripts.finish(digest, "raw", flight, " ".join(segment["text"] for segment in segments))
+
+
+def stream_cleaning(emit, digest, transcript, tier=cleaning.DEFAULT_CLEANING_TIER):
+    """Emit 'cleaned' deltas for a transcript, then 'cleaned_done' with the full text"""
+    tier = cleaning.resolve_tier(transcript, tier)
+    field = cleaning.cache_field(tier)
+    cleaned = transcripts.get(digest).get(field)
+
+    if cleaned is None:
+        parts = []
+        for delta in stream_filter(transcript, tier):
+            parts.append(delta)
+            emit("cleaned", {"delta": delta})
+        cleaned = "".join(parts).strip()
+        transcripts.update(digest, **{field: cleaned})
     else:
-        return {"error": "No JSON found in response"}, 500
-
-
-def explain_terms(terms):
-    template = "You will be explaining a biological term in a clear, concise manner. Here is the term you need to explain:\n\n<biological_term>\n{{BIOLOGICAL_TERM}}\n</biological_term>\n\nYour task is to provide a brief explanation of this biological term that would be understandable to someone with a basic high school level understanding of biology. Your explanation should:\n\n- Be 2-4 sentences long\n- Define what the term means in clear, simple language\n- Include the key function or significance of the concept when relevant\n- Avoid unnecessary jargon, but include essential scientific terminology when needed\n- Be accurate and scientifically sound\n\nIf the term has multiple meanings or applications in biology, focus on the most common or fundamental definition.\n\nWrite your explanation inside <explanation> tags."
-    
-    dic = {}
-    for term in terms:
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=1024,
-            temperature=0,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": template.replace('{{BIOLOGICAL_TERM}}', term)
-                        }
-                    ]
-                }
-            ]
-        )
-        dic[term] = re.search(r"<explanation>(.*?)</explanation>", message.content[0].text, re.DOTALL).group(1).strip()
-    return dic
+        emit("cleaned", {"delta": cleaned})
+
+    emit("cleaned_done", {"text": cleaned, "tier": tier})
+
+
+def stream_keywords(emit, transcript):
+    """
+    Emit 'known_terms' from the local term index right away, then 'keywords'
+    from the LLM and one 'explanation' per term as it is ready
+    """
+    emit("known_terms", lexicon_keywords(transcript))
+
+    result = extract_keywords(transcript)
+
+    if isinstance(result, tuple):
+        # Error case
+        emit("error", {"stage": "keywords", **result[0]})
+        return
+
+    emit("keywords", result)
+    for term, explanation, cached in explainer.iter_explain_terms_cached(clients.anthropic_client(), result["keyword"], explanation_cache):
+        emit("explanation", {"term": term, "explanation": explanation, "cached": cached})
 
 
 @app.route('/transcribe', methods=['POST'])
 def transcribe():
     """
     Endpoint to transcribe audio files.
-    Input: JSON with 'input_dir' and 'output_path'
-    Output: Transcript text
+    Input: JSON with 'input_dir', 'output_path' and optional 'async' (boolean) and 'cleaning' tier
+    Output: Transcript text, or a job id to poll when 'async' is true
     """
     try:
         data = request.get_json()
@@ -264,8 +607,21 @@ def transcribe():
         if not os.path.exists(input_dir):
             return jsonify({"error": f"Input directory '{input_dir}' does not exist"}), 404
 
+        tier = data.get('cleaning', cleaning.DEFAULT_CLEANING_TIER)
+        if tier not in cleaning.CLEANING_TIERS:
+            return jsonify({"error": f"'cleaning' must be one of: {', '.join(cleaning.CLEANING_TIERS)}"}), 400
+
+        # Queue the work and return immediately when asked to run asynchronously
+        if data.get('async'):
+            job = submit_transcription_job(input_dir, output_path, tier)
+            return jsonify({
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": f"/jobs/{job.id}"
+            }), 202
+
         # Perform transcription
-        transcript = transcribe_audio_files(input_dir, output_path)
+        transcript = transcribe_audio_files(input_dir, output_path, tier)
 
         return jsonify({
             "transcript": transcript,
@@ -276,12 +632,66 @@ def transcribe():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Endpoint to queue transcription of an audio directory as a background job.
+    Input: JSON with 'input_dir', 'output_path' and optional 'cleaning' tier
+    Output: JSON with 'job_id', 'status' and 'status_url'
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        input_dir = data.get('input_dir')
+        output_path = data.get('output_path')
+
+        if not input_dir or not output_path:
+            return jsonify({"error": "Both 'input_dir' and 'output_path' are required"}), 400
+
+        if not os.path.exists(input_dir):
+            return jsonify({"error": f"Input directory '{input_dir}' does not exist"}), 404
+
+        tier = data.get('cleaning', cleaning.DEFAULT_CLEANING_TIER)
+        if tier not in cleaning.CLEANING_TIERS:
+            return jsonify({"error": f"'cleaning' must be one of: {', '.join(cleaning.CLEANING_TIERS)}"}), 400
+
+        job = submit_transcription_job(input_dir, output_path, tier)
+
+        return jsonify({
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/jobs/{job.id}"
+        }), 202
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Endpoint to poll a transcription job.
+    Output: JSON with status, per-file progress and the results completed so far
+    """
+    data = job_response(job_id)
+
+    if data is None:
+        return jsonify({"error": f"Job '{job_id}' not found"}), 404
+
+    return jsonify(data), 200
+
+
 @app.route('/extract', methods=['POST'])
 def extract():
     """
     Endpoint to extract biological keywords from transcript.
-    Input: JSON with 'transcript' field
-    Output: JSON with 'keyword' (list of strings) and 'total_count' (integer)
+    Input: JSON with 'transcript' field, optional 'mode' ('auto', 'single', 'chunked' or 'lexicon')
+           and optional 'sha256' or 'session_id' of the archived session to save the terms to
+    Output: JSON with 'keyword' (list of strings), 'total_count' (integer) and
+            'keywords' (terms with scores and character offsets)
     """
     try:
         data = request.get_json()
@@ -294,19 +704,127 @@ def extract():
         if not transcript:
             return jsonify({"error": "'transcript' field is required"}), 400
 
+        mode = data.get('mode', 'auto')
+        if mode not in EXTRACT_MODES:
+            return jsonify({"error": f"'mode' must be one of: {', '.join(EXTRACT_MODES)}"}), 400
+
         # Extract keywords
-        result = extract_keywords(transcript)
+        result = extract_keywords(transcript, mode=mode)
 
         if isinstance(result, tuple):
             # Error case
             return jsonify(result[0]), result[1]
 
+        archive_terms(archive_target(data), transcript, terms=result["keyword"])
         return jsonify(result), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/extract-batch', methods=['POST'])
+def extract_batch():
+    """
+    Endpoint to extract biological keywords from many transcripts.
+    Input: JSONL body (one {"id", "transcript"} object per line) with optional query
+           parameters 'mode', 'max_workers' and 'checkpoint' (a name under
+           BATCH_CHECKPOINT_DIR), or JSON with 'input_dir' and the same options as fields
+    Output: application/x-ndjson stream with one {"id", ...} result per transcript in
+            completion order, then a {"done": true, ...} summary line
+    """
+    try:
+        if request.mimetype == 'application/json':
+            data = request.get_json()
+
+            if not data:
+                return jsonify({"error": "No JSON data provided"}), 400
+
+            input_dir = data.get('input_dir')
+
+            if not input_dir:
+                return jsonify({"error": "'input_dir' is required for JSON requests; send JSONL to stream transcripts"}), 400
+
+            if not os.path.isdir(input_dir):
+                return jsonify({"error": f"Input directory '{input_dir}' does not exist"}), 404
+
+            options = data
+            documents = batch.iter_directory(input_dir)
+        else:
+            # Transcripts are read from the body as they are needed
+            options = request.args
+            documents = batch.iter_jsonl(request.stream)
+
+        mode = options.get('mode', 'auto')
+        if mode not in EXTRACT_MODES:
+            return jsonify({"error": f"'mode' must be one of: {', '.join(EXTRACT_MODES)}"}), 400
+
+        try:
+            max_workers = int(options.get('max_workers', batch.BATCH_MAX_WORKERS))
+        except (TypeError, ValueError):
+            return jsonify({"error": "'max_workers' must be an integer"}), 400
+
+        checkpoint = None
+        if options.get('checkpoint'):
+            try:
+                checkpoint = batch.Checkpoint(batch.checkpoint_path(options['checkpoint']))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    def generate():
+        stats = {}
+        try:
+            # Backfills yield upstream capacity to interactive requests
+            with scheduler.lane("batch"):
+                for record in batch.run_batch(
+                    documents, lambda text: extract_keywords(text, mode=mode), max_workers, checkpoint, stats
+                ):
+                    yield json.dumps(record) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        yield json.dumps({"done": True, **stats}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/explain', methods=['POST'])
+def explain():
+    """
+    Endpoint to explain biological terms.
+    Input: JSON with 'terms' (list of strings) or 'term' (string), and optional
+           'sha256' or 'session_id' of the archived session to save the explanations to
+    Output: JSON with 'explanations' (term -> explanation) and 'cache_hits' (integer)
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        terms = data.get('terms')
+        if terms is None and data.get('term'):
+            terms = [data.get('term')]
+
+        if not terms or not isinstance(terms, list):
+            return jsonify({"error": "'terms' field is required"}), 400
+
+        explanations, cache_hits = explain_terms_cached(terms)
+        archive_terms(archive_target(data), explanations=explanations)
+
+        return jsonify({
+            "explanations": explanations,
+            "cache_hits": cache_hits
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/upload', methods=['POST'])
 def upload_audio():
     """
@@ -335,15 +853,17 @@ def upload_audio():
         name, ext = os.path.splitext(original_filename)
         filename = f"{name}_{timestamp}{ext}"
 
-        # Save file to audio directory
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Saving the file is the point of this endpoint, so wait for the write
+        try:
+            filepath = persist_upload(filename, file.stream, required=True, wait=True)
+        except OSError as e:
+            return jsonify({"error": f"Could not save file: {e}"}), 500
 
         return jsonify({
             "message": "File uploaded successfully",
             "filename": filename,
             "filepath": filepath,
-            "size": os.path.getsize(filepath)
+            "size": file.stream.size
         }), 200
 
     except Exception as e:
@@ -354,8 +874,8 @@ def upload_audio():
 def transcribe_upload():
     """
     Endpoint to upload and transcribe a single audio file.
-    Input: multipart/form-data with 'audio' file
-    Output: JSON with transcript text
+    Input: multipart/form-data with 'audio' file and optional 'compact' ('true' or 'false')
+    Output: JSON with transcript text and timestamped segments
     """
     try:
         # Check if audio file is in request
@@ -378,24 +898,358 @@ def transcribe_upload():
         name, ext = os.path.splitext(original_filename)
         filename = f"{name}_{timestamp}{ext}"
 
-        # Save file to audio directory
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # The upload was hashed as it streamed in; optionally keep a copy
+        spool = file.stream
+        digest = spool.hexdigest()
+        filepath = persist_upload(filename, spool)
 
-        # Transcribe the saved file
-        client = OpenAI()
+        # Long recordings are split on silence and the chunks transcribed concurrently
+        compact = request.form.get('compact', 'true').lower() != 'false'
 
-        with open(filepath, "rb") as f:
-            result = client.audio.transcriptions.create(
-                model="gpt-4o-mini-transcribe",
-                file=f,
-                language="en"
-            )
+        # Transcribe the upload unless these bytes were transcribed before
+        def transcribe_file():
+            with metrics.span("transcribe"), metrics.in_flight("transcription"):
+                segments = list(iter_transcribe_upload(original_filename, spool, compact=compact))
+            transcripts.update(digest, segments=segments)
+            return " ".join(segment["text"] for segment in segments)
+
+        transcript, cached = transcripts.get_or_compute(digest, "raw", transcribe_file)
+        segments = transcripts.get(digest).get("segments") or [{"start": 0.0, "end": None, "text": transcript}]
+        archive_session(digest, "upload", title=original_filename, transcript=transcript, segments=segments)
 
         return jsonify({
-            "transcript": result.text,
+            "transcript": transcript,
+            "segments": segments,
             "filename": filename,
-            "filepath": filepath
+            "filepath": filepath,
+            "sha256": digest,
+            "cached": cached
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/transcribe-stream', methods=['POST'])
+def transcribe_stream():
+    """
+    Endpoint to upload an audio file and stream the processing pipeline.
+    Input: multipart/form-data with 'audio' file and optional 'compact' ('true' or 'false')
+           and 'cleaning' tier
+    Output: text/event-stream with 'upload', 'segment', 'transcript', 'cleaned',
+            'cleaned_done', 'known_terms', 'keywords', 'explanation', 'error' and 'done' events
+    """
+    try:
+        # Check if audio file is in request
+        if 'audio' not in request.files:
+            return jsonify({"error": "No audio file provided"}), 400
+
+        file = request.files['audio']
+
+        # Check if file was selected
+        if file.filename == '':
+            return jsonify({"error": "No file selected"}), 400
+
+        # Check if file type is allowed
+        if not allowed_file(file.filename):
+            return jsonify({"error": f"File type not allowed. Supported: {', '.join(ALLOWED_EXTENSIONS)}"}), 400
+
+        # Generate unique filename with timestamp
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        original_filename = secure_filename(file.filename)
+        name, ext = os.path.splitext(original_filename)
+        filename = f"{name}_{timestamp}{ext}"
+
+        compact = request.form.get('compact', 'true').lower() != 'false'
+
+        tier = request.form.get('cleaning', cleaning.DEFAULT_CLEANING_TIER)
+        if tier not in cleaning.CLEANING_TIERS:
+            return jsonify({"error": f"'cleaning' must be one of: {', '.join(cleaning.CLEANING_TIERS)}"}), 400
+
+        # The upload was hashed as it streamed in; optionally keep a copy
+        spool = file.stream
+        digest = spool.hexdigest()
+        filepath = persist_upload(filename, spool)
+
+        # The response outlives the request, so the spool is closed once streaming ends
+        request.detach(spool)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    def generate():
+        try:
+            metrics.registry.inc("in_flight", 1, kind="stream")
+            yield streaming.sse_event("upload", {"filename": filename, "filepath": filepath, "sha256": digest})
+
+            # Transcript segments, from the cache or as each chunk finishes
+            segments = []
+            for segment in stream_transcript_segments(digest, original_filename, spool, compact):
+                yield streaming.sse_event("segment", {"index": len(segments), **segment})
+                segments.append(segment)
+            transcript = " ".join(segment["text"] for segment in segments)
+
+            yield streaming.sse_event("transcript", {"text": transcript})
+
+            # Cleaning and keyword extraction run side by side
+            channel = streaming.EventChannel()
+            channel.start("cleaning", stream_cleaning, digest, transcript, tier)
+            channel.start("keywords", stream_keywords, transcript)
+            archived = {"transcript": transcript, "segments": segments, "explanations": {}}
+            for event, data in channel:
+                if event == "cleaned_done":
+                    archived["cleaned"] = data["text"]
+                elif event == "keywords":
+                    archived["terms"] = data["keywords"]
+                elif event == "explanation":
+                    archived["explanations"][data["term"]] = data["explanation"]
+                yield streaming.sse_event(event, data)
+
+            archive_session(digest, "stream", title=original_filename, **archived)
+
+        except Exception as e:
+            yield streaming.sse_event("error", {"stage": "transcription", "error": str(e)})
+
+        finally:
+            spool.close()
+            metrics.registry.inc("in_flight", -1, kind="stream")
+
+        yield streaming.sse_event("done", {})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route('/sessions', methods=['POST'])
+def create_session():
+    """
+    Endpoint to open a live recording session.
+    Output: JSON with 'session_id'
+    """
+    session = session_manager.create()
+    return jsonify({"session_id": session.id}), 201
+
+
+@app.route('/sessions/<session_id>', methods=['GET'])
+def get_session(session_id):
+    """
+    Endpoint to read the state of a live session.
+    Output: JSON with the transcript so far, its chunks, terms and explanations
+    """
+    session = session_manager.get(session_id)
+
+    if session is None:
+        return jsonify({"error": f"Session '{session_id}' not found"}), 404
+
+    with session.lock:
+        return jsonify(session.to_dict()), 200
+
+
+@app.route('/sessions/<session_id>/chunks', methods=['POST'])
+def add_session_chunk(session_id):
+    """
+    Endpoint to add a short audio chunk to a live session.
+    Input: multipart/form-data with 'audio' file, 'seq' (chunk number, from 0) and optional 'duration' (seconds)
+    Output: JSON with the chunks appended in order, the chunk numbers still buffered,
+            newly seen terms and their explanations
+    """
+    try:
+        session = session_manager.get(session_id)
+
+        if session is None:
+            return jsonify({"error": f"Session '{session_id}' not found"}), 404
+
+        # Check if audio file is in request
+        if 'audio' not in request.files:
+            return jsonify({"error": "No audio file provided"}), 400
+
+        file = request.files['audio']
+
+        # Check if file type is allowed
+        if not allowed_file(file.filename or ''):
+            return jsonify({"error": f"File type not allowed. Supported: {', '.join(ALLOWED_EXTENSIONS)}"}), 400
+
+        seq = request.form.get('seq', type=int)
+        if seq is None or seq < 0:
+            return jsonify({"error": "'seq' field is required (chunk number, from 0)"}), 400
+
+        duration = request.form.get('duration', type=float)
+
+        # Chunks are transcribed straight from the upload buffer and never written to the audio folder
+        return jsonify(process_live_chunk(session, seq, secure_filename(file.filename), file.stream, duration)), 200
+
+    except sessions.ChunkOrderError as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    """
+    Endpoint to close a live session and save it to the archive.
+    Output: JSON with the final session state
+    """
+    session = session_manager.close(session_id)
+
+    if session is None:
+        return jsonify({"error": f"Session '{session_id}' not found"}), 404
+
+    return jsonify(session.to_dict()), 200
+
+
+def archive_limit(default=archive.ARCHIVE_DEFAULT_LIMIT):
+    """Read the 'limit' query parameter, capped at ARCHIVE_MAX_LIMIT. Raises ValueError if it is not a number."""
+    limit = request.args.get('limit', default)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("'limit' must be an integer")
+    return max(1, min(limit, archive.ARCHIVE_MAX_LIMIT))
+
+
+@app.route('/archive/sessions', methods=['GET'])
+def list_archived_sessions():
+    """
+    Endpoint to list archived sessions, most recently updated first.
+    Input: optional query parameters 'limit', 'offset' and 'source' ('file', 'upload', 'stream' or 'live')
+    Output: JSON with 'sessions' (summaries without transcripts)
+    """
+    try:
+        limit = archive_limit()
+        offset = request.args.get('offset', 0, type=int)
+        return jsonify({
+            "sessions": session_archive.list(limit=limit, offset=max(offset, 0), source=request.args.get('source')),
+            "limit": limit,
+            "offset": offset
+        }), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/archive/sessions/<session_id>', methods=['GET'])
+def get_archived_session(session_id):
+    """
+    Endpoint to read an archived session.
+    Output: JSON with the raw and cleaned transcript, segments, and terms with offsets and explanations
+    """
+    try:
+        record = session_archive.get(session_id)
+
+        if record is None:
+            return jsonify({"error": f"Archived session '{session_id}' not found"}), 404
+
+        return jsonify(record), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/archive/sessions/<session_id>', methods=['DELETE'])
+def delete_archived_session(session_id):
+    """
+    Endpoint to delete an archived session and its terms.
+    Output: JSON with 'deleted' (session id)
+    """
+    try:
+        if not session_archive.delete(session_id):
+            return jsonify({"error": f"Archived session '{session_id}' not found"}), 404
+
+        return jsonify({"deleted": session_id}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/archive/search', methods=['GET'])
+def search_archive():
+    """
+    Endpoint to search past transcripts and terms across sessions.
+    Input: query parameters 'q' (words; the last one also matches as a prefix) and optional 'limit'
+    Output: JSON with 'sessions' (best matches first, with a highlighted 'snippet') and matching 'terms'
+    """
+    try:
+        query = request.args.get('q', '').strip()
+
+        if not query:
+            return jsonify({"error": "'q' parameter is required"}), 400
+
+        limit = archive_limit()
+        with metrics.span("archive_search"):
+            return jsonify({
+                "query": query,
+                "sessions": session_archive.search(query, limit=limit),
+                "terms": session_archive.search_terms(query, limit=limit)
+            }), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/archive/terms', methods=['GET'])
+def search_archived_terms():
+    """
+    Endpoint to look up archived terms by name, e.g. for autocomplete.
+    Input: query parameters 'q' and optional 'limit'
+    Output: JSON with 'terms' (term, latest explanation, session count, occurrences and session ids)
+    """
+    try:
+        query = request.args.get('q', '').strip()
+
+        if not query:
+            return jsonify({"error": "'q' parameter is required"}), 400
+
+        with metrics.span("archive_search"):
+            return jsonify({"terms": session_archive.search_terms(query, limit=archive_limit())}), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/archive/glossary', methods=['GET'])
+def export_glossary():
+    """
+    Endpoint to export a glossary pack from archived sessions.
+    Input: optional query parameters 'session_id' (repeatable; all sessions by default),
+           'min_sessions' (integer) and 'format' ('json' or 'terms')
+    Output: JSON with 'terms' (term, latest explanation, session count, occurrences), or with
+            format=terms a plain-text term list for TERM_LEXICON_PATH and 'flask warm-explanations'
+    """
+    try:
+        output = request.args.get('format', 'json')
+        if output not in ("json", "terms"):
+            return jsonify({"error": "'format' must be one of: json, terms"}), 400
+
+        session_ids = [value for param in request.args.getlist('session_id') for value in param.split(',') if value]
+        min_sessions = request.args.get('min_sessions', 1, type=int)
+
+        with metrics.span("archive_glossary"):
+            terms = session_archive.glossary(session_ids=session_ids or None, min_sessions=min_sessions)
+
+        exported_at = datetime.now().isoformat(timespec='seconds')
+        if output == "terms":
+            lines = [f"# Glossary pack exported {exported_at}, {len(terms)} terms"]
+            lines.extend(entry["term"] for entry in terms)
+            return Response(
+                "\n".join(lines) + "\n",
+                mimetype='text/plain',
+                headers={"Content-Disposition": "attachment; filename=glossary.txt"}
+            )
+
+        return jsonify({
+            "terms": terms,
+            "total_count": len(terms),
+            "exported_at": exported_at
         }), 200
 
     except Exception as e:
@@ -416,7 +1270,28 @@ def root():
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({"status": "healthy"}), 200
+    return jsonify({
+        "status": "healthy",
+        "scheduler": scheduler.default_scheduler.stats(),
+        "prompts": prompts.versions()
+    }), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics: stage timings, upstream calls, tokens and cost, caches and in-flight work"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.cli.command('warm-explanations')
+@click.argument('glossary_path', default=term_cache.SEED_GLOSSARY)
+def warm_explanations(glossary_path):
+    """Preload the explanation cache from a glossary file (one term per line)"""
+    terms = term_cache.load_glossary(glossary_path)
+    print(f"🔥 Warming explanation cache with {len(terms)} terms ...")
+    with scheduler.lane("batch"):
+        explanations, cache_hits = explain_terms_cached(terms)
+    print(f"✅ {len(explanations)} terms cached ({cache_hits} already present)")
 
 
 if __name__ == '__main__':
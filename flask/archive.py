@@ -0,0 +1,329 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+
+from term_cache import CACHE_DIR, normalize_term
+
+# Archive location and query limits
+ARCHIVE_DB = os.environ.get("ARCHIVE_DB", os.path.join(CACHE_DIR, 'archive.sqlite3'))
+ARCHIVE_SESSIONS = os.environ.get("ARCHIVE_SESSIONS", "true").lower() in ("1", "true", "yes")
+ARCHIVE_DEFAULT_LIMIT = 20
+ARCHIVE_MAX_LIMIT = 100
+
+SNIPPET_TOKENS = 16
+WORD_PATTERN = re.compile(r"\w+")
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
+        title TEXT NOT NULL DEFAULT '',
+        transcript TEXT NOT NULL DEFAULT '',
+        cleaned TEXT NOT NULL DEFAULT '',
+        segments TEXT NOT NULL DEFAULT '[]',
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at);
+
+    CREATE TABLE IF NOT EXISTS session_terms (
+        session_id TEXT NOT NULL,
+        key TEXT NOT NULL,
+        term TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        offsets TEXT NOT NULL DEFAULT '[]',
+        explanation TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (session_id, key)
+    );
+    CREATE INDEX IF NOT EXISTS idx_session_terms_key ON session_terms (key);
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS sessions_fts USING fts5(
+        title, transcript, cleaned, content='sessions', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS sessions_fts_insert AFTER INSERT ON sessions BEGIN
+        INSERT INTO sessions_fts (rowid, title, transcript, cleaned)
+        VALUES (new.rowid, new.title, new.transcript, new.cleaned);
+    END;
+    CREATE TRIGGER IF NOT EXISTS sessions_fts_delete AFTER DELETE ON sessions BEGIN
+        INSERT INTO sessions_fts (sessions_fts, rowid, title, transcript, cleaned)
+        VALUES ('delete', old.rowid, old.title, old.transcript, old.cleaned);
+    END;
+    CREATE TRIGGER IF NOT EXISTS sessions_fts_update AFTER UPDATE ON sessions BEGIN
+        INSERT INTO sessions_fts (sessions_fts, rowid, title, transcript, cleaned)
+        VALUES ('delete', old.rowid, old.title, old.transcript, old.cleaned);
+        INSERT INTO sessions_fts (rowid, title, transcript, cleaned)
+        VALUES (new.rowid, new.title, new.transcript, new.cleaned);
+    END;
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS terms_fts USING fts5(
+        term, explanation, content='session_terms', tokenize='unicode61', prefix='2 3'
+    );
+    CREATE TRIGGER IF NOT EXISTS terms_fts_insert AFTER INSERT ON session_terms BEGIN
+        INSERT INTO terms_fts (rowid, term, explanation) VALUES (new.rowid, new.term, new.explanation);
+    END;
+    CREATE TRIGGER IF NOT EXISTS terms_fts_delete AFTER DELETE ON session_terms BEGIN
+        INSERT INTO terms_fts (terms_fts, rowid, term, explanation) VALUES ('delete', old.rowid, old.term, old.explanation);
+    END;
+    CREATE TRIGGER IF NOT EXISTS terms_fts_update AFTER UPDATE ON session_terms BEGIN
+        INSERT INTO terms_fts (terms_fts, rowid, term, explanation) VALUES ('delete', old.rowid, old.term, old.explanation);
+        INSERT INTO terms_fts (rowid, term, explanation) VALUES (new.rowid, new.term, new.explanation);
+    END;
+"""
+
+# Most recent explanation of a term across sessions, optionally restricted by {sessions}
+LATEST_EXPLANATION = """
+    SELECT e.explanation FROM session_terms e JOIN sessions s ON s.id = e.session_id
+    WHERE e.key = t.key AND e.explanation != ''{sessions} ORDER BY s.updated_at DESC LIMIT 1
+"""
+
+
+def fts_query(text, prefix=True):
+    """
+    Turn free text into an FTS5 query matching every word, so user input
+    never reaches the query syntax. The last word also matches as a prefix.
+    Returns None when the text has no words.
+    """
+    words = WORD_PATTERN.findall(text or "")
+    if not words:
+        return None
+    query = " ".join(f'"{word}"' for word in words)
+    return query + "*" if prefix else query
+
+
+class SessionArchive:
+    """
+    On-disk SQLite store of processed recordings and live sessions: the raw
+    and cleaned transcript, segments, extracted terms with their offsets and
+    the terms' explanations. Transcripts and terms are indexed with FTS5, so
+    past sessions can be searched and turned into glossaries without LLM calls.
+    Sessions are keyed by the audio sha256, or the live session id.
+    """
+
+    def __init__(self, path=ARCHIVE_DB):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        """Return this thread's connection, creating the schema on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        with self._init_lock:
+            if not self._initialized:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        # Transactions are opened explicitly, so a save is read and written atomically
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(SCHEMA)
+                self._initialized = True
+
+        self._local.conn = conn
+        return conn
+
+    def save(self, session_id, source, title=None, transcript=None, cleaned=None, segments=None,
+             terms=None, explanations=None, created_at=None):
+        """
+        Create or update a session. Fields left as None keep their stored value,
+        so a transcript archived by one request can be completed by a later one.
+        `terms` is a list of keyword records ({'term', 'count', 'offsetRanges'}, as
+        returned by /extract) and `explanations` a dict of term -> explanation.
+        """
+        now = time.time()
+        fields = {
+            "title": title,
+            "transcript": transcript,
+            "cleaned": cleaned,
+            "segments": json.dumps(segments) if segments is not None else None
+        }
+        fields = {name: value for name, value in fields.items() if value is not None}
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = conn.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if exists:
+                assignments = "".join(f", {name} = ?" for name in fields)
+                conn.execute(
+                    f"UPDATE sessions SET updated_at = ?{assignments} WHERE id = ?",
+                    [now, *fields.values(), session_id]
+                )
+            else:
+                columns = ["id", "source", "created_at", "updated_at", *fields]
+                conn.execute(
+                    f"INSERT INTO sessions ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    [session_id, source, created_at or now, now, *fields.values()]
+                )
+
+            explanations = dict(explanations or {})
+            for record in terms or []:
+                term = record["term"]
+                conn.execute(
+                    "INSERT INTO session_terms (session_id, key, term, count, offsets, explanation) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (session_id, key) DO UPDATE SET term = excluded.term, count = excluded.count, "
+                    "offsets = excluded.offsets, "
+                    "explanation = CASE WHEN excluded.explanation != '' THEN excluded.explanation ELSE explanation END",
+                    [session_id, normalize_term(term), term, record.get("count", len(record.get("offsetRanges", []))),
+                     json.dumps(record.get("offsetRanges", [])), explanations.pop(term, "")]
+                )
+            for term, explanation in explanations.items():
+                conn.execute(
+                    "INSERT INTO session_terms (session_id, key, term, explanation) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (session_id, key) DO UPDATE SET explanation = excluded.explanation",
+                    [session_id, normalize_term(term), term, explanation]
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def transcript(self, session_id):
+        """Return the raw transcript of a session, or None if it is not archived"""
+        row = self._connect().execute("SELECT transcript FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row["transcript"] if row else None
+
+    def get(self, session_id):
+        """Return a session with its segments and terms, or None if it is unknown"""
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+
+        terms = conn.execute(
+            "SELECT term, count, offsets, explanation FROM session_terms WHERE session_id = ? ORDER BY key",
+            (session_id,)
+        ).fetchall()
+        return {
+            "session_id": row["id"],
+            "source": row["source"],
+            "title": row["title"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "transcript": row["transcript"],
+            "cleaned": row["cleaned"],
+            "segments": json.loads(row["segments"]),
+            "terms": [
+                {
+                    "term": term["term"],
+                    "count": term["count"],
+                    "offsetRanges": json.loads(term["offsets"]),
+                    "explanation": term["explanation"] or None
+                }
+                for term in terms
+            ]
+        }
+
+    def list(self, limit=ARCHIVE_DEFAULT_LIMIT, offset=0, source=None):
+        """Return session summaries, most recently updated first"""
+        where, params = ("WHERE s.source = ?", [source]) if source else ("", [])
+        rows = self._connect().execute(
+            "SELECT s.id, s.source, s.title, s.created_at, s.updated_at, length(s.transcript) AS chars, "
+            "(SELECT COUNT(*) FROM session_terms t WHERE t.session_id = s.id) AS term_count "
+            f"FROM sessions s {where} ORDER BY s.updated_at DESC LIMIT ? OFFSET ?",
+            [*params, limit, offset]
+        ).fetchall()
+        return [_summary(row) for row in rows]
+
+    def delete(self, session_id):
+        """Delete a session and its terms. Returns whether it existed."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM session_terms WHERE session_id = ?", (session_id,))
+            deleted = conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return deleted > 0
+
+    def search(self, query, limit=ARCHIVE_DEFAULT_LIMIT):
+        """
+        Full-text search over titles, raw and cleaned transcripts.
+        Returns the best matches first, each with a snippet where matches are marked **like this**.
+        """
+        match = fts_query(query)
+        if match is None:
+            return []
+        rows = self._connect().execute(
+            "SELECT s.id, s.source, s.title, s.created_at, s.updated_at, length(s.transcript) AS chars, "
+            "(SELECT COUNT(*) FROM session_terms t WHERE t.session_id = s.id) AS term_count, "
+            f"snippet(sessions_fts, -1, '**', '**', '…', {SNIPPET_TOKENS}) AS snippet "
+            "FROM sessions_fts JOIN sessions s ON s.rowid = sessions_fts.rowid "
+            "WHERE sessions_fts MATCH ? ORDER BY bm25(sessions_fts, 5.0, 1.0, 1.0) LIMIT ?",
+            (match, limit)
+        ).fetchall()
+        return [{**_summary(row), "snippet": row["snippet"]} for row in rows]
+
+    def search_terms(self, query, limit=ARCHIVE_DEFAULT_LIMIT):
+        """
+        Find archived terms whose name matches the query (the last word as a prefix).
+        Returns one entry per term across sessions, the most widespread first.
+        """
+        match = fts_query(query)
+        if match is None:
+            return []
+        rows = self._connect().execute(
+            "SELECT t.key, MAX(t.term) AS term, COUNT(DISTINCT t.session_id) AS sessions, "
+            f"SUM(t.count) AS occurrences, GROUP_CONCAT(DISTINCT t.session_id) AS session_ids, "
+            f"({LATEST_EXPLANATION.format(sessions='')}) AS explanation "
+            "FROM terms_fts JOIN session_terms t ON t.rowid = terms_fts.rowid "
+            "WHERE terms_fts MATCH ? GROUP BY t.key ORDER BY sessions DESC, occurrences DESC, t.key LIMIT ?",
+            (f"term : ({match})", limit)
+        ).fetchall()
+        return [
+            {**_term(row), "session_ids": row["session_ids"].split(",")}
+            for row in rows
+        ]
+
+    def glossary(self, session_ids=None, min_sessions=1):
+        """
+        Every archived term, or those of the given sessions, with its latest
+        explanation and how widely it was used. Sorted by term.
+        """
+        where, restrict, params = "", "", []
+        if session_ids:
+            placeholders = ", ".join("?" * len(session_ids))
+            where = f"WHERE t.session_id IN ({placeholders})"
+            restrict = f" AND e.session_id IN ({placeholders})"
+            params = list(session_ids)
+        rows = self._connect().execute(
+            f"SELECT t.key, MAX(t.term) AS term, ({LATEST_EXPLANATION.format(sessions=restrict)}) AS explanation, "
+            "COUNT(DISTINCT t.session_id) AS sessions, SUM(t.count) AS occurrences "
+            f"FROM session_terms t {where} GROUP BY t.key HAVING COUNT(DISTINCT t.session_id) >= ? ORDER BY t.key",
+            [*params, *params, min_sessions]
+        ).fetchall()
+        return [_term(row) for row in rows]
+
+
+def _summary(row):
+    return {
+        "session_id": row["id"],
+        "source": row["source"],
+        "title": row["title"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "chars": row["chars"],
+        "term_count": row["term_count"]
+    }
+
+
+def _term(row):
+    return {
+        "term": row["term"],
+        "explanation": row["explanation"],
+        "sessions": row["sessions"],
+        "occurrences": row["occurrences"]
+    }
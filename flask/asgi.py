@@ -0,0 +1,403 @@
+"""
+ASGI entry point: async handlers for the routes that mostly wait on upstream
+APIs, with every other route served by the Flask app.
+
+/extract, /explain and /transcribe-upload are implemented here with the
+SDKs' async clients, so a waiting request holds no thread. They share the
+scheduler, caches and term index with the Flask app and return the same
+response shapes. Everything else is passed to the Flask app through a WSGI
+bridge with its own thread pool (WSGI_WORKERS).
+
+Run from the flask/ directory:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+"""
+import os
+import asyncio
+from datetime import datetime
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.routing import Mount, Route
+from werkzeug.utils import secure_filename
+
+import app as flask_app
+import audio_chunks
+import clients
+import explainer
+import ingest
+import keywords
+import metrics
+
+# Threads serving the Flask routes
+WSGI_WORKERS = int(os.environ.get("WSGI_WORKERS", "16"))
+
+# Same CORS policy as the Flask app, applied to the async routes only (Flask adds its own)
+CORS_MIDDLEWARE = [Middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization", "Accept"],
+    expose_headers=["Content-Type"],
+    allow_credentials=False,
+    max_age=3600
+)]
+
+
+class RequestMetrics:
+    """ASGI middleware that counts requests like the Flask app's hooks and adds the Server-Timing header"""
+
+    def __init__(self, app, endpoint):
+        self.app = app
+        self.endpoint = endpoint
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        token = metrics.start_request(self.endpoint)
+        finished = False
+
+        async def send_with_timing(message):
+            nonlocal finished
+            if message["type"] == "http.response.start" and not finished:
+                finished = True
+                timing = metrics.finish_request(token, message["status"])
+                if timing:
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if not finished:
+                metrics.finish_request(token, 500)
+
+
+def route_middleware(endpoint):
+    """CORS and request metrics for an async route"""
+    return [*CORS_MIDDLEWARE, Middleware(RequestMetrics, endpoint=endpoint)]
+
+
+async def read_json(request):
+    """Parse a JSON request body, returning None when it is missing or invalid"""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def extract(request):
+    """
+    Endpoint to extract biological keywords from transcript.
+    Input: JSON with 'transcript' field, optional 'mode' ('auto', 'single', 'chunked' or 'lexicon')
+           and optional 'sha256' or 'session_id' of the archived session to save the terms to
+    Output: JSON with 'keyword' (list of strings), 'total_count' (integer) and
+            'keywords' (terms with scores and character offsets)
+    """
+    try:
+        data = await read_json(request)
+
+        if not data:
+            return JSONResponse({"error": "No JSON data provided"}, 400)
+
+        transcript = data.get('transcript')
+
+        if not transcript:
+            return JSONResponse({"error": "'transcript' field is required"}, 400)
+
+        mode = data.get('mode', 'auto')
+        if mode not in flask_app.EXTRACT_MODES:
+            return JSONResponse({"error": f"'mode' must be one of: {', '.join(flask_app.EXTRACT_MODES)}"}, 400)
+
+        target = flask_app.archive_target(data)
+        if flask_app.uses_lexicon(transcript, mode):
+            result = flask_app.lexicon_keywords(transcript)
+            await asyncio.to_thread(flask_app.archive_terms, target, transcript, terms=result["keyword"])
+            return JSONResponse(result, 200)
+
+        try:
+            with metrics.span("extract_keywords"):
+                result = await keywords.extract_keywords_async(clients.async_anthropic_client(), transcript, mode=mode)
+        except keywords.KeywordExtractionError as e:
+            return JSONResponse({"error": str(e)}, 500)
+
+        # The term index and the archive write to disk
+        result = await asyncio.to_thread(flask_app.annotate_keywords, transcript, result)
+        await asyncio.to_thread(flask_app.archive_terms, target, transcript, terms=result["keyword"])
+        return JSONResponse(result, 200)
+
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, 500)
+
+
+async def explain(request):
+    """
+    Endpoint to explain biological terms.
+    Input: JSON with 'terms' (list of strings) or 'term' (string), and optional
+           'sha256' or 'session_id' of the archived session to save the explanations to
+    Output: JSON with 'explanations' (term -> explanation) and 'cache_hits' (integer)
+    """
+    try:
+        data = await read_json(request)
+
+        if not data:
+            return JSONResponse({"error": "No JSON data provided"}, 400)
+
+        terms = data.get('terms')
+        if terms is None and data.get('term'):
+            terms = [data.get('term')]
+
+        if not terms or not isinstance(terms, list):
+            return JSONResponse({"error": "'terms' field is required"}, 400)
+
+        with metrics.span("explain"):
+            explanations, cache_hits = await explainer.explain_terms_cached_async(
+                clients.async_anthropic_client(), terms, flask_app.explanation_cache
+            )
+        await asyncio.to_thread(flask_app.archive_terms, flask_app.archive_target(data), explanations=explanations)
+
+        return JSONResponse({
+            "explanations": explanations,
+            "cache_hits": cache_hits
+        }, 200)
+
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, 500)
+
+
+class UploadTooLarge(ValueError):
+    """Raised when a request body is over MAX_FILE_SIZE"""
+
+
+async def read_upload_form(request, file_field):
+    """
+    Parse a multipart body as it arrives, like the Flask app's IngestRequest:
+    the `file_field` file is written straight into a hashing spool and the body
+    is capped at MAX_FILE_SIZE, checked on Content-Length before parsing and
+    again while copying. Returns (fields, filename, spool); filename and spool
+    are None when no file was sent. Raises UploadTooLarge, or ValueError for a
+    body that is not multipart/form-data.
+    """
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > flask_app.MAX_FILE_SIZE:
+        raise UploadTooLarge("File too large")
+
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+    if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise ValueError("Expected multipart/form-data")
+
+    fields = {}
+    upload = {"filename": None, "spool": None}
+    part = {}
+
+    def on_part_begin():
+        part.clear()
+        part.update(headers={}, field=b"", value=b"", data=[], target=None)
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"] = part["value"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition"))
+        part["name"] = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        if part["name"] == file_field and filename is not None and upload["spool"] is None:
+            upload["filename"] = filename.decode("utf-8", "replace")
+            # Keep the extension so spilled files are still recognised by ffmpeg and the transcription API
+            _, ext = os.path.splitext(upload["filename"])
+            part["target"] = upload["spool"] = ingest.HashingSpool(suffix=ext.lower())
+
+    def on_part_data(data, start, end):
+        if part["target"] is not None:
+            part["target"].write(data[start:end])
+        else:
+            part["data"].append(data[start:end])
+
+    def on_part_end():
+        if part["target"] is None and part.get("name"):
+            fields.setdefault(part["name"], b"".join(part["data"]).decode("utf-8", "replace"))
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > flask_app.MAX_FILE_SIZE:
+                raise UploadTooLarge("File too large")
+            parser.write(chunk)
+        parser.finalize()
+    except BaseException:
+        if upload["spool"] is not None:
+            upload["spool"].close()
+        raise
+    return fields, upload["filename"], upload["spool"]
+
+
+async def transcribe_spool(filename, spool, compact):
+    """
+    Transcribe an upload, returning its segments.
+    Uploads held in memory are sent whole with the async client; spilled uploads
+    and uploads over the transcription API's size limit go through the Flask
+    app's chunked path, in a worker thread.
+    """
+    if spool.path is not None or spool.size > audio_chunks.TRANSCRIBE_MAX_BYTES:
+        return await asyncio.to_thread(lambda: list(flask_app.iter_transcribe_upload(filename, spool, compact=compact)))
+
+    result = await clients.async_openai_client().audio.transcriptions.create(
+        model=flask_app.TRANSCRIBE_MODEL,
+        file=ingest.upload_source(filename, spool),
+        language="en"
+    )
+    return [{"start": 0.0, "end": None, "text": result.text}]
+
+
+async def transcribe_cached(digest, filename, spool, compact):
+    """
+    Return (transcript, cached) for an upload. The transcript cache and its
+    in-flight map are shared with the Flask app, so one transcription runs per
+    audio hash across both. Takes ownership of the spool: it is closed once the
+    transcription that reads it ends, even if this request is cancelled first.
+    """
+    transcripts = flask_app.transcripts
+    try:
+        record = await asyncio.to_thread(transcripts.get, digest)
+        flight, owner = (None, False) if "raw" in record else transcripts.begin(digest, "raw")
+    except BaseException:
+        spool.close()
+        raise
+
+    if not owner:
+        spool.close()
+        metrics.cache_result("transcript_raw", hits=1)
+        if flight is None:
+            return record["raw"], True
+        return await asyncio.to_thread(flight.result), True
+
+    metrics.cache_result("transcript_raw", misses=1)
+
+    async def run():
+        try:
+            # Another request may have finished between our read and taking ownership
+            record = await asyncio.to_thread(transcripts.get, digest)
+            if "raw" in record:
+                transcript, cached = record["raw"], True
+            else:
+                with metrics.span("transcribe"), metrics.in_flight("transcription"):
+                    segments = await transcribe_spool(filename, spool, compact)
+                transcript, cached = " ".join(segment["text"] for segment in segments), False
+                await asyncio.to_thread(transcripts.update, digest, raw=transcript, segments=segments)
+        except BaseException as e:
+            transcripts.finish(digest, "raw", flight, error=e)
+            raise
+        finally:
+            spool.close()
+        transcripts.finish(digest, "raw", flight, transcript)
+        return transcript, cached
+
+    # Shielded, so a disconnecting owner does not cancel the transcription other requests wait on
+    task = asyncio.ensure_future(run())
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+    return await asyncio.shield(task)
+
+
+async def transcribe_upload(request):
+    """
+    Endpoint to upload and transcribe a single audio file.
+    Input: multipart/form-data with 'audio' file and optional 'compact' ('true' or 'false')
+    Output: JSON with transcript text and timestamped segments
+    """
+    try:
+        try:
+            with metrics.span("upload"):
+                form, uploaded_filename, spool = await read_upload_form(request, 'audio')
+        except UploadTooLarge as e:
+            return JSONResponse({"error": str(e)}, 413)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, 400)
+
+        # Check if audio file is in request
+        if spool is None:
+            return JSONResponse({"error": "No audio file provided"}, 400)
+
+        # Check if file was selected
+        if not uploaded_filename:
+            spool.close()
+            return JSONResponse({"error": "No file selected"}, 400)
+
+        # Check if file type is allowed
+        if not flask_app.allowed_file(uploaded_filename):
+            spool.close()
+            return JSONResponse({"error": f"File type not allowed. Supported: {', '.join(flask_app.ALLOWED_EXTENSIONS)}"}, 400)
+
+        # Generate unique filename with timestamp
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        original_filename = secure_filename(uploaded_filename)
+        name, ext = os.path.splitext(original_filename)
+        filename = f"{name}_{timestamp}{ext}"
+
+        # Long recordings are split on silence and the chunks transcribed concurrently
+        compact = form.get('compact', 'true').lower() != 'false'
+
+        try:
+            digest = spool.hexdigest()
+            filepath = flask_app.persist_upload(filename, spool)
+        except BaseException:
+            spool.close()
+            raise
+
+        # Transcribe the upload unless these bytes were transcribed before; this closes the spool
+        transcript, cached = await transcribe_cached(digest, original_filename, spool, compact)
+        record = await asyncio.to_thread(flask_app.transcripts.get, digest)
+        segments = record.get("segments") or [{"start": 0.0, "end": None, "text": transcript}]
+        await asyncio.to_thread(
+            flask_app.archive_session, digest, "upload",
+            title=original_filename, transcript=transcript, segments=segments
+        )
+
+        return JSONResponse({
+            "transcript": transcript,
+            "segments": segments,
+            "filename": filename,
+            "filepath": filepath,
+            "sha256": digest,
+            "cached": cached
+        }, 200)
+
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, 500)
+
+
+app = Starlette(routes=[
+    Route('/extract', extract, methods=['POST'], middleware=route_middleware('extract')),
+    Route('/explain', explain, methods=['POST'], middleware=route_middleware('explain')),
+    Route('/transcribe-upload', transcribe_upload, methods=['POST'], middleware=route_middleware('transcribe_upload')),
+    Mount('/', WSGIMiddleware(flask_app.app, workers=WSGI_WORKERS))
+])
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    # Ensure upload folder exists
+    os.makedirs(flask_app.UPLOAD_FOLDER, exist_ok=True)
+    uvicorn.run(app, host='0.0.0.0', port=5001)
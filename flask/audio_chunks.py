@@ -0,0 +1,163 @@
+import os
+import re
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import scheduler
+
+# ffmpeg is used to decode, split and re-encode audio; without it files are sent whole
+FFMPEG = os.environ.get("FFMPEG_PATH", "ffmpeg")
+
+# Chunking settings
+CHUNK_MAX_SECONDS = float(os.environ.get("CHUNK_MAX_SECONDS", "300"))
+CHUNK_MIN_SECONDS = float(os.environ.get("CHUNK_MIN_SECONDS", "60"))
+STREAM_CHUNK_SECONDS = float(os.environ.get("STREAM_CHUNK_SECONDS", "30"))  # shorter chunks for a fast first segment
+SILENCE_NOISE_DB = os.environ.get("SILENCE_NOISE_DB", "-35dB")
+SILENCE_MIN_SECONDS = float(os.environ.get("SILENCE_MIN_SECONDS", "0.5"))
+TRANSCRIBE_MAX_WORKERS = int(os.environ.get("TRANSCRIBE_MAX_WORKERS", "8"))
+
+# Largest file the transcription API accepts (25 MB), with headroom
+TRANSCRIBE_MAX_BYTES = int(os.environ.get("TRANSCRIBE_MAX_BYTES", str(24 * 1024 * 1024)))
+
+# Compact speech format for chunks: mono, 16 kHz, low bitrate mp3
+COMPACT_ARGS = ["-ac", "1", "-ar", "16000", "-b:a", "32k"]
+
+DURATION_PATTERN = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+SILENCE_START_PATTERN = re.compile(r"silence_start:\s*(-?\d+(?:\.\d+)?)")
+SILENCE_END_PATTERN = re.compile(r"silence_end:\s*(-?\d+(?:\.\d+)?)")
+
+
+def ffmpeg_available():
+    """Check whether the ffmpeg binary can be found"""
+    return shutil.which(FFMPEG) is not None
+
+
+def _run_ffmpeg(args):
+    """Run ffmpeg and return its stderr, where it reports stream info and filter output"""
+    result = subprocess.run(
+        [FFMPEG, "-hide_banner", "-nostdin", *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    return result.stderr
+
+
+def probe_duration(path):
+    """Return the duration of an audio file in seconds, or None if it cannot be read"""
+    match = DURATION_PATTERN.search(_run_ffmpeg(["-i", path]))
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def detect_silences(path, noise=SILENCE_NOISE_DB, min_silence=SILENCE_MIN_SECONDS):
+    """Return a list of (start, end) silence intervals in seconds"""
+    stderr = _run_ffmpeg([
+        "-i", path,
+        "-af", f"silencedetect=noise={noise}:d={min_silence}",
+        "-f", "null", "-"
+    ])
+    starts = [max(0.0, float(s)) for s in SILENCE_START_PATTERN.findall(stderr)]
+    ends = [float(e) for e in SILENCE_END_PATTERN.findall(stderr)]
+    return list(zip(starts, ends))
+
+
+def plan_chunks(duration, silences, max_seconds=CHUNK_MAX_SECONDS, min_seconds=CHUNK_MIN_SECONDS):
+    """
+    Plan chunk boundaries for a recording.
+    Each chunk is cut at the middle of the last silence that keeps it between
+    min_seconds and max_seconds long, or hard-cut at max_seconds if there is none.
+    Returns a list of (start, end) pairs covering the whole duration.
+    """
+    cut_points = sorted((start + end) / 2 for start, end in silences)
+    chunks = []
+    cursor = 0.0
+    while duration - cursor > max_seconds:
+        candidates = [p for p in cut_points if cursor + min_seconds <= p <= cursor + max_seconds]
+        cut = candidates[-1] if candidates else cursor + max_seconds
+        chunks.append((cursor, cut))
+        cursor = cut
+    chunks.append((cursor, duration))
+    return chunks
+
+
+def export_chunk(path, start, end, out_path, compact=True, max_bytes=TRANSCRIBE_MAX_BYTES):
+    """
+    Decode [start, end) of an audio file and write it to out_path as mp3.
+    A chunk exported at full quality that is over max_bytes is exported again compacted.
+    """
+    args = ["-y", "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", path, "-vn"]
+    if compact:
+        args += COMPACT_ARGS
+    _run_ffmpeg(args + [out_path])
+    if not os.path.exists(out_path):
+        raise RuntimeError(f"ffmpeg failed to export chunk {start:.1f}-{end:.1f}s of {path}")
+    if os.path.getsize(out_path) > max_bytes:
+        if not compact:
+            return export_chunk(path, start, end, out_path, True, max_bytes)
+        raise ValueError(f"Chunk {start:.1f}-{end:.1f}s of {path} is over the {max_bytes // (1024 * 1024)} MB transcription limit")
+    return out_path
+
+
+def iter_transcribe_audio(transcribe_fn, path, compact=True, max_workers=TRANSCRIBE_MAX_WORKERS,
+                          max_seconds=CHUNK_MAX_SECONDS, max_bytes=TRANSCRIBE_MAX_BYTES):
+    """
+    Transcribe an audio file, yielding segments in order as soon as they are ready.
+
+    transcribe_fn(file_path) must return the transcript text of one file.
+    Recordings longer than max_seconds are split on silence into chunks that are
+    optionally downmixed and resampled, then transcribed concurrently. Shorter
+    files over max_bytes, the transcription API's upload limit, are re-encoded
+    as one chunk (compacted if needed) instead of being sent whole.
+    Yields dicts with 'start', 'end' and 'text' (timestamps in seconds; 'end'
+    is None when the duration is unknown).
+    """
+    size = os.path.getsize(path)
+    duration = probe_duration(path) if ffmpeg_available() else None
+
+    if duration is None:
+        if size > max_bytes:
+            raise ValueError(
+                f"{os.path.basename(path)} is {size / (1024 * 1024):.1f} MB, over the "
+                f"{max_bytes // (1024 * 1024)} MB transcription limit; install ffmpeg to compact and split it"
+            )
+        yield {"start": 0.0, "end": None, "text": transcribe_fn(path)}
+        return
+
+    if duration <= max_seconds:
+        if size <= max_bytes:
+            yield {"start": 0.0, "end": duration, "text": transcribe_fn(path)}
+            return
+        chunks = [(0.0, duration)]
+        print(f"🗜️ Re-encoding {os.path.basename(path)} ({size / (1024 * 1024):.1f} MB) to fit the transcription limit")
+    else:
+        chunks = plan_chunks(duration, detect_silences(path), max_seconds, min(CHUNK_MIN_SECONDS, max_seconds / 2))
+        print(f"✂️ Split {os.path.basename(path)} ({duration:.0f}s) into {len(chunks)} chunks")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        def transcribe_chunk(index, start, end):
+            chunk_path = export_chunk(path, start, end, os.path.join(tmp_dir, f"chunk_{index:04d}.mp3"), compact, max_bytes)
+            return transcribe_fn(chunk_path).strip()
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+            futures = [executor.submit(scheduler.carry_lane(transcribe_chunk), i, start, end) for i, (start, end) in enumerate(chunks)]
+            for (start, end), future in zip(chunks, futures):
+                text = future.result()
+                if text:
+                    yield {"start": round(start, 3), "end": round(end, 3), "text": text}
+
+
+def transcribe_audio(transcribe_fn, path, compact=True, max_workers=TRANSCRIBE_MAX_WORKERS):
+    """
+    Transcribe an audio file, splitting long recordings on silence.
+    Returns dict with 'text' and 'segments' (see iter_transcribe_audio).
+    """
+    segments = list(iter_transcribe_audio(transcribe_fn, path, compact, max_workers))
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "segments": segments
+    }
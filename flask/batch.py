@@ -0,0 +1,221 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import scheduler
+from term_cache import CACHE_DIR
+
+# Bulk extraction settings
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", "8"))
+BATCH_MAX_WORKERS_LIMIT = int(os.environ.get("BATCH_MAX_WORKERS_LIMIT", "64"))
+# Checkpoints named in /extract-batch requests live under this directory
+BATCH_CHECKPOINT_DIR = os.environ.get("BATCH_CHECKPOINT_DIR", os.path.join(CACHE_DIR, 'checkpoints'))
+TEXT_EXTENSIONS = ('.txt', '.md')
+
+# "### filename" headers written by transcribe_audio_files and audio-to-transcript/transcribe.py
+SECTION_HEADER = re.compile(r"^### (.+)$", re.MULTILINE)
+
+
+def document_id(text):
+    """Stable id for a document given without one"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def split_sections(text):
+    """
+    Split a transcript file into its '### filename' sections.
+    Returns a list of (name, text); a file without headers is one section named None.
+    """
+    headers = list(SECTION_HEADER.finditer(text))
+    if not headers:
+        return [(None, text.strip())] if text.strip() else []
+
+    sections = []
+    if text[:headers[0].start()].strip():
+        sections.append((None, text[:headers[0].start()].strip()))
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        body = text[header.end():end].strip()
+        if body:
+            sections.append((header.group(1).strip(), body))
+    return sections
+
+
+def iter_jsonl(lines, source=None):
+    """
+    Read documents from JSONL lines, each an object with 'transcript' (or 'text')
+    and an optional 'id'. Blank lines are skipped; malformed lines yield a
+    document with an 'error' so they are reported instead of stopping the batch.
+    """
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            text = item.get("transcript", item.get("text"))
+            if not isinstance(text, str):
+                raise ValueError("missing 'transcript'")
+        except (ValueError, AttributeError) as e:
+            yield {"id": f"{source or 'line'}:{number}", "error": f"Invalid JSONL line {number}: {e}"}
+            continue
+        yield {"id": str(item.get("id") or document_id(text)), "text": text}
+
+
+def iter_directory(input_dir):
+    """
+    Read documents from every .txt/.md/.jsonl file under input_dir, in sorted order.
+    Text files are split into their '### filename' sections, each its own document
+    with id 'relative/path#section'.
+    """
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            relative = os.path.relpath(path, input_dir)
+
+            if filename.lower().endswith('.jsonl'):
+                with open(path, "r", encoding="utf-8") as f:
+                    yield from iter_jsonl(f, relative)
+                continue
+
+            if not filename.lower().endswith(TEXT_EXTENSIONS):
+                continue
+
+            with open(path, "r", encoding="utf-8") as f:
+                sections = split_sections(f.read())
+
+            seen = {}
+            for name, text in sections:
+                doc_id = relative if name is None else f"{relative}#{name}"
+                seen[doc_id] = seen.get(doc_id, 0) + 1
+                if seen[doc_id] > 1:
+                    doc_id = f"{doc_id}#{seen[doc_id]}"
+                yield {"id": doc_id, "text": text}
+
+
+def checkpoint_path(name, root=BATCH_CHECKPOINT_DIR):
+    """
+    Resolve a checkpoint name from a request to a path under root.
+    Raises ValueError for absolute names or names that leave root.
+    """
+    if not name or os.path.isabs(name):
+        raise ValueError("'checkpoint' must be a relative name under the checkpoint directory")
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError("'checkpoint' must be a relative name under the checkpoint directory")
+    return path
+
+
+class Checkpoint:
+    """
+    Append-only JSONL file of completed result records, keyed by 'id'.
+    Records are flushed as they are added, so an interrupted run loses at most
+    the line being written, which is dropped when the file is reopened.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def completed(self):
+        """Return the set of ids already recorded"""
+        if not os.path.exists(self.path):
+            return set()
+
+        ids = set()
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    ids.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    pass
+                valid_bytes += len(line)
+
+        # Drop a partial last line left by an interrupted write
+        if valid_bytes < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+        return ids
+
+    def add(self, record):
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _process(extract, document):
+    """Run extract on one document and build its result record"""
+    if "error" in document:
+        return {"id": document["id"], "error": document["error"]}
+    try:
+        result = extract(document["text"])
+    except Exception as e:
+        return {"id": document["id"], "error": str(e)}
+    if isinstance(result, tuple):
+        # Error case
+        return {"id": document["id"], **result[0]}
+    if result is None:
+        return {"id": document["id"], "error": "No result"}
+    return {"id": document["id"], **result}
+
+
+def run_batch(documents, extract, max_workers=BATCH_MAX_WORKERS, checkpoint=None, stats=None):
+    """
+    Call extract(text) for each document with at most max_workers in flight.
+    Documents are read lazily, so inputs of any size run in bounded memory.
+    Yields result records in completion order. With a checkpoint, documents it
+    already holds are skipped and successful results are appended to it; failed
+    documents are not recorded, so a rerun retries them.
+    `stats`, if given, is filled with 'processed', 'failed' and 'skipped' counts.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(processed=0, failed=0, skipped=0)
+    max_workers = max(1, min(max_workers, BATCH_MAX_WORKERS_LIMIT))
+    done_ids = checkpoint.completed() if checkpoint else set()
+
+    def finish(future):
+        record = future.result()
+        if "error" in record:
+            stats["failed"] += 1
+        else:
+            stats["processed"] += 1
+            if checkpoint:
+                checkpoint.add(record)
+        return record
+
+    process = scheduler.carry_lane(_process)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for document in documents:
+            if document["id"] in done_ids:
+                stats["skipped"] += 1
+                continue
+            if len(pending) >= max_workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield finish(future)
+            pending.add(executor.submit(process, extract, document))
+
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield finish(future)
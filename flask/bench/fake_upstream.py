@@ -0,0 +1,270 @@
+"""
+Local stand-in for the Anthropic Messages and OpenAI transcription APIs.
+
+Answers POST /v1/messages (plain and streamed) and POST /v1/audio/transcriptions
+with canned responses in the formats the parsers expect (<cleaned_transcript>,
+<explanation> and ```json blocks). Each response takes a fixed latency plus
+the time to generate its output tokens at a configurable rate; streamed
+responses are paced the same way. The server enforces its own
+requests-per-minute limit by returning 429 with Retry-After, and can fail a
+random share of requests with 429 or 500 as well. Cacheable system prompts
+are billed as prompt cache writes and reads. Point the SDKs at it with
+ANTHROPIC_BASE_URL / OPENAI_BASE_URL. Run from the flask/ directory:
+
+    python bench/fake_upstream.py --port 8089 --rpm 120 --rate-limit-share 0.1 --output-tps 200
+"""
+import re
+import sys
+import json
+import hashlib
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class RateWindow:
+    """Sliding one-minute request counter"""
+
+    def __init__(self, rpm):
+        self.rpm = rpm
+        self._lock = threading.Lock()
+        self._times = []
+
+    def admit(self):
+        """Return 0 if the request is allowed, else the seconds until it would be"""
+        if not self.rpm:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            self._times = [t for t in self._times if now - t < 60]
+            if len(self._times) < self.rpm:
+                self._times.append(now)
+                return 0
+            return 60 - (now - self._times[0])
+
+
+# Canned transcription, with fillers for the cleaning stage and terms for extraction
+TRANSCRIPT_TEXT = (
+    "So, um, today we're going to talk about how the mitochondria produce ATP through "
+    "oxidative phosphorylation. Uh, the electron transport chain pumps protons across the "
+    "inner membrane, and, you know, ATP synthase uses that gradient. Like, this is why "
+    "cyanide is so toxic, it blocks cytochrome c oxidase."
+)
+
+
+def canned_text(prompt, system=""):
+    """Pick a response in the format the instructions ask for, filled from the user prompt"""
+    instructions = system + prompt
+    transcript = re.search(r"<transcript>\n?(.*?)\n?</transcript>", prompt, re.DOTALL)
+    if "<cleaned_transcript>" in instructions:
+        return f"<cleaned_transcript>{transcript.group(1).strip() if transcript else ''}</cleaned_transcript>"
+    batch = re.search(r"<biological_terms>\n(.*?)\n</biological_terms>", prompt, re.DOTALL)
+    if batch:
+        terms = [t for t in batch.group(1).splitlines() if t.strip()]
+        return "```json\n" + json.dumps({"explanations": [{"term": t, "explanation": f"{t} is a biological term."} for t in terms]}) + "\n```"
+    if "biological_terms" in instructions:
+        words = re.findall(r"[A-Za-z]{9,}", transcript.group(1) if transcript else prompt)
+        terms = sorted(set(words))[:10]
+        return "```json\n" + json.dumps({"biological_terms": terms, "total_count": len(terms)}) + "\n```"
+    term = re.search(r"<biological_term>\n(.*?)\n</biological_term>", prompt, re.DOTALL)
+    return f"<explanation>{term.group(1) if term else 'This'} is a biological term.</explanation>"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open many connections at once
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients closing kept-alive or streamed connections are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeUpstream:
+    """
+    Threaded fake API server; counts what it served in `stats`.
+    latency is the time to first token and transcription_latency the time per
+    transcription; output_tps is generated tokens per second (0 = instant).
+    System prompts marked with cache_control and at least cache_min_tokens long
+    are reported as cache writes the first time and cache reads after that.
+    """
+
+    def __init__(self, port=0, latency=0.05, rpm=0, rate_limit_share=0.0, retry_after=1.0,
+                 error_share=0.0, output_tps=0, transcription_latency=None, transcript_text=TRANSCRIPT_TEXT,
+                 cache_min_tokens=1024):
+        self.latency = latency
+        self.rate_limit_share = rate_limit_share
+        self.retry_after = retry_after
+        self.error_share = error_share
+        self.output_tps = output_tps
+        self.transcription_latency = latency if transcription_latency is None else transcription_latency
+        self.transcript_text = transcript_text
+        self.cache_min_tokens = cache_min_tokens
+        self.window = RateWindow(rpm)
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0,
+                      "cache_write_tokens": 0, "cache_read_tokens": 0}
+        self._cached_prefixes = set()
+        self._lock = threading.Lock()
+        self.server = _Server(("127.0.0.1", port), self._handler())
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def prompt_usage(self, system_blocks, prompt):
+        """Input token usage, with cacheable system prompts split out like the Messages API does"""
+        system = "".join(block.get("text", "") for block in system_blocks)
+        usage = {"input_tokens": (len(system) + len(prompt)) // 4}
+        if any("cache_control" in block for block in system_blocks) and len(system) // 4 >= self.cache_min_tokens:
+            digest = hashlib.sha256(system.encode("utf-8")).hexdigest()
+            with self._lock:
+                hit = digest in self._cached_prefixes
+                self._cached_prefixes.add(digest)
+            usage["input_tokens"] = len(prompt) // 4
+            usage["cache_read_input_tokens" if hit else "cache_creation_input_tokens"] = len(system) // 4
+            self._count("cache_read_tokens" if hit else "cache_write_tokens", len(system) // 4)
+        return usage
+
+    def generation_time(self, output_tokens):
+        return output_tokens / self.output_tps if self.output_tps else 0.0
+
+    def _handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, headers=None, content_type="application/json"):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                upstream._count("requests")
+
+                wait = upstream.window.admit()
+                if wait or random.random() < upstream.rate_limit_share:
+                    upstream._count("rate_limited")
+                    retry = max(wait, upstream.retry_after)
+                    error = {"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limited"}}
+                    return self._send(429, json.dumps(error), {"retry-after": f"{retry:.3f}"})
+
+                if random.random() < upstream.error_share:
+                    upstream._count("errors")
+                    time.sleep(upstream.latency)
+                    error = {"type": "error", "error": {"type": "api_error", "message": "Injected failure"}}
+                    return self._send(500, json.dumps(error))
+
+                if self.path.endswith("/audio/transcriptions"):
+                    time.sleep(upstream.transcription_latency)
+                    upstream._count("ok")
+                    return self._send(200, json.dumps({"text": self._transcript(body)}))
+
+                time.sleep(upstream.latency)
+                upstream._count("ok")
+
+                request = json.loads(body or b"{}")
+                prompt = "".join(
+                    block.get("text", "") if isinstance(block, dict) else str(block)
+                    for message in request.get("messages", [])
+                    for block in (message["content"] if isinstance(message["content"], list) else [message["content"]])
+                )
+                system = request.get("system") or []
+                if isinstance(system, str):
+                    system = [{"type": "text", "text": system}]
+                text = canned_text(prompt, "".join(block.get("text", "") for block in system))
+                usage = {**upstream.prompt_usage(system, prompt), "output_tokens": len(text) // 4}
+                upstream._count("input_tokens", usage["input_tokens"])
+                upstream._count("output_tokens", usage["output_tokens"])
+                message = {
+                    "id": "msg_fake", "type": "message", "role": "assistant", "model": request.get("model"),
+                    "content": [{"type": "text", "text": text}],
+                    "stop_reason": "end_turn", "stop_sequence": None, "usage": usage
+                }
+
+                if not request.get("stream"):
+                    time.sleep(upstream.generation_time(usage["output_tokens"]))
+                    return self._send(200, json.dumps(message))
+
+                start = dict(message, content=[], usage={**usage, "output_tokens": 0})
+                events = [("message_start", {"type": "message_start", "message": start}),
+                          ("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})]
+                for i in range(0, len(text), 20):
+                    events.append(("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text[i:i + 20]}}))
+                events += [("content_block_stop", {"type": "content_block_stop", "index": 0}),
+                           ("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None}, "usage": {"output_tokens": usage["output_tokens"]}}),
+                           ("message_stop", {"type": "message_stop"})]
+                self._stream(events, upstream.generation_time(5))
+
+            def _transcript(self, body):
+                """The canned transcript, tagged with the audio's hash so different recordings differ"""
+                boundary = self.headers.get("Content-Type", "").partition("boundary=")[2].encode()
+                digest = hashlib.sha256(body.replace(boundary, b"") if boundary else body).hexdigest()
+                return f"{upstream.transcript_text} Recording {digest[:8]}."
+
+            def _stream(self, events, delta_time):
+                """Send SSE events, pausing before each text delta as if it were being generated"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for event, data in events:
+                    if event == "content_block_delta" and delta_time:
+                        time.sleep(delta_time)
+                    chunk = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+                    self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token of a response")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before answering 429 (0 = no limit)")
+    parser.add_argument("--rate-limit-share", type=float, default=0.0, help="share of requests answered 429 at random")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with random 429s")
+    parser.add_argument("--error-share", type=float, default=0.0, help="share of requests answered 500 at random")
+    parser.add_argument("--output-tps", type=float, default=0, help="generated tokens per second (0 = instant)")
+    parser.add_argument("--transcription-latency", type=float, default=None, help="seconds per transcription (default: --latency)")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024, help="shortest system prompt that is cached")
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(args.port, args.latency, args.rpm, args.rate_limit_share, args.retry_after,
+                            args.error_share, args.output_tps, args.transcription_latency,
+                            cache_min_tokens=args.cache_min_tokens)
+    print(f"Fake upstream listening on {upstream.url} (ANTHROPIC_BASE_URL={upstream.url}, OPENAI_BASE_URL={upstream.url}/v1)")
+    try:
+        upstream.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""
+Offline load test for every HTTP route.
+
+Starts the fake upstream (bench/fake_upstream.py) and the app in this process,
+either the Flask app on a threaded WSGI server or the ASGI app under uvicorn
+(--server asgi). Each route is then driven with the sample recordings in
+audio-to-transcript/audio at increasing concurrency. No API keys or network
+access are needed. For every route and concurrency level the report shows:
+
+- p50/p95/p99 latency, throughput and errors
+- upstream tokens and estimated cost per request, from /metrics
+- time per request in each processing stage
+
+Inputs are made unique per request so every request misses the caches; pass
+--warm to repeat the same inputs and measure cache hits instead.
+
+Results can be saved as a baseline, and later runs compared against it. A run
+exits with status 1 when any route regresses past the tolerance. Run from the
+flask/ directory:
+
+    python bench/load_test.py --concurrency 1,4,16 --save-baseline bench/baselines/local.json
+    python bench/load_test.py --concurrency 1,4,16 --baseline bench/baselines/local.json
+"""
+import os
+import re
+import sys
+import json
+import logging
+import time
+import socket
+import tempfile
+import argparse
+import itertools
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+FLASK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIO_DIR = os.path.join(FLASK_DIR, "..", "audio-to-transcript", "audio")
+sys.path.insert(0, FLASK_DIR)
+
+# The app is imported by configure(), once its environment is set
+from fake_upstream import FakeUpstream, TRANSCRIPT_TEXT
+
+METRIC_LINE = re.compile(r"^(\w+)(?:\{(.*)\})? (\S+)$")
+METRIC_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+PREFIX = "clarify_"
+
+TERMS = ["mitochondria", "ribosome", "chloroplast", "glycolysis", "apoptosis", "cytokine", "allele", "operon"]
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+class Workload:
+    """Request inputs, unique per request number unless warm"""
+
+    def __init__(self, workdir, warm=False):
+        self.workdir = workdir
+        self.warm = warm
+        self.audio = []
+        for filename in sorted(os.listdir(AUDIO_DIR)):
+            if filename.lower().endswith((".wav", ".mp3", ".m4a")):
+                with open(os.path.join(AUDIO_DIR, filename), "rb") as f:
+                    self.audio.append((filename, f.read()))
+        if not self.audio:
+            raise SystemExit(f"No sample audio in {AUDIO_DIR}")
+        self.run = datetime.now().strftime("%H%M%S")
+        self._numbers = itertools.count()
+
+    def variant(self):
+        return 0 if self.warm else next(self._numbers)
+
+    def audio_file(self, n):
+        """A sample recording with a per-request tag appended, so its hash is new"""
+        filename, data = self.audio[n % len(self.audio)]
+        if not self.warm:
+            data += f"\nload-test {self.run} {n}".encode()
+        return filename, data
+
+    def audio_dir(self, n):
+        """A directory holding one sample recording, and an output path for it"""
+        path = os.path.join(self.workdir, "dirs", f"{self.run}-{n}")
+        os.makedirs(path, exist_ok=True)
+        filename, data = self.audio_file(n)
+        with open(os.path.join(path, filename), "wb") as f:
+            f.write(data)
+        return path, os.path.join(self.workdir, "output", f"{self.run}-{n}", "transcript.txt")
+
+    def transcript(self, n):
+        # Long enough that 'auto' asks the model rather than the term index
+        return f"Lecture {self.run}-{n}. " + " ".join([TRANSCRIPT_TEXT] * 3)
+
+    def terms(self, n, count=5):
+        return [f"{TERMS[(n + k) % len(TERMS)]} {self.run}-{n}-{k}" for k in range(count)]
+
+
+def check(response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path}: {response.status_code} {response.text[:200]}")
+    return response
+
+
+def run_health(client, workload, n):
+    check(client.get("/health"))
+
+
+def run_root(client, workload, n):
+    check(client.get("/"))
+
+
+def run_metrics(client, workload, n):
+    check(client.get("/metrics"))
+
+
+def run_extract(client, workload, n):
+    check(client.post("/extract", json={"transcript": workload.transcript(n)}))
+
+
+def run_extract_batch(client, workload, n):
+    lines = "".join(json.dumps({"id": f"{n}-{k}", "transcript": workload.transcript(n * 4 + k)}) + "\n" for k in range(4))
+    response = check(client.post("/extract-batch", content=lines, headers={"Content-Type": "application/x-ndjson"}))
+    summary = json.loads(response.text.strip().splitlines()[-1])
+    if not summary.get("done") or summary.get("failed"):
+        raise RuntimeError(f"/extract-batch: {summary}")
+
+
+def run_explain(client, workload, n):
+    check(client.post("/explain", json={"terms": workload.terms(n)}))
+
+
+def run_upload(client, workload, n):
+    check(client.post("/upload", files={"audio": workload.audio_file(n)}))
+
+
+def run_transcribe_upload(client, workload, n):
+    check(client.post("/transcribe-upload", files={"audio": workload.audio_file(n)}))
+
+
+def run_transcribe_stream(client, workload, n):
+    response = check(client.post("/transcribe-stream", files={"audio": workload.audio_file(n)}))
+    if "event: done" not in response.text or "event: error" in response.text:
+        raise RuntimeError(f"/transcribe-stream: incomplete stream {response.text[-200:]!r}")
+
+
+def run_transcribe(client, workload, n):
+    input_dir, output_path = workload.audio_dir(n)
+    check(client.post("/transcribe", json={"input_dir": input_dir, "output_path": output_path}))
+
+
+def run_jobs(client, workload, n):
+    input_dir, output_path = workload.audio_dir(n)
+    job = check(client.post("/jobs", json={"input_dir": input_dir, "output_path": output_path})).json()
+    while True:
+        status = check(client.get(job["status_url"])).json()
+        if status["status"] == "completed":
+            return
+        if status["status"] == "failed":
+            raise RuntimeError(f"/jobs: job {job['job_id']} failed")
+        time.sleep(0.02)
+
+
+def run_sessions(client, workload, n):
+    session_id = check(client.post("/sessions")).json()["session_id"]
+    check(client.post(f"/sessions/{session_id}/chunks", files={"audio": workload.audio_file(n)}, data={"seq": "0", "duration": "5"}))
+    check(client.get(f"/sessions/{session_id}"))
+    check(client.delete(f"/sessions/{session_id}"))
+
+
+def run_archive(client, workload, n):
+    # Searches whatever the routes run before it archived
+    check(client.get("/archive/search", params={"q": TERMS[n % len(TERMS)]}))
+    check(client.get("/archive/glossary"))
+
+
+# Route name -> one request (or request flow) against it
+ROUTES = {
+    "health": run_health,
+    "root": run_root,
+    "metrics": run_metrics,
+    "extract": run_extract,
+    "extract_batch": run_extract_batch,
+    "explain": run_explain,
+    "upload": run_upload,
+    "transcribe_upload": run_transcribe_upload,
+    "transcribe_stream": run_transcribe_stream,
+    "transcribe": run_transcribe,
+    "jobs": run_jobs,
+    "sessions": run_sessions,
+    "archive": run_archive,
+}
+
+
+def scrape(client):
+    """Read /metrics into {(name, labels): value}"""
+    samples = {}
+    for line in check(client.get("/metrics")).text.splitlines():
+        match = METRIC_LINE.match(line)
+        if not match or not match.group(1).startswith(PREFIX):
+            continue
+        name, labels, value = match.groups()
+        labels = tuple(sorted(METRIC_LABEL.findall(labels or "")))
+        samples[(name[len(PREFIX):], labels)] = float(value)
+    return samples
+
+
+def usage_delta(before, after, requests):
+    """Upstream tokens, cost and stage time per request between two scrapes"""
+    def delta(name):
+        for (metric, labels), value in after.items():
+            if metric == name:
+                change = value - before.get((metric, labels), 0.0)
+                if change:
+                    yield dict(labels), change
+
+    stages = {}
+    for labels, seconds in delta("stage_seconds_sum"):
+        stages.setdefault(labels["stage"], {})["ms"] = seconds * 1000 / requests
+    for labels, calls in delta("stage_seconds_count"):
+        stages.setdefault(labels["stage"], {})["calls"] = calls / requests
+    for labels, cost in delta("upstream_cost_usd_total"):
+        stage = stages.setdefault(labels.get("stage", "other"), {})
+        stage["cost_usd"] = stage.get("cost_usd", 0.0) + cost / requests
+
+    return {
+        "upstream_calls": sum(calls for _, calls in delta("upstream_requests_total")) / requests,
+        "tokens": sum(tokens for _, tokens in delta("upstream_tokens_total")) / requests,
+        "cost_usd": sum(cost for _, cost in delta("upstream_cost_usd_total")) / requests,
+        "stages": stages
+    }
+
+
+def run_level(client, workload, route, concurrency, requests):
+    """Send `requests` requests to a route from `concurrency` workers; returns its summary"""
+    run = ROUTES[route]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def one(_):
+        n = workload.variant()
+        start = time.perf_counter()
+        try:
+            run(client, workload, n)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+            return
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    before = scrape(client)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    after = scrape(client)
+
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        **usage_delta(before, after, requests)
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind):
+    """Serve the app on a local port; returns (url, stop)"""
+    port = free_port()
+    if kind == "asgi":
+        import uvicorn
+        import asgi
+
+        server = uvicorn.Server(uvicorn.Config(asgi.app, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                raise SystemExit("uvicorn failed to start")
+            time.sleep(0.05)
+
+        def stop():
+            server.should_exit = True
+            thread.join()
+    else:
+        from werkzeug.serving import make_server
+        import app
+
+        # One access log line per request would bury the report
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        server = make_server("127.0.0.1", port, app.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        stop = server.shutdown
+    return f"http://127.0.0.1:{port}", stop
+
+
+def configure(args, upstream, workdir):
+    """Point the app at the fake upstream and a scratch cache before it is imported"""
+    os.environ.update({
+        "ANTHROPIC_API_KEY": "bench",
+        "OPENAI_API_KEY": "bench",
+        "ANTHROPIC_BASE_URL": upstream.url,
+        "OPENAI_BASE_URL": upstream.url + "/v1",
+        "CLARIFY_CACHE_DIR": os.path.join(workdir, "cache"),
+        "PERSIST_UPLOADS": "false",
+    })
+    if args.server == "asgi":
+        os.environ.setdefault("WSGI_WORKERS", str(max(16, max(args.concurrency))))
+
+    import app
+    app.app.config["UPLOAD_FOLDER"] = os.path.join(workdir, "uploads")
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """
+    Compare results with a baseline; returns a list of regression messages.
+    Latency regresses when p95 grows by more than `tolerance` and `min_delta_ms`,
+    throughput when it falls by more than `tolerance`, cost when it grows by
+    more than `tolerance`, and errors when there are any where there were none.
+    """
+    regressions = []
+    for route, levels in results.items():
+        for level, current in levels.items():
+            base = baseline.get(route, {}).get(level)
+            if base is None:
+                continue
+            where = f"{route} @ {level}"
+            if (current["p95_ms"] > base["p95_ms"] * (1 + tolerance)
+                    and current["p95_ms"] - base["p95_ms"] > min_delta_ms):
+                regressions.append(f"{where}: p95 {base['p95_ms']:.0f}ms -> {current['p95_ms']:.0f}ms")
+            if current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{where}: throughput {base['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} req/s")
+            if current["cost_usd"] > base["cost_usd"] * (1 + tolerance) + 1e-9:
+                regressions.append(f"{where}: cost ${base['cost_usd']:.5f} -> ${current['cost_usd']:.5f} per request")
+            if current["errors"] and not base["errors"]:
+                regressions.append(f"{where}: {current['errors']} errors, baseline had none")
+    return regressions
+
+
+def print_route(route, levels, baseline):
+    print(f"\n{route}")
+    print(f"  {'conc':>4}  {'reqs':>5}  {'err':>4}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'req/s':>7}  "
+          f"{'calls':>5}  {'tokens':>7}  {'$/req':>8}  {'p95 vs base':>11}")
+    for level, r in levels.items():
+        base = baseline.get(route, {}).get(level)
+        change = f"{(r['p95_ms'] / base['p95_ms'] - 1) * 100:+.0f}%" if base and base["p95_ms"] else ""
+        print(f"  {level:>4}  {r['requests']:>5}  {r['errors']:>4}  {r['p50_ms']:>8.1f}  {r['p95_ms']:>8.1f}  "
+              f"{r['p99_ms']:>8.1f}  {r['throughput_rps']:>7.1f}  {r['upstream_calls']:>5.1f}  {r['tokens']:>7.0f}  "
+              f"{r['cost_usd']:>8.5f}  {change:>11}")
+        for sample in r["error_samples"]:
+            print(f"        ⚠️ {sample}")
+
+    # Stage breakdown at the highest concurrency
+    stages = levels[max(levels, key=int)]["stages"]
+    for stage, s in sorted(stages.items(), key=lambda item: -item[1].get("ms", 0)):
+        cost = f", ${s['cost_usd']:.5f}" if s.get("cost_usd") else ""
+        print(f"        {stage:<18} {s.get('ms', 0):8.1f}ms  x{s.get('calls', 0):.1f}{cost}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=("flask", "asgi"), default="flask")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="comma-separated routes to drive")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=20, help="requests per level (at least 2x concurrency)")
+    parser.add_argument("--warm", action="store_true", help="repeat the same inputs, so caches hit")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake upstream seconds before the first token")
+    parser.add_argument("--transcription-latency", type=float, default=0.5, help="fake upstream seconds per transcription")
+    parser.add_argument("--output-tps", type=float, default=400, help="fake upstream output tokens per second")
+    parser.add_argument("--upstream-rpm", type=int, default=0, help="fake upstream requests per minute (0 = no limit)")
+    parser.add_argument("--rate-limit-share", type=float, default=0.0, help="share of upstream requests answered 429")
+    parser.add_argument("--error-share", type=float, default=0.0, help="share of upstream requests answered 500")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024, help="shortest system prompt the fake upstream caches")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--save-baseline", help="write the results as a baseline to this JSON file")
+    parser.add_argument("--baseline", help="compare with this baseline and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=20, help="ignore p95 changes smaller than this")
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+    routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    unknown = set(routes) - set(ROUTES)
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(sorted(unknown))}; choose from {', '.join(ROUTES)}")
+
+    import httpx
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    upstream = FakeUpstream(
+        latency=args.latency, rpm=args.upstream_rpm, rate_limit_share=args.rate_limit_share,
+        error_share=args.error_share, output_tps=args.output_tps, transcription_latency=args.transcription_latency,
+        cache_min_tokens=args.cache_min_tokens
+    ).start()
+
+    with tempfile.TemporaryDirectory(prefix="clarify-load-") as workdir:
+        configure(args, upstream, workdir)
+        workload = Workload(workdir, warm=args.warm)
+        url, stop = start_server(args.server)
+        print(f"{args.server} server at {url}, fake upstream at {upstream.url}"
+              f" ({args.latency}s latency, {args.output_tps:g} tokens/s, {'warm' if args.warm else 'cold'} caches)")
+
+        limits = httpx.Limits(max_connections=max(args.concurrency) * 2, max_keepalive_connections=max(args.concurrency))
+        results = {}
+        try:
+            with httpx.Client(base_url=url, timeout=300, limits=limits) as client:
+                for route in routes:
+                    results[route] = {}
+                    for concurrency in args.concurrency:
+                        requests = max(args.requests, 2 * concurrency)
+                        results[route][str(concurrency)] = run_level(client, workload, route, concurrency, requests)
+                    print_route(route, results[route], baseline)
+        finally:
+            stop()
+            upstream.stop()
+
+    print(f"\nFake upstream: {upstream.stats}")
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("output", "save_baseline", "baseline", "routes")},
+        "results": results
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"✅ Results saved to {path}")
+
+    if args.baseline:
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n🔥 {len(regressions)} regressions against {args.baseline}:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Rate-limit benchmark for the upstream call scheduler.
+
+Starts the fake upstream (bench/fake_upstream.py) with a requests-per-minute
+limit and a share of random 429s, then fires a burst of explanation calls from
+interactive and batch lanes, with some identical calls among them, through:
+
+- direct: a plain Anthropic client relying on the SDK's own retries
+- scheduled: the same client behind scheduler.Scheduler (coalescing,
+  lanes, queueing and 429 backoff)
+
+Run from the flask/ directory:
+
+    python bench/rate_limits.py --calls 200 --upstream-rpm 600 --rate-limit-share 0.05
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+FLASK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FLASK_DIR)
+
+import explainer
+import scheduler
+from fake_upstream import FakeUpstream
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def make_client(url, max_retries):
+    from anthropic import Anthropic
+    return Anthropic(api_key="bench", base_url=url, max_retries=max_retries)
+
+
+def run_burst(client, calls, duplicate_share, batch_share, workers):
+    """Fire `calls` explanation calls at once; returns per-lane latencies and failures"""
+    random.seed(7)
+    plan = []
+    for i in range(calls):
+        term = "mitochondria" if random.random() < duplicate_share else f"term-{i}"
+        plan.append((term, "batch" if random.random() < batch_share else "interactive"))
+
+    results = {name: [] for name in scheduler.LANES}
+    failures = []
+    lock = threading.Lock()
+
+    def one(term, lane_name):
+        start = time.perf_counter()
+        try:
+            with scheduler.lane(lane_name):
+                explainer.explain_term(client, term)
+            with lock:
+                results[lane_name].append(time.perf_counter() - start)
+        except Exception as e:
+            with lock:
+                failures.append(type(e).__name__)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda item: one(*item), plan))
+    return results, failures, time.perf_counter() - started
+
+
+def report(mode, upstream, results, failures, elapsed, sched=None):
+    done = sum(len(v) for v in results.values())
+    print(f"\n== {mode}: {done} succeeded, {len(failures)} failed in {elapsed:.1f}s")
+    print(f"   upstream: {upstream.stats['requests']} requests, {upstream.stats['rate_limited']} answered 429")
+    for lane_name, values in results.items():
+        if values:
+            print(f"   {lane_name:<12} p50 {percentile(values, 50):6.2f}s  p95 {percentile(values, 95):6.2f}s  "
+                  f"mean {statistics.mean(values):6.2f}s  (n={len(values)})")
+    if failures:
+        print(f"   failures: {', '.join(sorted(set(failures)))}")
+    if sched is not None:
+        stats = sched.stats()
+        model = stats["models"].get(explainer.EXPLAIN_MODEL, {})
+        print(f"   scheduler: {stats['coalesced']} coalesced, {model.get('rate_limited', 0)} pauses, {model.get('retried', 0)} retries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=64, help="concurrent callers")
+    parser.add_argument("--latency", type=float, default=0.1, help="fake upstream seconds per response")
+    parser.add_argument("--upstream-rpm", type=int, default=600)
+    parser.add_argument("--rate-limit-share", type=float, default=0.05)
+    parser.add_argument("--duplicate-share", type=float, default=0.2, help="share of calls for the same term")
+    parser.add_argument("--batch-share", type=float, default=0.5, help="share of calls in the batch lane")
+    parser.add_argument("--concurrency", type=int, default=16, help="scheduler in-flight limit")
+    parser.add_argument("--sdk-retries", type=int, default=3, help="retries for the direct client")
+    args = parser.parse_args()
+
+    for mode in ("direct", "scheduled"):
+        upstream = FakeUpstream(latency=args.latency, rpm=args.upstream_rpm,
+                                rate_limit_share=args.rate_limit_share, retry_after=0.5).start()
+        sched = None
+        if mode == "direct":
+            client = make_client(upstream.url, args.sdk_retries)
+        else:
+            from anthropic import APIConnectionError
+            sched = scheduler.Scheduler(limits={}, max_concurrency=args.concurrency)
+            client = scheduler.ScheduledAnthropic(
+                make_client(upstream.url, 0), sched, max_retries=args.sdk_retries, retry_on=APIConnectionError
+            )
+        results, failures, elapsed = run_burst(client, args.calls, args.duplicate_share, args.batch_share, args.workers)
+        report(mode, upstream, results, failures, elapsed, sched)
+        upstream.stop()
+
+
+if __name__ == "__main__":
+    main()
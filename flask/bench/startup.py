@@ -0,0 +1,74 @@
+"""
+Startup benchmark for the Flask service.
+
+Measures, in fresh interpreter processes, how long it takes to import the app
+and serve the first /health request, with upstream API clients created lazily
+(the default) and eagerly at import (CLARIFY_EAGER_CLIENTS=1, the previous
+behaviour). Run from the flask/ directory:
+
+    python bench/startup.py --runs 10
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+FLASK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get('/health')
+served = time.perf_counter()
+assert response.status_code == 200
+print(json.dumps({"import_ms": (imported - start) * 1000, "first_health_ms": (served - start) * 1000}))
+"""
+
+
+def run_probe(eager):
+    """Import the app in a new interpreter and return its timings"""
+    env = dict(os.environ)
+    env.setdefault("ANTHROPIC_API_KEY", "bench")
+    env.setdefault("OPENAI_API_KEY", "bench")
+    env.pop("CLARIFY_EAGER_CLIENTS", None)
+    if eager:
+        env["CLARIFY_EAGER_CLIENTS"] = "1"
+
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=FLASK_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples, key):
+    values = [sample[key] for sample in samples]
+    return statistics.median(values), min(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="processes to start per mode")
+    args = parser.parse_args()
+
+    results = {}
+    for mode, eager in (("eager", True), ("lazy", False)):
+        samples = [run_probe(eager) for _ in range(args.runs)]
+        results[mode] = {key: summarize(samples, key) for key in ("import_ms", "first_health_ms")}
+
+    print(f"{'mode':<8}{'import median':>16}{'import min':>14}{'/health median':>18}{'/health min':>15}")
+    for mode, stats in results.items():
+        (imp_med, imp_min), (health_med, health_min) = stats["import_ms"], stats["first_health_ms"]
+        print(f"{mode:<8}{imp_med:>13.1f} ms{imp_min:>11.1f} ms{health_med:>15.1f} ms{health_min:>12.1f} ms")
+
+    eager_ms = results["eager"]["first_health_ms"][0]
+    lazy_ms = results["lazy"]["first_health_ms"][0]
+    print(f"\nLazy startup serves the first /health {eager_ms - lazy_ms:.1f} ms sooner ({eager_ms / lazy_ms:.1f}x).")
+
+
+if __name__ == "__main__":
+    main()
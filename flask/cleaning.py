@@ -0,0 +1,259 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import prompts
+import scheduler
+import streaming
+from clients import message_text
+from keywords import TOKEN_PATTERN, count_tokens
+
+# Model and chunking settings for transcript cleaning
+CLEAN_MODEL = "claude-sonnet-4-5-20250929"
+CLEAN_MAX_TOKENS = 20000
+CLEAN_CHUNK_TOKENS = int(os.environ.get("CLEAN_CHUNK_TOKENS", "1500"))
+CLEAN_CHUNK_MAX_TOKENS = int(os.environ.get("CLEAN_CHUNK_MAX_TOKENS", "4096"))
+CLEAN_MAX_WORKERS = int(os.environ.get("CLEAN_MAX_WORKERS", "8"))
+
+# 'full' cleans the transcript in one call, 'chunked' cleans sentence-aligned chunks
+# in parallel, 'local' applies rules without an LLM call and 'auto' picks 'full'
+# for transcripts that fit in one chunk and 'chunked' otherwise
+CLEANING_TIERS = ("auto", "full", "chunked", "local")
+DEFAULT_CLEANING_TIER = os.environ.get("CLEANING_TIER", "auto")
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+# Rules for the local cleaner. Hesitations only match in lowercase, or capitalised at the
+# start of a sentence when punctuation follows, and all-caps tokens are never removed, so
+# terms such as "ER" or the "Hmm" gene survive. A sentence-opening discourse marker is
+# removed together with the hesitations after it ("So, um, we" -> "We"), but not when the
+# marker is repeated, as in "Well, well, well". Only repeats of short function words are
+# collapsed as stutters, since "had had", "that that" and "no, no, no" are often intended.
+LOCAL_RULES_VERSION = 3
+HESITATIONS = r"u+h+m*|u+m+|e+r+m+|a+h+|h+m+|m+h+m+|uh-huh"
+FILLER_WORDS = re.compile(rf"(,\s*)?(?<![\w-])({HESITATIONS})(?![\w-])(\s*,)?")
+OPENING_HESITATIONS = re.compile(rf"(^|[.!?]\s+)((?=[A-Z][a-z-]*\b)(?i:{HESITATIONS}))\s*[,.!?]\s*")
+PHRASES = r"you know|i mean|you see|sort of|kind of"
+FILLER_PHRASES = re.compile(rf"(,\s*)?\b(?:{PHRASES})(\s*,)", re.IGNORECASE)
+SENTENCE_OPENERS = re.compile(
+    rf"(^|[.!?]\s+)(?!(?-i:[A-Z]{{2}}))(so|well|okay|ok|right|actually|basically|anyway|{PHRASES})\s*,\s*(?!\s*\2\b)"
+    rf"((?:(?-i:{HESITATIONS}|{PHRASES})\s*,\s*)*)",
+    re.IGNORECASE | re.MULTILINE
+)
+FALSE_STARTS = re.compile(r"\b(?![A-Z0-9]+-)(\w+)-\s+(?=\1)")
+STUTTER_WORDS = r"i|a|an|and|the|to|of|in|on|at|it|is|we|he|my|be|as|or|if|by|for"
+REPEATED_WORDS = re.compile(rf"\b({STUTTER_WORDS})(?:\s*,?\s+\1\b)+", re.IGNORECASE)
+
+
+def _drop_filler(match):
+    """Remove a filler, keeping a comma only when it stood on one side of it"""
+    before, after = match.group(1), match.groups()[-1]
+    return ", " if bool(before) != bool(after) and before else " "
+
+
+def clean_local(transcript, keep=None):
+    """
+    Clean a transcript with rules only: drop filler words and hesitations,
+    collapse stutters, and normalise spacing, punctuation and sentence
+    capitalisation. Paragraph breaks are kept.
+    keep(word) -> bool protects words that look like hesitations, e.g. known terms.
+    """
+    def drop_hesitation(match):
+        return match.group(0) if keep and keep(match.group(2)) else _drop_filler(match)
+
+    def drop_opening(match):
+        return match.group(0) if keep and keep(match.group(2)) else match.group(1)
+
+    def drop_opener(match):
+        # Hesitations after the marker go with it, unless one of them is a known term
+        hesitations = re.findall(r"[\w-]+", match.group(3))
+        if keep and any(keep(word) for word in hesitations):
+            return match.group(1) + match.group(3)
+        return match.group(1)
+
+    paragraphs = []
+    for paragraph in PARAGRAPH_BREAK.split(transcript):
+        text = " ".join(paragraph.split())
+        text = OPENING_HESITATIONS.sub(drop_opening, text)
+        previous = None
+        while previous != text:
+            previous, text = text, SENTENCE_OPENERS.sub(drop_opener, text)
+        text = FILLER_WORDS.sub(drop_hesitation, text)
+        text = FILLER_PHRASES.sub(_drop_filler, text).strip(" ,")
+        text = FALSE_STARTS.sub("", text)
+        text = REPEATED_WORDS.sub(lambda m: m.group(1), text)
+
+        # Spacing and punctuation
+        text = re.sub(r"\s+", " ", text)
+        text = re.sub(r"\s+([,.!?;:])", r"\1", text)
+        text = re.sub(r"([,;:])(?:\s*[,;:])+", r"\1", text)
+        text = re.sub(r"[,;:]+\s*([.!?])", r"\1", text)
+        text = re.sub(r"\.{3,}", "\u2026", text)
+        text = re.sub(r"([.!?\u2026])(?:\s*[.!?\u2026])+", r"\1", text)
+        text = text.replace("\u2026", "...")
+        text = re.sub(r"([,;!?])(?=[^\W\d_])", r"\1 ", text)
+        text = re.sub(r"(?<=[a-z]{2})\.(?=[A-Z])", ". ", text)
+        text = text.strip(" ,;:")
+
+        # Capitalise the first letter of each sentence
+        text = re.sub(r"(^|(?<!\b\w)[.!?]\s+)([a-z])", lambda m: m.group(1) + m.group(2).upper(), text)
+        text = re.sub(r"\bi\b(?!\.)", "I", text)
+        if text and text[-1].isalnum():
+            text += "."
+        if text:
+            paragraphs.append(text)
+    return "\n\n".join(paragraphs)
+
+
+def _pieces(text, max_tokens):
+    """Split text into sentences, and sentences longer than max_tokens into word runs"""
+    for sentence in SENTENCE_BREAK.split(text.strip()):
+        if count_tokens(sentence) <= max_tokens:
+            if sentence:
+                yield sentence
+            continue
+        spans = [m.span() for m in TOKEN_PATTERN.finditer(sentence)]
+        start = 0
+        for i in range(max_tokens, len(spans), max_tokens):
+            yield sentence[start:spans[i][0]].strip()
+            start = spans[i][0]
+        yield sentence[start:].strip()
+
+
+def split_chunks(transcript, chunk_tokens=CLEAN_CHUNK_TOKENS):
+    """
+    Split a transcript into chunks of at most about `chunk_tokens` tokens.
+    Chunks end on paragraph boundaries where possible, otherwise on sentence boundaries.
+    Returns a list of (text, separator) pairs, separator being what joins a chunk
+    to the next one.
+    """
+    chunks = []
+    for paragraph in PARAGRAPH_BREAK.split(transcript):
+        if not paragraph.strip():
+            continue
+        current, size = [], 0
+        for piece in _pieces(paragraph, chunk_tokens):
+            tokens = count_tokens(piece)
+            if current and size + tokens > chunk_tokens:
+                chunks.append((" ".join(current), " "))
+                current, size = [], 0
+            current.append(piece)
+            size += tokens
+        if current:
+            chunks.append((" ".join(current), "\n\n"))
+
+    # Merge small paragraphs so short lines do not each cost a call
+    merged = []
+    for text, separator in chunks:
+        if merged and merged[-1][1] == "\n\n" and count_tokens(merged[-1][0]) + count_tokens(text) <= chunk_tokens:
+            merged[-1] = (merged[-1][0] + "\n\n" + text, separator)
+        else:
+            merged.append((text, separator))
+    return merged
+
+
+def _prompt(text, partial=False):
+    """'system' and 'messages' arguments for cleaning a transcript, or one chunk of it"""
+    return (prompts.CLEAN_CHUNK if partial else prompts.CLEAN).request(TRANSCRIPT=text)
+
+
+def parse_cleaned(text):
+    """
+    Return the text inside <cleaned_transcript> tags.
+    Output cut off before the closing tag is kept; returns None if there is no opening tag.
+    """
+    match = re.search(r"<cleaned_transcript>(.*?)(?:</cleaned_transcript>|$)", text, re.DOTALL)
+    return match.group(1).strip() if match else None
+
+
+def clean_full(client, transcript, max_tokens=CLEAN_MAX_TOKENS, partial=False):
+    """Clean a transcript, or one chunk of it, in a single LLM call"""
+    message = client.messages.create(
+        model=CLEAN_MODEL,
+        max_tokens=max_tokens,
+        temperature=0,
+        **_prompt(transcript, partial)
+    )
+    cleaned = parse_cleaned(message_text(message))
+    if cleaned is None:
+        metrics.parse_failure("cleaning")
+        raise ValueError("No <cleaned_transcript> tags in response")
+    return cleaned
+
+
+def _clean_chunk(client, text, keep=None):
+    """Clean one chunk, falling back to the local cleaner if the call fails"""
+    try:
+        with metrics.span("clean_chunk"):
+            return clean_full(client, text, max_tokens=CLEAN_CHUNK_MAX_TOKENS, partial=True)
+    except Exception as e:
+        print(f"⚠️ Chunk cleaning failed, using local rules: {e}")
+        return clean_local(text, keep)
+
+
+def resolve_tier(transcript, tier="auto"):
+    """Map 'auto' to the tier it stands for; raises ValueError for unknown tiers"""
+    if tier not in CLEANING_TIERS:
+        raise ValueError(f"Unknown cleaning tier '{tier}'. Supported: {', '.join(CLEANING_TIERS)}")
+    if tier == "auto":
+        return "chunked" if count_tokens(transcript) > CLEAN_CHUNK_TOKENS else "full"
+    return tier
+
+
+def cache_field(tier):
+    """
+    Transcript cache field holding the output of a resolved tier.
+    LLM tiers include the prompt key and the local tier its rules version,
+    so a change misses the old results.
+    """
+    if tier == "local":
+        return f"filtered_local@{LOCAL_RULES_VERSION}"
+    if tier == "full":
+        return f"filtered@{prompts.CLEAN.key}"
+    return f"filtered_{tier}@{prompts.CLEAN_CHUNK.key}"
+
+
+def iter_clean(client, transcript, tier="auto", max_workers=CLEAN_MAX_WORKERS, keep=None):
+    """
+    Clean a transcript, yielding the cleaned text in pieces that join into the full result.
+    'full' streams the model output, 'chunked' yields each chunk in order as soon as
+    it and every chunk before it are done, and 'local' yields the result at once.
+    keep is passed to clean_local().
+    """
+    tier = resolve_tier(transcript, tier)
+
+    if tier == "local":
+        yield clean_local(transcript, keep)
+
+    elif tier == "full":
+        with client.messages.stream(
+            model=CLEAN_MODEL,
+            max_tokens=CLEAN_MAX_TOKENS,
+            temperature=0,
+            **_prompt(transcript)
+        ) as stream:
+            yield from streaming.iter_tag_content(stream.text_stream, "cleaned_transcript")
+
+    else:
+        chunks = split_chunks(transcript)
+        if not chunks:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+            futures = [executor.submit(scheduler.carry_lane(_clean_chunk), client, text, keep) for text, _ in chunks]
+            for index, future in enumerate(futures):
+                yield future.result()
+                if index < len(chunks) - 1:
+                    yield chunks[index][1]
+
+
+def clean_transcript(client, transcript, tier="auto", max_workers=CLEAN_MAX_WORKERS, keep=None):
+    """
+    Remove filler words and fix grammar in a transcript using the given tier.
+    keep is passed to clean_local(). Returns the cleaned text.
+    """
+    tier = resolve_tier(transcript, tier)
+    if tier == "full":
+        return clean_full(client, transcript)
+    return "".join(iter_clean(client, transcript, tier, max_workers, keep)).strip()
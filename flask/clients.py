@@ -0,0 +1,142 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+# Load API keys and settings from .env before any module reads them at import;
+# only the SDKs themselves are imported lazily
+load_dotenv()
+
+import scheduler
+
+# Timeouts (seconds), retries and connection pool limits for upstream API clients.
+# Calls go through the shared scheduler, which queues rate-limited calls again and
+# retries connection errors, 408/409 and 5xx responses with exponential backoff and
+# jitter, honouring Retry-After headers. The SDKs' own retries are turned off.
+API_CONNECT_TIMEOUT = float(os.environ.get("API_CONNECT_TIMEOUT", "10"))
+ANTHROPIC_TIMEOUT = float(os.environ.get("ANTHROPIC_TIMEOUT", "120"))
+OPENAI_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", "300"))  # audio uploads can be large
+API_MAX_RETRIES = int(os.environ.get("API_MAX_RETRIES", "3"))
+API_MAX_CONNECTIONS = int(os.environ.get("API_MAX_CONNECTIONS", "64"))
+API_MAX_KEEPALIVE = int(os.environ.get("API_MAX_KEEPALIVE", "32"))
+API_KEEPALIVE_EXPIRY = float(os.environ.get("API_KEEPALIVE_EXPIRY", "30"))
+
+_lock = threading.Lock()
+_clients = {}
+
+
+def _http_options(timeout):
+    """Shared httpx pool settings: keep-alive connections with explicit limits and timeouts"""
+    import httpx
+    return {
+        "timeout": httpx.Timeout(timeout, connect=API_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=API_MAX_CONNECTIONS,
+            max_keepalive_connections=API_MAX_KEEPALIVE,
+            keepalive_expiry=API_KEEPALIVE_EXPIRY
+        )
+    }
+
+
+def _make_anthropic():
+    from anthropic import Anthropic, APIConnectionError, DefaultHttpxClient
+    options = _http_options(ANTHROPIC_TIMEOUT)
+    client = Anthropic(
+        api_key=os.environ.get("ANTHROPIC_API_KEY"),
+        max_retries=0,
+        timeout=options["timeout"],
+        http_client=DefaultHttpxClient(**options)
+    )
+    return scheduler.ScheduledAnthropic(
+        client, scheduler.default_scheduler, max_retries=API_MAX_RETRIES, retry_on=APIConnectionError
+    )
+
+
+def _make_openai():
+    from openai import OpenAI, APIConnectionError, DefaultHttpxClient
+    options = _http_options(OPENAI_TIMEOUT)
+    client = OpenAI(
+        max_retries=0,
+        timeout=options["timeout"],
+        http_client=DefaultHttpxClient(**options)
+    )
+    return scheduler.ScheduledOpenAI(
+        client, scheduler.default_scheduler, max_retries=API_MAX_RETRIES, retry_on=APIConnectionError
+    )
+
+
+def _make_async_anthropic():
+    from anthropic import AsyncAnthropic, APIConnectionError, DefaultAsyncHttpxClient
+    options = _http_options(ANTHROPIC_TIMEOUT)
+    client = AsyncAnthropic(
+        api_key=os.environ.get("ANTHROPIC_API_KEY"),
+        max_retries=0,
+        timeout=options["timeout"],
+        http_client=DefaultAsyncHttpxClient(**options)
+    )
+    return scheduler.ScheduledAsyncAnthropic(
+        client, scheduler.default_scheduler, max_retries=API_MAX_RETRIES, retry_on=APIConnectionError
+    )
+
+
+def _make_async_openai():
+    from openai import AsyncOpenAI, APIConnectionError, DefaultAsyncHttpxClient
+    options = _http_options(OPENAI_TIMEOUT)
+    client = AsyncOpenAI(
+        max_retries=0,
+        timeout=options["timeout"],
+        http_client=DefaultAsyncHttpxClient(**options)
+    )
+    return scheduler.ScheduledAsyncOpenAI(
+        client, scheduler.default_scheduler, max_retries=API_MAX_RETRIES, retry_on=APIConnectionError
+    )
+
+
+_FACTORIES = {
+    "anthropic": _make_anthropic,
+    "openai": _make_openai,
+    "async_anthropic": _make_async_anthropic,
+    "async_openai": _make_async_openai
+}
+
+
+def message_text(message):
+    """Concatenate the text blocks of an Anthropic message"""
+    return "".join(block.text for block in message.content if getattr(block, "type", "text") == "text")
+
+
+def _get(name):
+    """Return the process-wide client, creating it on first use"""
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _lock:
+        if name not in _clients:
+            _clients[name] = _FACTORIES[name]()
+        return _clients[name]
+
+
+def anthropic_client():
+    """Process-wide Anthropic client with a keep-alive connection pool, behind the shared scheduler"""
+    return _get("anthropic")
+
+
+def openai_client():
+    """Process-wide OpenAI client with a keep-alive connection pool, behind the shared scheduler"""
+    return _get("openai")
+
+
+def async_anthropic_client():
+    """Process-wide AsyncAnthropic client for the ASGI server, behind the shared scheduler"""
+    return _get("async_anthropic")
+
+
+def async_openai_client():
+    """Process-wide AsyncOpenAI client for the ASGI server, behind the shared scheduler"""
+    return _get("async_openai")
+
+
+def warm_up():
+    """Create every client now instead of on first request"""
+    for name in _FACTORIES:
+        _get(name)
@@ -0,0 +1,260 @@
+import os
+import re
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metrics
+import prompts
+import scheduler
+from clients import message_text
+
+# Model and concurrency settings for term explanations
+EXPLAIN_MODEL = "claude-sonnet-4-5-20250929"
+EXPLAIN_MAX_WORKERS = int(os.environ.get("EXPLAIN_MAX_WORKERS", "8"))
+EXPLAIN_BATCH_SIZE = int(os.environ.get("EXPLAIN_BATCH_SIZE", "20"))
+
+# Cached explanations are keyed on both explanation prompts, so changing either regenerates them
+PROMPT_VERSION = f"{prompts.EXPLAIN.key}+{prompts.EXPLAIN_BATCH.key}"
+
+# Output budget per term in a batched prompt (2-4 sentences each)
+TOKENS_PER_TERM = 200
+MAX_BATCH_TOKENS = 8192
+
+
+def _unique_terms(terms):
+    """Drop blank and repeated terms while keeping the original order"""
+    seen = set()
+    unique = []
+    for term in terms:
+        if not isinstance(term, str):
+            continue
+        term = term.strip()
+        if term and term not in seen:
+            seen.add(term)
+            unique.append(term)
+    return unique
+
+
+def _explain_request(term):
+    """Messages API arguments for explaining one term"""
+    return dict(
+        model=EXPLAIN_MODEL,
+        max_tokens=1024,
+        temperature=0,
+        **prompts.EXPLAIN.request(BIOLOGICAL_TERM=term)
+    )
+
+
+def parse_explanation(text):
+    """Pull the explanation out of a single-term response"""
+    match = re.search(r"<explanation>(.*?)</explanation>", text, re.DOTALL)
+    return match.group(1).strip() if match else text.strip()
+
+
+def explain_term(client, term):
+    """
+    Explain a single term with one LLM call.
+    Returns the explanation text.
+    """
+    with metrics.span("explain_term"):
+        message = client.messages.create(**_explain_request(term))
+        return parse_explanation(message_text(message))
+
+
+async def explain_term_async(client, term):
+    """explain_term() with an async client"""
+    with metrics.span("explain_term"):
+        message = await client.messages.create(**_explain_request(term))
+        return parse_explanation(message_text(message))
+
+
+def parse_batch_response(text, terms):
+    """
+    Parse a multi-term JSON response.
+    Returns a dict of term -> explanation for the terms that could be matched;
+    terms that are missing or malformed are left out.
+    """
+    match = re.search(r"```json\s*([\s\S]+?)\s*```", text)
+    json_string = match.group(1) if match else text.strip()
+
+    try:
+        data = json.loads(json_string)
+    except json.JSONDecodeError:
+        metrics.parse_failure("explain_batch")
+        return {}
+
+    items = data.get("explanations", []) if isinstance(data, dict) else []
+
+    # Match on exact term first, then on a case-insensitive form
+    by_key = {term.casefold(): term for term in terms}
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        term = item.get("term")
+        explanation = item.get("explanation")
+        if not isinstance(term, str) or not isinstance(explanation, str) or not explanation.strip():
+            continue
+        original = term if term in terms else by_key.get(term.strip().casefold())
+        if original and original not in results:
+            results[original] = explanation.strip()
+    if len(results) < len(terms):
+        metrics.parse_failure("explain_batch_incomplete")
+    return results
+
+
+def _batch_request(terms):
+    """Messages API arguments for explaining several terms in one call"""
+    return dict(
+        model=EXPLAIN_MODEL,
+        max_tokens=min(MAX_BATCH_TOKENS, 256 + TOKENS_PER_TERM * len(terms)),
+        temperature=0,
+        **prompts.EXPLAIN_BATCH.request(BIOLOGICAL_TERMS="\n".join(terms))
+    )
+
+
+def explain_batch(client, terms):
+    """
+    Explain several terms with a single LLM call.
+    Returns a dict of term -> explanation for the items that parsed.
+    """
+    with metrics.span("explain_batch"):
+        message = client.messages.create(**_batch_request(terms))
+        return parse_batch_response(message_text(message), terms)
+
+
+async def explain_batch_async(client, terms):
+    """explain_batch() with an async client"""
+    with metrics.span("explain_batch"):
+        message = await client.messages.create(**_batch_request(terms))
+        return parse_batch_response(message_text(message), terms)
+
+
+def iter_explain_terms(client, terms, batch_size=EXPLAIN_BATCH_SIZE, max_workers=EXPLAIN_MAX_WORKERS):
+    """
+    Explain a list of terms concurrently, yielding (term, explanation) pairs as
+    they complete.
+
+    Terms are packed into batches of `batch_size` per prompt and the batches run
+    in parallel, at most `max_workers` calls at a time. Any term a batch fails to
+    return is retried on its own. A batch_size of 1 sends one prompt per term.
+    """
+    terms = _unique_terms(terms)
+    if not terms:
+        return
+
+    batch_size = max(1, batch_size)
+    done = set()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        if batch_size > 1 and len(terms) > 1:
+            batches = [terms[i:i + batch_size] for i in range(0, len(terms), batch_size)]
+            futures = [executor.submit(scheduler.carry_lane(explain_batch), client, batch) for batch in batches]
+            for future in as_completed(futures):
+                try:
+                    explanations = future.result()
+                except Exception as e:
+                    # Terms from a failed batch fall through to per-term calls
+                    print(f"⚠️ Batch explanation failed: {e}")
+                    continue
+                for term, explanation in explanations.items():
+                    done.add(term)
+                    yield term, explanation
+
+        # Per-term fallback for anything the batches did not return
+        missing = [term for term in terms if term not in done]
+        futures = {executor.submit(scheduler.carry_lane(explain_term), client, term): term for term in missing}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def explain_terms(client, terms, batch_size=EXPLAIN_BATCH_SIZE, max_workers=EXPLAIN_MAX_WORKERS):
+    """
+    Explain a list of terms concurrently (see iter_explain_terms).
+    Returns a dict of term -> explanation in the order the terms were given.
+    """
+    results = dict(iter_explain_terms(client, terms, batch_size=batch_size, max_workers=max_workers))
+    return {term: results[term] for term in _unique_terms(terms)}
+
+
+def iter_explain_terms_cached(client, terms, cache, batch_size=EXPLAIN_BATCH_SIZE, max_workers=EXPLAIN_MAX_WORKERS):
+    """
+    Yield (term, explanation, cached) as explanations become available: cache hits
+    first, then generated explanations as each LLM call completes.
+    """
+    terms = _unique_terms(terms)
+    cached = cache.get_many(terms, PROMPT_VERSION, EXPLAIN_MODEL)
+    for term in terms:
+        if term in cached:
+            yield term, cached[term], True
+
+    missing = [term for term in terms if term not in cached]
+    for term, explanation in iter_explain_terms(client, missing, batch_size=batch_size, max_workers=max_workers):
+        cache.put_many({term: explanation}, PROMPT_VERSION, EXPLAIN_MODEL)
+        yield term, explanation, False
+
+
+def explain_terms_cached(client, terms, cache, batch_size=EXPLAIN_BATCH_SIZE, max_workers=EXPLAIN_MAX_WORKERS):
+    """
+    Explain terms, serving repeats from `cache` and only calling the LLM for misses.
+    Returns (dict of term -> explanation in input order, number of cache hits).
+    """
+    terms = _unique_terms(terms)
+    cached = cache.get_many(terms, PROMPT_VERSION, EXPLAIN_MODEL)
+
+    missing = [term for term in terms if term not in cached]
+    generated = explain_terms(client, missing, batch_size=batch_size, max_workers=max_workers) if missing else {}
+    if generated:
+        cache.put_many(generated, PROMPT_VERSION, EXPLAIN_MODEL)
+
+    results = {**cached, **generated}
+    return {term: results[term] for term in terms}, len(cached)
+
+
+async def explain_terms_async(client, terms, batch_size=EXPLAIN_BATCH_SIZE, max_workers=EXPLAIN_MAX_WORKERS):
+    """
+    explain_terms() with an async client: batches, and the per-term fallback
+    for anything they miss, run as concurrent coroutines, at most max_workers
+    calls at a time.
+    Returns a dict of term -> explanation in the order the terms were given.
+    """
+    terms = _unique_terms(terms)
+    if not terms:
+        return {}
+
+    batch_size = max(1, batch_size)
+    limit = asyncio.Semaphore(max(1, max_workers))
+    results = {}
+
+    async def run(call, *args):
+        async with limit:
+            return await call(client, *args)
+
+    if batch_size > 1 and len(terms) > 1:
+        batches = [terms[i:i + batch_size] for i in range(0, len(terms), batch_size)]
+        for outcome in await asyncio.gather(*(run(explain_batch_async, batch) for batch in batches), return_exceptions=True):
+            if isinstance(outcome, Exception):
+                # Terms from a failed batch fall through to per-term calls
+                print(f"⚠️ Batch explanation failed: {outcome}")
+                continue
+            results.update(outcome)
+
+    missing = [term for term in terms if term not in results]
+    explanations = await asyncio.gather(*(run(explain_term_async, term) for term in missing))
+    results.update(zip(missing, explanations))
+    return {term: results[term] for term in terms}
+
+
+async def explain_terms_cached_async(client, terms, cache, batch_size=EXPLAIN_BATCH_SIZE, max_workers=EXPLAIN_MAX_WORKERS):
+    """explain_terms_cached() with an async client; cache reads and writes run in a worker thread"""
+    terms = _unique_terms(terms)
+    cached = await asyncio.to_thread(cache.get_many, terms, PROMPT_VERSION, EXPLAIN_MODEL)
+
+    missing = [term for term in terms if term not in cached]
+    generated = await explain_terms_async(client, missing, batch_size=batch_size, max_workers=max_workers) if missing else {}
+    if generated:
+        await asyncio.to_thread(cache.put_many, generated, PROMPT_VERSION, EXPLAIN_MODEL)
+
+    results = {**cached, **generated}
+    return {term: results[term] for term in terms}, len(cached)
@@ -0,0 +1,230 @@
+import io
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Request
+from werkzeug.datastructures import iter_multi_items
+
+import metrics
+
+# Uploads up to this size stay in memory; larger ones spill to a temp file
+SPOOL_MAX_MEMORY = int(os.environ.get("UPLOAD_SPOOL_MAX_MEMORY", str(4 * 1024 * 1024)))  # 4MB
+SPOOL_DIR = os.environ.get("UPLOAD_SPOOL_DIR") or None
+
+# Whether transcription endpoints also keep a copy of each upload in the audio folder
+PERSIST_UPLOADS = os.environ.get("PERSIST_UPLOADS", "false").lower() in ("1", "true", "yes")
+
+# Retention limits for the audio folder
+UPLOAD_RETENTION_MAX_BYTES = int(os.environ.get("UPLOAD_RETENTION_MAX_BYTES", str(2 * 1024 ** 3)))  # 2GB
+UPLOAD_RETENTION_MAX_AGE = int(os.environ.get("UPLOAD_RETENTION_MAX_AGE", str(7 * 24 * 3600)))  # 7 days
+
+# Single background writer so persisting never blocks a request
+_persist_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-persist")
+_prune_lock = threading.Lock()
+
+
+class HashingSpool(io.RawIOBase):
+    """
+    Upload buffer that hashes bytes as they are written.
+
+    Data is kept in memory up to `max_memory` bytes and then moved to a named
+    temp file, whose path is available as `path`. The same object is read by
+    the transcriber after `seek(0)`, so the upload is never copied again.
+    Writes must be sequential, as they are when werkzeug parses a request.
+    """
+
+    def __init__(self, max_memory=SPOOL_MAX_MEMORY, spool_dir=SPOOL_DIR, suffix=""):
+        super().__init__()
+        self.max_memory = max_memory
+        self.spool_dir = spool_dir
+        self.suffix = suffix
+        self.path = None
+        self.size = 0
+        self._file = io.BytesIO()
+        self._sha256 = hashlib.sha256()
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+    def rollover(self):
+        """Move buffered data to a temp file on disk"""
+        if self.path is not None:
+            return
+        disk = tempfile.NamedTemporaryFile(
+            prefix="upload-", suffix=self.suffix, dir=self.spool_dir, delete=False
+        )
+        disk.write(self._file.getbuffer())
+        disk.seek(self._file.tell())
+        self._file = disk
+        self.path = disk.name
+
+    def materialize(self):
+        """Ensure the data is on disk and return the file path"""
+        self.rollover()
+        self._file.flush()
+        return self.path
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def write(self, data):
+        self._sha256.update(data)
+        self.size += len(data)
+        if self.path is None and self.size > self.max_memory:
+            self.rollover()
+        return self._file.write(data)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def readinto(self, buffer):
+        return self._file.readinto(buffer)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        if not self.closed:
+            self._file.flush()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def getvalue(self):
+        """Return the buffered bytes of an in-memory spool"""
+        return self._file.getvalue()
+
+    def close(self):
+        if self.closed:
+            return
+        super().close()
+        self._file.close()
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class IngestRequest(Request):
+    """Request class that parses uploaded files straight into a HashingSpool"""
+
+    detached = ()
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Keep the extension so spilled files are still recognised by ffmpeg and the transcription API
+        _, ext = os.path.splitext(filename or "")
+        return HashingSpool(suffix=ext.lower())
+
+    def _load_form_data(self):
+        # Parsing streams the upload into its spool, so this is the upload write
+        with metrics.span("upload"):
+            super()._load_form_data()
+
+    def detach(self, spool):
+        """Keep a spool open after the request is closed; the caller must close it"""
+        self.detached = self.detached + (spool,)
+        return spool
+
+    def close(self):
+        files = self.__dict__.get("files")
+        for _key, value in iter_multi_items(files or ()):
+            if not any(value.stream is spool for spool in self.detached):
+                value.close()
+
+
+def upload_source(filename, spool):
+    """Rewind a spool and return it as a (filename, file) pair for the transcription API"""
+    spool.seek(0)
+    return (filename, spool)
+
+
+def persist(spool, filepath):
+    """
+    Save a copy of an upload at filepath without blocking the request.
+    Spilled uploads are hard-linked when possible; otherwise the bytes are
+    written by a background thread. Returns a Future that resolves to filepath
+    once the copy exists. Failures are also logged, since most callers do not wait.
+    """
+    folder = os.path.dirname(filepath)
+    os.makedirs(folder, exist_ok=True)
+
+    source = None
+    if spool.path is not None:
+        spool.flush()
+        try:
+            os.link(spool.path, filepath)
+        except OSError:
+            # Different filesystem: keep our own handle so the copy survives the spool being closed
+            source = open(spool.path, "rb")
+    else:
+        source = io.BytesIO(spool.getvalue())
+
+    def write():
+        if source is not None:
+            with metrics.span("persist"), source, open(filepath, "wb") as out:
+                shutil.copyfileobj(source, out)
+        # The copy exists now; a pruning failure must not fail the upload
+        try:
+            prune_uploads(folder, keep=filepath)
+        except OSError as e:
+            print(f"⚠️ Could not prune uploads in {folder}: {e}")
+        return filepath
+
+    def report(future):
+        error = future.exception()
+        if error is not None:
+            print(f"⚠️ Could not save upload to {filepath}: {error}")
+
+    future = _persist_executor.submit(write)
+    future.add_done_callback(report)
+    return future
+
+
+def prune_uploads(folder, max_bytes=UPLOAD_RETENTION_MAX_BYTES, max_age=UPLOAD_RETENTION_MAX_AGE, keep=None):
+    """
+    Delete uploads older than max_age, then the oldest ones until the folder fits in max_bytes.
+    The file at `keep`, typically the upload just saved, is never deleted.
+    """
+    with _prune_lock:
+        now = time.time()
+        entries = []
+        for entry in os.scandir(folder):
+            if not entry.is_file() or entry.path == keep:
+                continue
+            stat = entry.stat()
+            if now - stat.st_mtime > max_age:
+                _remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        if keep is not None and os.path.exists(keep):
+            total += os.path.getsize(keep)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+
+def _remove(path):
+    """Delete a file that another process may have deleted already"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,163 @@
+import os
+import time
+import uuid
+import threading
+from collections import deque
+
+import metrics
+
+# Background job settings
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", "3600"))
+
+
+class Job:
+    """A batch of named tasks processed in the background"""
+
+    def __init__(self, tasks, meta=None, on_done=None):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.meta = meta or {}
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.files = [{"name": name, "status": "queued", "error": None} for name, _ in tasks]
+        self.results = {}
+        self._pending = deque(enumerate(tasks))
+        self._remaining = len(tasks)
+        self.on_done = on_done
+
+    def to_dict(self, include_results=True):
+        """Serialize the job's status, per-file progress and partial results"""
+        completed = sum(1 for f in self.files if f["status"] == "completed")
+        failed = sum(1 for f in self.files if f["status"] == "failed")
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": {
+                "total": len(self.files),
+                "completed": completed,
+                "failed": failed
+            },
+            "files": [dict(f) for f in self.files],
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            **self.meta
+        }
+        if include_results:
+            data["results"] = {f["name"]: self.results[f["name"]] for f in self.files if f["name"] in self.results}
+        return data
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded pool of worker threads.
+
+    Workers take one task at a time from the active jobs in round-robin order,
+    so a large batch cannot starve jobs submitted after it. Finished jobs are
+    kept for `retention` seconds.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, retention=JOB_RETENTION_SECONDS):
+        self.workers = max(1, workers)
+        self.retention = retention
+        self._jobs = {}
+        self._active = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def _ensure_workers(self):
+        """Start the worker threads on first use"""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, tasks, meta=None, on_done=None):
+        """
+        Queue a job. tasks is a list of (name, callable) pairs; each callable's
+        return value is stored as that name's result. on_done(job), if given, is
+        called once every task has finished.
+        Returns the new Job.
+        """
+        job = Job(tasks, meta, on_done)
+        with self._cond:
+            self._prune()
+            self._jobs[job.id] = job
+            if tasks:
+                self._active.append(job)
+            self._ensure_workers()
+            self._cond.notify_all()
+        if not tasks:
+            self._finish(job)
+        return job
+
+    def get(self, job_id):
+        """Return the job with this id, or None if unknown or expired"""
+        with self._cond:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def snapshot(self, job_id, include_results=True):
+        """Return a consistent dict view of a job, or None"""
+        with self._cond:
+            self._prune()
+            job = self._jobs.get(job_id)
+            return job.to_dict(include_results) if job else None
+
+    def _prune(self):
+        """Drop finished jobs older than the retention period (lock held)"""
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _finish(self, job):
+        """Run the job's completion hook, then mark it finished"""
+        # The hook runs first so pollers that see the final status also see its effects
+        if job.on_done is not None:
+            try:
+                job.on_done(job)
+            except Exception as e:
+                print(f"⚠️ Job {job.id} completion hook failed: {e}")
+        with self._cond:
+            failed = bool(job.files) and all(f["status"] == "failed" for f in job.files)
+            job.status = "failed" if failed else "completed"
+            job.finished_at = time.time()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._active:
+                    self._cond.wait()
+                job = self._active.popleft()
+                index, (name, task) = job._pending.popleft()
+                if job._pending:
+                    self._active.append(job)
+                if job.status == "queued":
+                    job.status = "running"
+                    job.started_at = time.time()
+                job.files[index]["status"] = "running"
+
+            try:
+                with metrics.in_flight("job_task"):
+                    result = task()
+                error = None
+            except Exception as e:
+                result = None
+                error = str(e)
+
+            with self._cond:
+                if error is None:
+                    job.results[name] = result
+                    job.files[index]["status"] = "completed"
+                else:
+                    job.files[index]["status"] = "failed"
+                    job.files[index]["error"] = error
+                job._remaining -= 1
+                finished = job._remaining == 0
+
+            if finished:
+                self._finish(job)
@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import prompts
+import scheduler
+from clients import message_text
+
+# Model and windowing settings for keyword extraction
+KEYWORD_MODEL = 'claude-3-5-haiku-20241022'
+# Output budget for every extraction call, single or windowed; the prompt reasons before its JSON
+WINDOW_MAX_TOKENS = 4096
+WINDOW_TOKENS = int(os.environ.get("KEYWORD_WINDOW_TOKENS", "1500"))
+WINDOW_OVERLAP_TOKENS = int(os.environ.get("KEYWORD_WINDOW_OVERLAP_TOKENS", "150"))
+KEYWORD_MAX_WORKERS = int(os.environ.get("KEYWORD_MAX_WORKERS", "8"))
+
+EXTRACTION_MODES = ("auto", "single", "chunked")
+
+# Rough token boundaries: words and individual punctuation marks
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_END = {".", "!", "?"}
+
+
+class KeywordExtractionError(Exception):
+    """Raised when the LLM response contains no usable term list"""
+
+
+def count_tokens(text):
+    """Approximate the token count of text"""
+    return sum(1 for _ in TOKEN_PATTERN.finditer(text))
+
+
+def split_windows(text, window_tokens=WINDOW_TOKENS, overlap_tokens=WINDOW_OVERLAP_TOKENS):
+    """
+    Split text into overlapping windows of at most `window_tokens` tokens.
+    Windows end on a sentence boundary when one falls in their second half,
+    and each window repeats the last `overlap_tokens` tokens of the previous one.
+    Returns a list of substrings of text.
+    """
+    spans = [m.span() for m in TOKEN_PATTERN.finditer(text)]
+    if len(spans) <= window_tokens:
+        return [text] if spans else []
+
+    overlap_tokens = min(overlap_tokens, window_tokens // 2)
+    windows = []
+    start = 0
+    while start < len(spans):
+        end = min(start + window_tokens, len(spans))
+
+        # Prefer to cut just after the last sentence end in the second half of the window
+        if end < len(spans):
+            for i in range(end - 1, start + window_tokens // 2, -1):
+                if text[spans[i][0]:spans[i][1]] in SENTENCE_END:
+                    end = i + 1
+                    break
+
+        windows.append(text[spans[start][0]:spans[end - 1][1]])
+        if end == len(spans):
+            break
+        start = max(end - overlap_tokens, start + 1)
+    return windows
+
+
+def parse_terms(text):
+    """
+    Parse the term list out of an extraction response.
+    A JSON block cut off by the output limit is salvaged term by term.
+    Returns a list of terms; raises KeywordExtractionError if none can be read.
+    """
+    match = re.search(r"```json\s*([\s\S]+?)\s*```", text)
+
+    if match:
+        try:
+            data = json.loads(match.group(1))
+            return [term for term in data.get("biological_terms", []) if isinstance(term, str)]
+        except json.JSONDecodeError as e:
+            error = f"Error decoding JSON: {str(e)}"
+    else:
+        error = "No JSON found in response"
+
+    # Truncated output: keep every complete string in the biological_terms array
+    truncated = re.search(r"\"biological_terms\"\s*:\s*\[([\s\S]*)", text)
+    if truncated:
+        metrics.parse_failure("keywords_truncated")
+        body = truncated.group(1).split("]", 1)[0]
+        return [json.loads(s) for s in re.findall(r'"(?:[^"\\]|\\.)*"', body)]
+
+    metrics.parse_failure("keywords")
+    raise KeywordExtractionError(error)
+
+
+def _extract_request(text, max_tokens):
+    """Messages API arguments for one extraction call"""
+    return dict(
+        model=KEYWORD_MODEL,
+        max_tokens=max_tokens,
+        temperature=0,
+        **prompts.KEYWORDS.request(TRANSCRIPT=text)
+    )
+
+
+def extract_window(client, text, max_tokens=WINDOW_MAX_TOKENS):
+    """Run one extraction call over text. Returns the list of terms."""
+    message = client.messages.create(**_extract_request(text, max_tokens))
+    with metrics.span("parse_keywords"):
+        return parse_terms(message_text(message))
+
+
+async def extract_window_async(client, text, max_tokens=WINDOW_MAX_TOKENS):
+    """extract_window() with an async client"""
+    message = await client.messages.create(**_extract_request(text, max_tokens))
+    with metrics.span("parse_keywords"):
+        return parse_terms(message_text(message))
+
+
+def merge_terms(transcript, term_lists):
+    """
+    Merge term lists from several windows.
+    Each term is mapped back to its exact surface form in the transcript when the
+    model changed its case, then de-duplicated and sorted deterministically.
+    """
+    merged = set()
+    for terms in term_lists:
+        for term in terms:
+            term = term.strip()
+            if not term:
+                continue
+            if term not in transcript:
+                match = re.search(re.escape(term), transcript, re.IGNORECASE)
+                if match:
+                    term = match.group(0)
+            merged.add(term)
+    return sorted(merged, key=lambda term: (term.casefold(), term))
+
+
+def resolve_mode(transcript, mode):
+    """Validate an extraction mode and turn 'auto' into 'single' or 'chunked'"""
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode '{mode}'. Supported: {', '.join(EXTRACTION_MODES)}")
+    if mode == "auto":
+        mode = "chunked" if count_tokens(transcript) > WINDOW_TOKENS else "single"
+    return mode
+
+
+def extract_keywords(client, transcript, mode="auto", max_workers=KEYWORD_MAX_WORKERS):
+    """
+    Extract biological keywords from a transcript.
+
+    'single' sends the whole transcript in one prompt. 'chunked' splits it into
+    overlapping token-bounded windows, extracts from them in parallel and merges
+    the results. 'auto' picks 'chunked' once the transcript exceeds one window.
+    Returns dict with 'keyword' and 'total_count' fields.
+    """
+    mode = resolve_mode(transcript, mode)
+
+    if mode == "single":
+        terms = merge_terms(transcript, [extract_window(client, transcript)])
+    else:
+        windows = split_windows(transcript)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(windows)))) as executor:
+            term_lists = list(executor.map(scheduler.carry_lane(lambda window: extract_window(client, window)), windows))
+        terms = merge_terms(transcript, term_lists)
+
+    return {
+        "keyword": terms,
+        "total_count": len(terms)
+    }
+
+
+async def extract_keywords_async(client, transcript, mode="auto", max_workers=KEYWORD_MAX_WORKERS):
+    """
+    extract_keywords() with an async client: windows are extracted as
+    concurrent coroutines, at most max_workers at a time.
+    """
+    mode = resolve_mode(transcript, mode)
+
+    if mode == "single":
+        term_lists = [await extract_window_async(client, transcript)]
+    else:
+        limit = asyncio.Semaphore(max(1, max_workers))
+
+        async def extract(window):
+            async with limit:
+                return await extract_window_async(client, window)
+
+        term_lists = await asyncio.gather(*(extract(window) for window in split_windows(transcript)))
+
+    terms = merge_terms(transcript, term_lists)
+    return {
+        "keyword": terms,
+        "total_count": len(terms)
+    }
@@ -0,0 +1,234 @@
+import os
+import re
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialised
+    fcntl = None
+
+from transcript_cache import hash_file
+
+MANIFEST_VERSION = 1
+
+# Section headers of a merged output file
+SECTION_HEADER = re.compile(r"^### (.+)\n", re.MULTILINE)
+
+
+def write_atomic(path, text):
+    """Write text to path through a temp file, so readers never see a partial file"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class TranscriptionManifest:
+    """
+    Record of the audio files already transcribed into an output file.
+
+    Each file's transcript is stored in its own part file under
+    `<output stem>.parts/`, and `manifest.json` there maps the file name to its
+    size, mtime, sha256, the options it was transcribed with and its part file.
+    The output file itself is a merged view rebuilt from the parts; an output
+    written before the manifest existed is imported into parts on first use.
+
+    Every operation reloads the manifest under a lock file, so the Flask app and
+    audio-to-transcript/transcribe.py can update the same output.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.parts_dir = f"{os.path.splitext(output_path)[0]}.parts"
+        self.path = os.path.join(self.parts_dir, "manifest.json")
+        self._lock = threading.Lock()
+        self.files = {}
+        self.preamble = ""
+
+    @contextmanager
+    def _locked(self):
+        """Hold the manifest across threads and processes, with its latest state loaded"""
+        with self._lock:
+            os.makedirs(self.parts_dir, exist_ok=True)
+            with open(f"{self.path}.lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._load()
+                yield
+
+    def _load(self):
+        """Read the manifest, importing the existing output when there is none yet (lock held)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            self._import_output()
+            return
+        except json.JSONDecodeError:
+            data = {}
+        self.files = data.get("files", {})
+        self.preamble = data.get("preamble", "")
+
+    def _import_output(self):
+        """
+        Split an output file written without a manifest into parts, so merging
+        keeps its sections. Imported entries have no size or hash, so the
+        matching audio is transcribed again if it is in the input directory.
+        """
+        self.files, self.preamble = {}, ""
+        try:
+            with open(self.output_path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return
+
+        sections = SECTION_HEADER.split(text)
+        self.preamble = sections[0].strip()
+        for filename, body in zip(sections[1::2], sections[2::2]):
+            filename = filename.strip()
+            part_path = self.part_path(filename)
+            write_atomic(part_path, body.strip("\n"))
+            self.files[filename] = {
+                "path": None,
+                "size": None,
+                "mtime_ns": None,
+                "sha256": None,
+                "options": {},
+                "output": part_path,
+                "imported_at": time.time()
+            }
+        print(f"📥 Imported {len(self.files)} existing section(s) from {self.output_path}")
+        self._save()
+
+    def _save(self):
+        """Write the manifest (lock held)"""
+        data = {"version": MANIFEST_VERSION, "files": self.files}
+        if self.preamble:
+            data["preamble"] = self.preamble
+        write_atomic(self.path, json.dumps(data, indent=2))
+
+    def _usable(self, filename, options):
+        """Whether the recorded transcript of a file may be reused under these options (lock held)"""
+        entry = self.files.get(filename)
+        return (
+            entry is not None
+            and entry.get("options", {}) == options
+            and os.path.exists(self.part_path(filename))
+        )
+
+    def part_path(self, filename):
+        return os.path.join(self.parts_dir, f"{filename}.txt")
+
+    def plan(self, input_dir, filenames, options=None):
+        """
+        Compare the files in input_dir with the manifest by size and mtime only,
+        so planning never reads audio. Files with unchanged size, mtime and
+        options are skipped; the rest are returned, and reuse() decides by content
+        hash when each one is processed. Entries for files that were removed from
+        input_dir are dropped along with their parts.
+        Returns a list of dicts with 'filename', 'path', 'size', 'mtime_ns' and
+        'sha256' (None until reuse()) for the files that may need transcribing.
+        """
+        options = options or {}
+        stats = {}
+        for filename in sorted(filenames):
+            path = os.path.join(input_dir, filename)
+            stats[filename] = (path, os.stat(path))
+
+        pending = []
+        with self._locked():
+            for filename, (path, stat) in stats.items():
+                entry = self.files.get(filename)
+                if (
+                    self._usable(filename, options)
+                    and entry["size"] == stat.st_size
+                    and entry["mtime_ns"] == stat.st_mtime_ns
+                ):
+                    continue
+                pending.append({"filename": filename, "path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": None})
+
+            input_dir = os.path.abspath(input_dir)
+            removed = [
+                filename for filename, entry in self.files.items()
+                if filename not in stats and entry.get("path")
+                and os.path.dirname(os.path.abspath(entry["path"])) == input_dir
+            ]
+            for filename in removed:
+                del self.files[filename]
+                try:
+                    os.remove(self.part_path(filename))
+                except FileNotFoundError:
+                    pass
+            if removed:
+                self._save()
+        return pending
+
+    def reuse(self, item, options=None):
+        """
+        Hash a planned file and check it against the manifest; call it from the
+        worker that would transcribe the file. Sets item['sha256']. Returns the
+        recorded transcript when the content is unchanged (only the new mtime is
+        recorded), or None when the file needs transcribing.
+        """
+        item["sha256"] = hash_file(item["path"])
+        with self._locked():
+            entry = self.files.get(item["filename"])
+            if not (self._usable(item["filename"], options or {}) and entry["sha256"] == item["sha256"]):
+                return None
+            with open(self.part_path(item["filename"]), "r", encoding="utf-8") as f:
+                text = f.read()
+            # Touched but identical
+            entry["size"], entry["mtime_ns"] = item["size"], item["mtime_ns"]
+            self._save()
+        return text
+
+    def record(self, item, text, options=None):
+        """Write one file's transcript to its part and add it to the manifest"""
+        part_path = self.part_path(item["filename"])
+        write_atomic(part_path, text)
+        with self._locked():
+            self.files[item["filename"]] = {
+                "path": item["path"],
+                "size": item["size"],
+                "mtime_ns": item["mtime_ns"],
+                "sha256": item["sha256"],
+                "options": options or {},
+                "output": part_path,
+                "transcribed_at": time.time()
+            }
+            self._save()
+
+    def merge(self):
+        """
+        Rebuild the output file from every part, in file name order, as
+        '### filename' sections after any imported preamble. Returns the merged text.
+        """
+        with self._locked():
+            sections = [f"{self.preamble}\n\n"] if self.preamble else []
+            for filename in sorted(self.files):
+                try:
+                    with open(self.part_path(filename), "r", encoding="utf-8") as f:
+                        sections.append(f"### {filename}\n{f.read()}\n\n")
+                except FileNotFoundError:
+                    continue
+
+            merged = "".join(sections)
+            write_atomic(self.output_path, merged)
+        return merged
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def open_manifest(output_path):
+    """Return the shared manifest for output_path, so threads of this process share its lock"""
+    key = os.path.abspath(output_path)
+    with _manifests_lock:
+        if key not in _manifests:
+            _manifests[key] = TranscriptionManifest(output_path)
+        return _manifests[key]
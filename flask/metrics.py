@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Add a Server-Timing header with the per-stage breakdown to every response
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+METRICS_PREFIX = "clarify_"
+
+# Histogram buckets in seconds, from regex parses up to long transcriptions
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# USD per million tokens, e.g. {"claude-sonnet-4-5-20250929": {"input": 3, "output": 15}}.
+# Cache writes and reads default to 1.25x and 0.1x the input price.
+MODEL_PRICES = {
+    "claude-sonnet-4-5-20250929": {"input": 3.0, "output": 15.0},
+    "claude-3-5-haiku-20241022": {"input": 0.8, "output": 4.0},
+    **json.loads(os.environ.get("MODEL_PRICES", "{}"))
+}
+
+# Usage fields reported by the Messages API, by token type
+USAGE_FIELDS = {
+    "input": "input_tokens",
+    "output": "output_tokens",
+    "cache_write": "cache_creation_input_tokens",
+    "cache_read": "cache_read_input_tokens"
+}
+
+# Stage timings of the request being served, for the Server-Timing header
+_timings = contextvars.ContextVar("metrics_timings", default=None)
+
+# Innermost stage being timed, which upstream usage is attributed to
+_stage = contextvars.ContextVar("metrics_stage", default="other")
+
+
+class Registry:
+    """
+    Process-wide counters, gauges and histograms, rendered in the Prometheus
+    text format. Metrics are declared once with define() and then updated by
+    name with label values as keyword arguments.
+    """
+
+    def __init__(self, prefix=METRICS_PREFIX, buckets=BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = []
+
+    def define(self, name, kind, help_text):
+        with self._lock:
+            self._metrics.setdefault(name, {"kind": kind, "help": help_text, "values": {}})
+
+    def collect(self, fn):
+        """Register fn() -> iterable of (name, labels, value), called at render time for gauges owned elsewhere"""
+        self._collectors.append(fn)
+        return fn
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._metrics[name]["values"]
+            values[key] = values.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._metrics[name]["values"][key] = value
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._metrics[name]["values"]
+            histogram = values.get(key)
+            if histogram is None:
+                histogram = values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["counts"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def value(self, name, **labels):
+        """Current value of a counter or gauge, or the count of a histogram"""
+        with self._lock:
+            value = self._metrics[name]["values"].get(tuple(sorted(labels.items())), 0)
+        return value["count"] if isinstance(value, dict) else value
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        collected = {}
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    collected.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                full_name = self.prefix + name
+                values = {**metric["values"], **collected.get(name, {})}
+                lines.append(f"# HELP {full_name} {metric['help']}")
+                lines.append(f"# TYPE {full_name} {metric['kind']}")
+                for key, value in sorted(values.items()):
+                    if metric["kind"] == "histogram":
+                        for bound, count in zip(self.buckets, value["counts"]):
+                            lines.append(f"{full_name}_bucket{_labels(key + (('le', _number(bound)),))} {count}")
+                        lines.append(f"{full_name}_bucket{_labels(key + (('le', '+Inf'),))} {value['count']}")
+                        lines.append(f"{full_name}_sum{_labels(key)} {_number(value['sum'])}")
+                        lines.append(f"{full_name}_count{_labels(key)} {value['count']}")
+                    else:
+                        lines.append(f"{full_name}{_labels(key)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(key):
+    if not key:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+registry.define("stage_seconds", "histogram", "Time spent in each processing stage")
+registry.define("stage_errors_total", "counter", "Processing stages that raised an error")
+registry.define("http_requests_total", "counter", "HTTP requests served, by endpoint and status")
+registry.define("http_request_seconds", "histogram", "HTTP request handling time, by endpoint")
+registry.define("http_requests_in_flight", "gauge", "HTTP requests being handled, by endpoint")
+registry.define("upstream_requests_total", "counter", "Upstream API calls, by model and outcome")
+registry.define("upstream_request_seconds", "histogram", "Upstream API call time, by model")
+registry.define("upstream_tokens_total", "counter", "Upstream tokens used, by model, stage and type")
+registry.define("upstream_cost_usd_total", "counter", "Estimated upstream spend in USD, by model and stage")
+registry.define("cache_requests_total", "counter", "Cache lookups, by cache and result")
+registry.define("parse_failures_total", "counter", "Model responses that could not be fully parsed, by stage")
+registry.define("in_flight", "gauge", "Work in progress, by kind")
+
+
+@contextmanager
+def span(stage):
+    """Time a processing stage, recording it in the stage histogram and the current request's breakdown"""
+    start = time.perf_counter()
+    outer = _stage.get()
+    _stage.set(stage)
+    try:
+        yield
+    except Exception:
+        registry.inc("stage_errors_total", stage=stage)
+        raise
+    finally:
+        _stage.set(outer)
+        elapsed = time.perf_counter() - start
+        registry.observe("stage_seconds", elapsed, stage=stage)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+@contextmanager
+def in_flight(kind):
+    """Count the work inside the block in the in-flight gauge"""
+    registry.inc("in_flight", 1, kind=kind)
+    try:
+        yield
+    finally:
+        registry.inc("in_flight", -1, kind=kind)
+
+
+def cache_result(cache, hits=0, misses=0):
+    """Count cache hits and misses"""
+    if hits:
+        registry.inc("cache_requests_total", hits, cache=cache, result="hit")
+    if misses:
+        registry.inc("cache_requests_total", misses, cache=cache, result="miss")
+
+
+def parse_failure(stage):
+    registry.inc("parse_failures_total", stage=stage)
+
+
+def record_upstream(model, outcome, elapsed=None, usage=None):
+    """
+    Count one upstream call: outcome is 'ok', 'rate_limited' or 'error'.
+    `usage` is the token usage reported by the API, if any; it is added to the
+    token counters and priced with MODEL_PRICES, under the innermost span() stage.
+    """
+    registry.inc("upstream_requests_total", model=model, outcome=outcome)
+    if elapsed is not None:
+        registry.observe("upstream_request_seconds", elapsed, model=model)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append(("upstream", elapsed))
+    if not usage:
+        return
+
+    stage = _stage.get()
+    prices = MODEL_PRICES.get(model)
+    cost = 0.0
+    for kind, field in USAGE_FIELDS.items():
+        tokens = usage.get(field) or 0
+        if not tokens:
+            continue
+        registry.inc("upstream_tokens_total", tokens, model=model, stage=stage, type=kind)
+        if prices:
+            default = {"cache_write": 1.25, "cache_read": 0.1}.get(kind, 0) * prices.get("input", 0)
+            cost += tokens * prices.get(kind, default) / 1_000_000
+    if cost:
+        registry.inc("upstream_cost_usd_total", cost, model=model, stage=stage)
+
+
+def start_request(endpoint):
+    """Begin tracking a request. Returns a token for finish_request()."""
+    registry.inc("http_requests_in_flight", 1, endpoint=endpoint)
+    return endpoint, time.perf_counter(), _timings.set([])
+
+
+def finish_request(token, status):
+    """
+    Finish tracking a request.
+    Returns the Server-Timing header value, or None when SERVER_TIMING is off.
+    """
+    endpoint, start, timings_token = token
+    elapsed = time.perf_counter() - start
+    timings = _timings.get() or []
+    try:
+        _timings.reset(timings_token)
+    except ValueError:
+        # Finished from a different context than it started in
+        pass
+
+    registry.inc("http_requests_in_flight", -1, endpoint=endpoint)
+    registry.inc("http_requests_total", endpoint=endpoint, status=str(status))
+    registry.observe("http_request_seconds", elapsed, endpoint=endpoint)
+    return server_timing(timings, elapsed) if SERVER_TIMING else None
+
+
+def server_timing(timings, total):
+    """Format stage timings as a Server-Timing header, summing repeated stages"""
+    stages = {}
+    for stage, elapsed in timings:
+        duration, count = stages.get(stage, (0.0, 0))
+        stages[stage] = (duration + elapsed, count + 1)
+
+    entries = []
+    for stage, (duration, count) in stages.items():
+        entry = f"{stage};dur={duration * 1000:.1f}"
+        if count > 1:
+            entry += f';desc="{count} calls"'
+        entries.append(entry)
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
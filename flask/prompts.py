@@ -0,0 +1,225 @@
+"""
+Prompt templates for the Messages API calls.
+
+Each prompt is split into static instructions, sent as the system prompt, and a
+short user message holding the transcript or terms. The system prompt is the
+same on every call and comes first, so it is marked for prompt caching and the
+upstream can reuse it instead of processing it again. Every prompt has a key
+made of its name, version and a hash of its text; result caches include it, so
+cached output is regenerated when a template changes.
+"""
+import os
+import hashlib
+
+# Mark the static system prompts for provider-side prompt caching
+PROMPT_CACHE = os.environ.get("PROMPT_CACHE", "true").lower() in ("1", "true", "yes")
+
+
+class Prompt:
+    """
+    A static system prompt plus a user message with {{NAME}} placeholders.
+    Bump `version` when the instructions change in a way that should invalidate
+    cached results; the key also changes whenever the text does.
+    """
+
+    def __init__(self, name, version, system, user):
+        self.name = name
+        self.version = version
+        self.system = system
+        self.user = user
+        digest = hashlib.sha256(f"{system}\0{user}".encode("utf-8")).hexdigest()
+        self.key = f"{name}-v{version}-{digest[:8]}"
+
+    def render(self, **values):
+        """The user message with its placeholders filled in"""
+        text = self.user
+        for name, value in values.items():
+            text = text.replace("{{" + name + "}}", value)
+        return text
+
+    def request(self, **values):
+        """'system' and 'messages' arguments for a Messages API call"""
+        system = {"type": "text", "text": self.system}
+        if PROMPT_CACHE:
+            system["cache_control"] = {"type": "ephemeral"}
+        return {
+            "system": [system],
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": self.render(**values)
+                        }
+                    ]
+                }
+            ]
+        }
+
+
+# Prompt name -> Prompt
+PROMPTS = {}
+
+
+def register(name, version, system, user):
+    prompt = PROMPTS[name] = Prompt(name, version, system, user)
+    return prompt
+
+
+def versions():
+    """Key of every registered prompt, by name"""
+    return {name: prompt.key for name, prompt in PROMPTS.items()}
+
+
+# Keyword extraction (keywords.py)
+KEYWORD_EXTRACTION_SYSTEM = """You are tasked with extracting biological terminology from a conference transcript. Your goal is to identify and catalog scientific terms specifically related to biology, genetics, molecular biology, and related fields.
+
+The conference transcript to analyze is in the user message, inside <transcript> tags.
+
+## What Qualifies as a Biological Term
+
+Include terms that fall into these categories:
+- Gene names (e.g., p53, BRCA1, myc)
+- Protein names (e.g., hemoglobin, insulin, collagen)
+- Biological processes (e.g., transcription, translation, mitosis)
+- Cellular components (e.g., mitochondria, ribosome, nucleus)
+- Organisms and species names (e.g., E. coli, Drosophila, Homo sapiens)
+- Biological molecules (e.g., DNA, RNA, ATP)
+- Medical/biological conditions (e.g., diabetes, cancer, mutation)
+- Biological techniques and methods (e.g., PCR, CRISPR, sequencing)
+- Anatomical terms (e.g., liver, neuron, tissue)
+
+## What to Exclude
+
+Do not include:
+- General scientific terms that aren't specifically biological (like "data", "analysis", "significant")
+- Common words that aren't technical terminology
+- General laboratory equipment or basic scientific concepts
+
+## Extraction Requirements
+
+1. **Preserve exact formatting**: Capture each term exactly as it appears in the transcript - maintain original spelling, capitalization, and formatting
+2. **Include variants**: If both abbreviated forms (like "PCR") and full forms (like "polymerase chain reaction") appear, include both
+3. **Include all nomenclature**: Capture species names in both common and scientific formats
+4. **No duplicates**: List each unique term only once, even if it appears multiple times
+5. **Focus on technical terms**: Prioritize specialized biological terminology over general words
+
+## Analysis Process
+
+Before providing your final answer, work through the transcript systematically in <term_extraction> tags inside your thinking block:
+
+1. Scan through the entire transcript and quote all potential biological terms exactly as they appear in the text. It's OK for this section to be quite long.
+2. For each quoted term, evaluate whether it qualifies based on the criteria above, noting your reasoning for including or excluding each term
+3. Create a running list of accepted terms, preserving their exact formatting and capitalization
+4. Check for and eliminate any duplicates from your accepted terms list
+5. Verify that your final list is sorted alphabetically while maintaining exact formatting
+
+## Output Format
+
+Provide your final answer as a JSON object with this exact structure:
+
+```json
+{
+  "biological_terms": [
+    "first_term_exactly_as_appears",
+    "second_term_exactly_as_appears",
+    "third_term_exactly_as_appears"
+  ],
+  "total_count": number_of_unique_terms
+}
+```
+
+The biological_terms array should:
+- Be sorted alphabetically
+- Preserve exact capitalization, spelling, and formatting from the original transcript
+- Contain only unique terms
+
+Your final output should contain only the JSON object and should not duplicate or rehash any of the extraction work you did in the thinking block."""
+
+KEYWORDS = register("keywords", 2, KEYWORD_EXTRACTION_SYSTEM, "<transcript>\n{{TRANSCRIPT}}\n</transcript>")
+
+# Transcript cleaning (cleaning.py), for a whole transcript or one chunk of it
+FILTER_SYSTEM = """You will be cleaning and formatting a transcript about technical topics. The transcript to process is in the user message, inside <transcript> tags.
+
+Your task is to clean and format this transcript by applying the following filters and improvements:
+
+**Content Cleaning Rules:**
+- Remove all filler words such as "um," "uh," "like," "you know," "so," "well," "actually," and similar verbal hesitations
+- Fix grammatical errors and improve sentence structure for clarity
+- Correct run-on sentences by breaking them into shorter, more readable sentences
+- Fix subject-verb agreement and other grammatical issues
+
+**Technical Accuracy Requirements:**
+- Keep all technical terms, jargon, and specialized vocabulary exactly as intended
+- Preserve the meaning and technical accuracy of all statements
+- Do not change or simplify technical concepts
+
+**Formatting and Structure:**
+- Maintain any existing structural elements (numbered lists, sections, etc.)
+- Preserve the logical flow and organization of ideas
+- Standardize capitalization - avoid ALL CAPS for emphasis unless it's a technical acronym or absolutely necessary
+- Ensure consistent punctuation and formatting
+
+**Readability Improvements:**
+- Improve sentence flow and transitions between ideas
+- Ensure paragraphs are well-structured and coherent
+- Make the text more professional and polished while keeping the original meaning intact
+
+**Output Requirements:**
+- Present the cleaned transcript in a clear, professional format
+- Maintain the same overall structure and organization as the original
+- Ensure the final result reads smoothly while preserving all important information
+
+Provide your cleaned and formatted transcript inside <cleaned_transcript> tags."""
+
+# Added to the instructions when only part of a transcript is cleaned
+CHUNK_NOTE = """This is one consecutive part of a longer transcript, so it may start or end mid-thought. Clean only this part: do not add titles, summaries, introductions or closing remarks."""
+
+CLEAN = register("clean", 2, FILTER_SYSTEM, "<transcript>\n{{TRANSCRIPT}}\n</transcript>")
+CLEAN_CHUNK = register("clean_chunk", 2, FILTER_SYSTEM + "\n\n" + CHUNK_NOTE, "<transcript>\n{{TRANSCRIPT}}\n</transcript>")
+
+# Term explanations (explainer.py), for one term or several in one call
+EXPLAIN_SYSTEM = """You will be explaining a biological term in a clear, concise manner. The term you need to explain is in the user message, inside <biological_term> tags.
+
+Your task is to provide a brief explanation of this biological term that would be understandable to someone with a basic high school level understanding of biology. Your explanation should:
+
+- Be 2-4 sentences long
+- Define what the term means in clear, simple language
+- Include the key function or significance of the concept when relevant
+- Avoid unnecessary jargon, but include essential scientific terminology when needed
+- Be accurate and scientifically sound
+
+If the term has multiple meanings or applications in biology, focus on the most common or fundamental definition.
+
+Write your explanation inside <explanation> tags."""
+
+BATCH_EXPLAIN_SYSTEM = """You will be explaining several biological terms in a clear, concise manner. The terms you need to explain are in the user message, one per line, inside <biological_terms> tags.
+
+For each term, provide a brief explanation that would be understandable to someone with a basic high school level understanding of biology. Each explanation should:
+
+- Be 2-4 sentences long
+- Define what the term means in clear, simple language
+- Include the key function or significance of the concept when relevant
+- Avoid unnecessary jargon, but include essential scientific terminology when needed
+- Be accurate and scientifically sound
+
+If a term has multiple meanings or applications in biology, focus on the most common or fundamental definition. Explain each term independently of the others.
+
+## Output Format
+
+Provide your answer as a JSON object with this exact structure:
+
+```json
+{
+  "explanations": [
+    {"term": "first_term_exactly_as_given", "explanation": "..."},
+    {"term": "second_term_exactly_as_given", "explanation": "..."}
+  ]
+}
+```
+
+Include one entry for every term, copy each term exactly as it was given, and do not output anything besides the JSON object."""
+
+EXPLAIN = register("explain", 2, EXPLAIN_SYSTEM, "<biological_term>\n{{BIOLOGICAL_TERM}}\n</biological_term>")
+EXPLAIN_BATCH = register("explain_batch", 2, BATCH_EXPLAIN_SYSTEM, "<biological_terms>\n{{BIOLOGICAL_TERMS}}\n</biological_terms>")
@@ -0,0 +1,710 @@
+import os
+import json
+import time
+import heapq
+import random
+import asyncio
+import hashlib
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import Future
+
+import metrics
+
+# Per-model budgets, e.g. {"claude-sonnet-4-5-20250929": {"rpm": 50, "itpm": 30000, "otpm": 8000}}.
+# Models without an entry are only bounded by SCHEDULER_MAX_CONCURRENCY.
+SCHEDULER_LIMITS = json.loads(os.environ.get("SCHEDULER_LIMITS", "{}"))
+SCHEDULER_MAX_CONCURRENCY = int(os.environ.get("SCHEDULER_MAX_CONCURRENCY", "16"))  # in-flight calls per model
+SCHEDULER_MAX_QUEUE = int(os.environ.get("SCHEDULER_MAX_QUEUE", "512"))  # waiting calls per model
+SCHEDULER_MAX_WAIT = float(os.environ.get("SCHEDULER_MAX_WAIT", "300"))  # seconds a call may wait, 429s included
+SCHEDULER_BACKOFF_MAX = float(os.environ.get("SCHEDULER_BACKOFF_MAX", "30"))
+
+# Lower value is admitted first
+LANES = {"interactive": 0, "batch": 1}
+
+# Statuses that mean "slow down" rather than "this request failed"
+RATE_LIMIT_STATUSES = (429, 529)
+RETRY_STATUSES = (408, 409, 500, 502, 503, 504)
+
+_lane = contextvars.ContextVar("scheduler_lane", default="interactive")
+
+
+class SchedulerBusy(Exception):
+    """Raised when a call cannot be queued, or waited longer than SCHEDULER_MAX_WAIT"""
+
+
+@contextmanager
+def lane(name):
+    """Run the calls made inside the block in the given priority lane"""
+    if name not in LANES:
+        raise ValueError(f"Unknown lane '{name}'. Supported: {', '.join(LANES)}")
+    token = _lane.set(name)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane():
+    return _lane.get()
+
+
+def carry_lane(fn):
+    """
+    Wrap fn so it runs in the caller's lane when called from a worker thread.
+    The caller's other context variables (such as the request's stage timings)
+    are carried along too; each call runs in its own copy of that context.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+class TokenBucket:
+    """
+    Budget that refills `per_minute` units per minute, up to `per_minute`.
+    A cost larger than the whole budget is admitted once the bucket is full
+    and leaves it in debt, so oversized calls are slowed down, never blocked.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, cost, now):
+        """Seconds until `cost` can be taken (0 if it can be taken now)"""
+        self._refill(now)
+        needed = min(cost, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) * 60 / self.capacity
+
+    def take(self, cost):
+        self.level -= cost
+
+    def give(self, amount):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class ModelLimiter:
+    """
+    Admission control for one model: request and token budgets, a cap on
+    in-flight calls and a priority queue of waiting calls. Calls are admitted
+    strictly in (lane, arrival) order; a 429 pauses admission for the model.
+    """
+
+    def __init__(self, model, rpm=None, itpm=None, otpm=None,
+                 max_concurrency=SCHEDULER_MAX_CONCURRENCY, max_queue=SCHEDULER_MAX_QUEUE):
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self._buckets = {
+            name: TokenBucket(limit)
+            for name, limit in (("requests", rpm), ("input_tokens", itpm), ("output_tokens", otpm))
+            if limit
+        }
+        self._cond = threading.Condition()
+        self._async_waiters = set()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.retried = 0
+
+    def _wait_time(self, cost, now):
+        wait = max(0.0, self._paused_until - now)
+        for name, bucket in self._buckets.items():
+            wait = max(wait, bucket.wait_time(cost.get(name, 0), now))
+        return wait
+
+    def _notify(self):
+        """Wake every waiting call, threads and coroutines alike (lock held)"""
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def _enqueue(self, lane_name, front):
+        """Add a waiting call to the queue (lock held). Returns its queue entry."""
+        if len(self._waiting) >= self.max_queue:
+            raise SchedulerBusy(f"Too many queued calls for {self.model}")
+        seq = next(self._seq)
+        entry = (LANES.get(lane_name, 0), -seq if front else seq)
+        heapq.heappush(self._waiting, entry)
+        return entry
+
+    def _dequeue(self, entry):
+        """Drop a call that gave up waiting (lock held)"""
+        if entry in self._waiting:
+            self._waiting.remove(entry)
+            heapq.heapify(self._waiting)
+        self._notify()
+
+    def _try_admit(self, entry, cost, deadline):
+        """
+        Admit the call if it is next and the budgets allow (lock held).
+        Returns None once admitted, else the seconds to wait before checking again.
+        """
+        now = time.monotonic()
+        remaining = deadline - now
+        wait = None
+        if self._waiting[0] == entry and self._in_flight < self.max_concurrency:
+            wait = self._wait_time(cost, now)
+            if wait == 0:
+                heapq.heappop(self._waiting)
+                for name, bucket in self._buckets.items():
+                    bucket.take(cost.get(name, 0))
+                self._in_flight += 1
+                self.admitted += 1
+                self._notify()
+                return None
+        if remaining <= 0:
+            raise SchedulerBusy(f"Timed out waiting for capacity on {self.model}")
+        return remaining if wait is None else min(remaining, wait)
+
+    def acquire(self, cost, lane_name, deadline, front=False):
+        """
+        Block until the call may start, then charge its estimated cost.
+        `front` puts a retried call ahead of others in its lane.
+        Raises SchedulerBusy if the queue is full or the deadline passes.
+        """
+        with self._cond:
+            entry = self._enqueue(lane_name, front)
+            try:
+                while True:
+                    wait = self._try_admit(entry, cost, deadline)
+                    if wait is None:
+                        return
+                    self._cond.wait(wait)
+            except BaseException:
+                self._dequeue(entry)
+                raise
+
+    async def acquire_async(self, cost, lane_name, deadline, front=False):
+        """Like acquire(), but waits without holding a thread"""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            entry = self._enqueue(lane_name, front)
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                # Cleared before checking, so a release after the check still wakes us
+                waiter[1].clear()
+                with self._cond:
+                    wait = self._try_admit(entry, cost, deadline)
+                if wait is None:
+                    return
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._cond:
+                self._dequeue(entry)
+            raise
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+
+    def release(self, cost, usage=None):
+        """Finish a call; with actual token usage, correct the estimate charged at admission"""
+        with self._cond:
+            self._in_flight -= 1
+            if usage:
+                for name, actual in usage.items():
+                    bucket = self._buckets.get(name)
+                    if bucket is not None and actual is not None:
+                        bucket.give(cost.get(name, 0) - actual)
+            self._notify()
+
+    def pause(self, seconds):
+        """Stop admitting calls for `seconds` after the upstream asked us to slow down"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.rate_limited += 1
+            self._notify()
+
+    def stats(self):
+        with self._cond:
+            queued = {name: 0 for name in LANES}
+            for priority, _ in self._waiting:
+                for name, value in LANES.items():
+                    if value == priority:
+                        queued[name] += 1
+            return {
+                "queued": queued,
+                "in_flight": self._in_flight,
+                "admitted": self.admitted,
+                "rate_limited": self.rate_limited,
+                "retried": self.retried,
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 3),
+                "budgets": {name: round(bucket.level, 1) for name, bucket in self._buckets.items()}
+            }
+
+
+def retry_after(error):
+    """Seconds the upstream asked us to wait, from Retry-After headers, or None"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def outcome(error):
+    """Metrics label for a failed upstream call"""
+    return "rate_limited" if getattr(error, "status_code", None) in RATE_LIMIT_STATUSES else "error"
+
+
+def backoff(attempt):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(SCHEDULER_BACKOFF_MAX, 0.5 * 2 ** attempt))
+
+
+class Scheduler:
+    """
+    Shared front door for upstream API calls.
+
+    Identical calls already in flight are coalesced into one, calls are admitted
+    per model within request/token budgets with interactive work ahead of batch
+    work, and rate-limited calls are queued again instead of failing.
+    """
+
+    def __init__(self, limits=SCHEDULER_LIMITS, max_concurrency=SCHEDULER_MAX_CONCURRENCY,
+                 max_queue=SCHEDULER_MAX_QUEUE, max_wait=SCHEDULER_MAX_WAIT):
+        self.limits = limits
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._limiters = {}
+        self._inflight = {}
+        self._inflight_async = {}
+        self.coalesced = 0
+
+    def limiter(self, model):
+        with self._lock:
+            limiter = self._limiters.get(model)
+            if limiter is None:
+                limits = self.limits.get(model, {})
+                limiter = ModelLimiter(
+                    model,
+                    rpm=limits.get("rpm"),
+                    itpm=limits.get("itpm"),
+                    otpm=limits.get("otpm"),
+                    max_concurrency=limits.get("max_concurrency", self.max_concurrency),
+                    max_queue=self.max_queue
+                )
+                self._limiters[model] = limiter
+            return limiter
+
+    def retry_delay(self, limiter, error, attempt, max_retries, retry_on=()):
+        """
+        Decide whether a failed call is queued again.
+        Rate limits pause the model and are retried until the call's deadline;
+        other transient errors are retried up to max_retries times.
+        Returns the seconds to back off before queueing again, or None to give up.
+        """
+        status = getattr(error, "status_code", None)
+        if status in RATE_LIMIT_STATUSES:
+            limiter.pause(retry_after(error) or backoff(attempt))
+            return 0.0
+        if attempt < max_retries and (status in RETRY_STATUSES or (status is None and isinstance(error, retry_on))):
+            return retry_after(error) or backoff(attempt)
+        return None
+
+    def should_retry(self, limiter, error, attempt, max_retries, retry_on=()):
+        """Like retry_delay(), sleeping through the backoff. Returns True to retry."""
+        delay = self.retry_delay(limiter, error, attempt, max_retries, retry_on)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
+
+    def run(self, model, fn, cost, max_retries=0, retry_on=(), usage=None):
+        """
+        Call fn() once the model has capacity, retrying rate limits and transient errors.
+        `cost` is the estimated {'requests', 'input_tokens', 'output_tokens'};
+        `usage(result)` returns the actual token counts, if known.
+        """
+        limiter = self.limiter(model)
+        lane_name = current_lane()
+        deadline = time.monotonic() + self.max_wait
+        attempt = 0
+        while True:
+            limiter.acquire(cost, lane_name, deadline, front=attempt > 0)
+            start = time.perf_counter()
+            try:
+                result = fn()
+            except Exception as e:
+                limiter.release(cost)
+                metrics.record_upstream(model, outcome(e), time.perf_counter() - start)
+                if not self.should_retry(limiter, e, attempt, max_retries, retry_on):
+                    raise
+                attempt += 1
+                limiter.retried += 1
+                continue
+            actual = usage(result) if usage else None
+            limiter.release(cost, actual)
+            metrics.record_upstream(model, "ok", time.perf_counter() - start, actual)
+            return result
+
+    async def run_async(self, model, fn, cost, max_retries=0, retry_on=(), usage=None):
+        """Like run(), for a coroutine function fn"""
+        limiter = self.limiter(model)
+        lane_name = current_lane()
+        deadline = time.monotonic() + self.max_wait
+        attempt = 0
+        while True:
+            await limiter.acquire_async(cost, lane_name, deadline, front=attempt > 0)
+            start = time.perf_counter()
+            try:
+                result = await fn()
+            except Exception as e:
+                limiter.release(cost)
+                metrics.record_upstream(model, outcome(e), time.perf_counter() - start)
+                delay = self.retry_delay(limiter, e, attempt, max_retries, retry_on)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                limiter.retried += 1
+                continue
+            actual = usage(result) if usage else None
+            limiter.release(cost, actual)
+            metrics.record_upstream(model, "ok", time.perf_counter() - start, actual)
+            return result
+
+    def call(self, key, model, fn, cost, **options):
+        """
+        Like run(), but callers passing the same key while a call is in flight
+        share its result instead of making their own.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = self.run(model, fn, cost, **options)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def call_async(self, key, model, fn, cost, **options):
+        """Like call(), for a coroutine function fn; coalesces calls made on the same event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._inflight_async.get((loop, key))
+            owner = future is None
+            if owner:
+                future = loop.create_future()
+                self._inflight_async[(loop, key)] = future
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return await asyncio.shield(future)
+
+        try:
+            result = await self.run_async(model, fn, cost, **options)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting on the shared future; don't warn about it
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._inflight_async.pop((loop, key), None)
+
+    def stats(self):
+        with self._lock:
+            limiters = dict(self._limiters)
+            coalesced = self.coalesced
+        return {
+            "coalesced": coalesced,
+            "models": {model: limiter.stats() for model, limiter in limiters.items()}
+        }
+
+
+def request_key(kwargs):
+    """Stable hash of a call's arguments, used to coalesce identical calls"""
+    return hashlib.sha256(json.dumps(kwargs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def estimate_input_tokens(kwargs):
+    """Rough input token count of a Messages API call (about 4 characters per token)"""
+    chars = len(json.dumps(kwargs.get("system", ""), default=str))
+    for message in kwargs.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, str):
+            chars += len(content)
+        else:
+            chars += sum(len(block.get("text", "")) for block in content if isinstance(block, dict))
+    return chars // 4 + 1
+
+
+def _message_cost(kwargs):
+    return {
+        "requests": 1,
+        "input_tokens": estimate_input_tokens(kwargs),
+        "output_tokens": kwargs.get("max_tokens", 0)
+    }
+
+
+def _message_usage(message):
+    usage = getattr(message, "usage", None)
+    if usage is None:
+        return None
+    return {
+        "input_tokens": getattr(usage, "input_tokens", None),
+        "output_tokens": getattr(usage, "output_tokens", None),
+        "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None),
+        "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None)
+    }
+
+
+class _ScheduledStream:
+    """Context manager for messages.stream() that holds an admission slot while the stream is open"""
+
+    def __init__(self, scheduler, messages, kwargs, max_retries, retry_on):
+        self._scheduler = scheduler
+        self._messages = messages
+        self._kwargs = kwargs
+        self._max_retries = max_retries
+        self._retry_on = retry_on
+        self._cost = _message_cost(kwargs)
+        self._limiter = scheduler.limiter(kwargs.get("model"))
+        self._manager = None
+        self._stream = None
+        self._start = None
+
+    def __enter__(self):
+        lane_name = current_lane()
+        deadline = time.monotonic() + self._scheduler.max_wait
+        attempt = 0
+        while True:
+            self._limiter.acquire(self._cost, lane_name, deadline, front=attempt > 0)
+            self._start = time.perf_counter()
+            try:
+                self._manager = self._messages.stream(**self._kwargs)
+                self._stream = self._manager.__enter__()
+                return self._stream
+            except Exception as e:
+                self._limiter.release(self._cost)
+                metrics.record_upstream(self._limiter.model, outcome(e), time.perf_counter() - self._start)
+                if not self._scheduler.should_retry(self._limiter, e, attempt, self._max_retries, self._retry_on):
+                    raise
+                attempt += 1
+                self._limiter.retried += 1
+
+    def __exit__(self, *exc_info):
+        try:
+            return self._manager.__exit__(*exc_info)
+        finally:
+            snapshot = getattr(self._stream, "current_message_snapshot", None)
+            usage = _message_usage(snapshot)
+            self._limiter.release(self._cost, usage)
+            result = "ok" if exc_info[1] is None else outcome(exc_info[1])
+            metrics.record_upstream(self._limiter.model, result, time.perf_counter() - self._start, usage)
+
+
+class _ScheduledMessages:
+    def __init__(self, scheduler, messages, max_retries, retry_on):
+        self._scheduler = scheduler
+        self._messages = messages
+        self._max_retries = max_retries
+        self._retry_on = retry_on
+
+    def create(self, **kwargs):
+        options = {"max_retries": self._max_retries, "retry_on": self._retry_on, "usage": _message_usage}
+        call = lambda: self._messages.create(**kwargs)
+        if kwargs.get("stream"):
+            return self._scheduler.run(kwargs.get("model"), call, _message_cost(kwargs), **options)
+        return self._scheduler.call(
+            request_key(kwargs), kwargs.get("model"), call, _message_cost(kwargs), **options
+        )
+
+    def stream(self, **kwargs):
+        return _ScheduledStream(self._scheduler, self._messages, kwargs, self._max_retries, self._retry_on)
+
+    def __getattr__(self, name):
+        return getattr(self._messages, name)
+
+
+class ScheduledAnthropic:
+    """Anthropic client whose messages.create/stream calls go through a Scheduler"""
+
+    def __init__(self, client, scheduler, max_retries=0, retry_on=()):
+        self._client = client
+        self.messages = _ScheduledMessages(scheduler, client.messages, max_retries, retry_on)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def _rewind(file):
+    """Seek an upload back to the start so a retried call sends it again"""
+    stream = file[1] if isinstance(file, tuple) else file
+    if hasattr(stream, "seek"):
+        stream.seek(0)
+
+
+class _ScheduledTranscriptions:
+    def __init__(self, scheduler, transcriptions, max_retries, retry_on):
+        self._scheduler = scheduler
+        self._transcriptions = transcriptions
+        self._max_retries = max_retries
+        self._retry_on = retry_on
+
+    def create(self, **kwargs):
+        def call():
+            _rewind(kwargs.get("file"))
+            return self._transcriptions.create(**kwargs)
+        return self._scheduler.run(
+            kwargs.get("model"), call, {"requests": 1},
+            max_retries=self._max_retries, retry_on=self._retry_on
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._transcriptions, name)
+
+
+class _ScheduledAudio:
+    def __init__(self, scheduler, audio, max_retries, retry_on):
+        self._audio = audio
+        self.transcriptions = _ScheduledTranscriptions(scheduler, audio.transcriptions, max_retries, retry_on)
+
+    def __getattr__(self, name):
+        return getattr(self._audio, name)
+
+
+class ScheduledOpenAI:
+    """OpenAI client whose audio.transcriptions.create calls go through a Scheduler"""
+
+    def __init__(self, client, scheduler, max_retries=0, retry_on=()):
+        self._client = client
+        self.audio = _ScheduledAudio(scheduler, client.audio, max_retries, retry_on)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class _ScheduledAsyncMessages:
+    def __init__(self, scheduler, messages, max_retries, retry_on):
+        self._scheduler = scheduler
+        self._messages = messages
+        self._max_retries = max_retries
+        self._retry_on = retry_on
+
+    async def create(self, **kwargs):
+        options = {"max_retries": self._max_retries, "retry_on": self._retry_on, "usage": _message_usage}
+        call = lambda: self._messages.create(**kwargs)
+        if kwargs.get("stream"):
+            return await self._scheduler.run_async(kwargs.get("model"), call, _message_cost(kwargs), **options)
+        return await self._scheduler.call_async(
+            request_key(kwargs), kwargs.get("model"), call, _message_cost(kwargs), **options
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._messages, name)
+
+
+class ScheduledAsyncAnthropic:
+    """AsyncAnthropic client whose messages.create calls go through a Scheduler"""
+
+    def __init__(self, client, scheduler, max_retries=0, retry_on=()):
+        self._client = client
+        self.messages = _ScheduledAsyncMessages(scheduler, client.messages, max_retries, retry_on)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class _ScheduledAsyncTranscriptions:
+    def __init__(self, scheduler, transcriptions, max_retries, retry_on):
+        self._scheduler = scheduler
+        self._transcriptions = transcriptions
+        self._max_retries = max_retries
+        self._retry_on = retry_on
+
+    async def create(self, **kwargs):
+        def call():
+            _rewind(kwargs.get("file"))
+            return self._transcriptions.create(**kwargs)
+        return await self._scheduler.run_async(
+            kwargs.get("model"), call, {"requests": 1},
+            max_retries=self._max_retries, retry_on=self._retry_on
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._transcriptions, name)
+
+
+class _ScheduledAsyncAudio:
+    def __init__(self, scheduler, audio, max_retries, retry_on):
+        self._audio = audio
+        self.transcriptions = _ScheduledAsyncTranscriptions(scheduler, audio.transcriptions, max_retries, retry_on)
+
+    def __getattr__(self, name):
+        return getattr(self._audio, name)
+
+
+class ScheduledAsyncOpenAI:
+    """AsyncOpenAI client whose audio.transcriptions.create calls go through a Scheduler"""
+
+    def __init__(self, client, scheduler, max_retries=0, retry_on=()):
+        self._client = client
+        self.audio = _ScheduledAsyncAudio(scheduler, client.audio, max_retries, retry_on)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+# Process-wide scheduler shared by every client
+default_scheduler = Scheduler()
+
+
+metrics.registry.define("upstream_in_flight", "gauge", "Upstream calls in flight, by model")
+metrics.registry.define("upstream_queued", "gauge", "Upstream calls waiting for capacity, by model and lane")
+metrics.registry.define("upstream_coalesced_total", "counter", "Upstream calls answered by an identical call already in flight")
+
+
+@metrics.registry.collect
+def _scheduler_gauges():
+    """Queue depth and in-flight calls of the default scheduler, read at scrape time"""
+    stats = default_scheduler.stats()
+    for model, limiter in stats["models"].items():
+        yield "upstream_in_flight", {"model": model}, limiter["in_flight"]
+        for lane_name, queued in limiter["queued"].items():
+            yield "upstream_queued", {"model": model, "lane": lane_name}, queued
+    yield "upstream_coalesced_total", {}, stats["coalesced"]
+
@@ -0,0 +1,181 @@
+import os
+import time
+import uuid
+import threading
+
+from term_cache import normalize_term
+
+# Live session settings
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", "3600"))  # idle time before a session expires
+SESSION_CONTEXT_CHARS = int(os.environ.get("SESSION_CONTEXT_CHARS", "200"))  # previous text sent along with each chunk
+SESSION_MAX_PENDING = int(os.environ.get("SESSION_MAX_PENDING", "32"))  # chunks buffered while an earlier one is missing
+
+
+class ChunkOrderError(ValueError):
+    """Raised for a chunk sequence number that was already received or is too far ahead"""
+
+
+class LiveSession:
+    """
+    Transcript and term state for one live recording session.
+
+    Chunks carry a client sequence number and are appended strictly in order:
+    a chunk that arrives before an earlier one is buffered until the gap is
+    filled. `lock` guards the session state only; transcription, extraction and
+    explanation run outside it. Keyword extraction only sees the new text plus
+    a short overlap from the previous chunk, and `seen` records every term
+    already reported so each one is explained once; terms whose explanation
+    fails are forgotten so a later chunk reports them again.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.lock = threading.Lock()
+        self.chunks = []
+        self.pending = {}
+        self.receiving = set()
+        self.transcript = ""
+        self.elapsed = 0.0
+        self.seen = {}
+        self.explanations = {}
+        self.closed = False
+
+    def context(self):
+        """Return the tail of the transcript to prepend to the next chunk, cut at a word boundary"""
+        if len(self.transcript) <= SESSION_CONTEXT_CHARS:
+            return self.transcript
+        tail = self.transcript[-SESSION_CONTEXT_CHARS:]
+        space = tail.find(" ")
+        return tail[space + 1:] if space != -1 else tail
+
+    def reserve(self, seq):
+        """
+        Claim chunk `seq` before it is transcribed (lock held), so duplicates and
+        chunks too far ahead are rejected before any paid call.
+        Raises ChunkOrderError; release() gives the claim up if transcription fails.
+        """
+        if seq < len(self.chunks) or seq in self.pending or seq in self.receiving:
+            raise ChunkOrderError(f"Chunk {seq} was already received")
+        if seq - len(self.chunks) > SESSION_MAX_PENDING:
+            raise ChunkOrderError(f"Chunk {seq} is more than {SESSION_MAX_PENDING} chunks ahead of chunk {len(self.chunks)}")
+        self.receiving.add(seq)
+
+    def release(self, seq):
+        """Drop the claim on a chunk that could not be transcribed, so it can be sent again (lock held)"""
+        self.receiving.discard(seq)
+
+    def add(self, seq, text, duration=None):
+        """
+        Receive chunk `seq` (lock held) and append every chunk that is now in order.
+        Returns a list of (context, chunk) pairs for the chunks appended, which is
+        empty when this one is buffered behind a missing earlier chunk.
+        """
+        if seq not in self.receiving:
+            self.reserve(seq)
+        self.receiving.discard(seq)
+
+        self.pending[seq] = (text, duration)
+        appended = []
+        while len(self.chunks) in self.pending:
+            context = self.context()
+            appended.append((context, self.append(*self.pending.pop(len(self.chunks)))))
+        self.updated_at = time.time()
+        return appended
+
+    def append(self, text, duration=None):
+        """Record a transcribed chunk. Returns the chunk dict."""
+        text = text.strip()
+        chunk = {
+            "index": len(self.chunks),
+            "start": round(self.elapsed, 3),
+            "end": round(self.elapsed + duration, 3) if duration is not None else None,
+            "text": text
+        }
+        self.chunks.append(chunk)
+        if text:
+            self.transcript = f"{self.transcript} {text}".strip()
+        if duration is not None:
+            self.elapsed += duration
+        self.updated_at = time.time()
+        return chunk
+
+    def new_terms(self, terms):
+        """Return the terms not reported earlier in this session and mark them as seen"""
+        fresh = []
+        for term in terms:
+            key = normalize_term(term)
+            if key and key not in self.seen:
+                self.seen[key] = term
+                fresh.append(term)
+        return fresh
+
+    def forget_terms(self, terms):
+        """Unmark terms whose explanation failed, so a later chunk reports them again"""
+        for term in terms:
+            self.seen.pop(normalize_term(term), None)
+
+    def to_dict(self):
+        return {
+            "session_id": self.id,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "closed": self.closed,
+            "transcript": self.transcript,
+            "chunks": list(self.chunks),
+            "pending": sorted(self.pending),
+            "terms": list(self.seen.values()),
+            "explanations": dict(self.explanations)
+        }
+
+
+class SessionManager:
+    """
+    Registry of live sessions; sessions idle for longer than `ttl` are dropped.
+    `on_end(session)` is called once for every session that is closed or expires.
+    """
+
+    def __init__(self, ttl=SESSION_TTL_SECONDS, on_end=None):
+        self.ttl = ttl
+        self.on_end = on_end
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self):
+        session = LiveSession()
+        with self._lock:
+            expired = self._prune()
+            self._sessions[session.id] = session
+        self._end(expired)
+        return session
+
+    def get(self, session_id):
+        """Return an open session, or None if it is unknown, closed or expired"""
+        with self._lock:
+            expired = self._prune()
+            session = self._sessions.get(session_id)
+        self._end(expired)
+        return session
+
+    def close(self, session_id):
+        """Close and remove a session. Returns it, or None if it is unknown."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session:
+            with session.lock:
+                session.closed = True
+            self._end([session])
+        return session
+
+    def _prune(self):
+        """Remove expired sessions and return them"""
+        cutoff = time.time() - self.ttl
+        return [self._sessions.pop(s.id) for s in list(self._sessions.values()) if s.updated_at < cutoff]
+
+    def _end(self, ended):
+        if self.on_end is None:
+            return
+        for session in ended:
+            with session.lock:
+                self.on_end(session)
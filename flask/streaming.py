@@ -0,0 +1,95 @@
+import json
+import queue
+import threading
+
+_DONE = object()
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def iter_tag_content(chunks, tag):
+    """
+    Yield the text inside <tag>...</tag> from a stream of text chunks as it arrives.
+    Text before the opening tag is dropped and output stops at the closing tag.
+    If the opening tag never appears, the whole response is yielded at the end.
+    """
+    open_tag, close_tag = f"<{tag}>", f"</{tag}>"
+    buffer = ""
+    inside = False
+    started = False
+
+    for chunk in chunks:
+        buffer += chunk
+
+        if not inside:
+            index = buffer.find(open_tag)
+            if index == -1:
+                continue
+            buffer = buffer[index + len(open_tag):]
+            inside = True
+
+        index = buffer.find(close_tag)
+        if index != -1:
+            text = buffer[:index] if started else buffer[:index].lstrip()
+            if text.rstrip():
+                yield text.rstrip()
+            return
+
+        # Hold back enough characters to recognise a closing tag split across chunks
+        safe = len(buffer) - (len(close_tag) - 1)
+        if safe > 0:
+            text = buffer[:safe] if started else buffer[:safe].lstrip()
+            buffer = buffer[safe:]
+            if text:
+                started = True
+                yield text
+
+    if inside:
+        text = buffer if started else buffer.lstrip()
+        if text.rstrip():
+            yield text.rstrip()
+    elif buffer.strip():
+        yield buffer.strip()
+
+
+class EventChannel:
+    """
+    Merges events from several producer threads into one iterator.
+
+    Each producer is called as fn(emit, *args) and may call emit(event, data)
+    any number of times. An exception in a producer is emitted as an 'error'
+    event. Iteration ends once every producer has returned.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._producers = 0
+
+    def emit(self, event, data):
+        self._queue.put((event, data))
+
+    def start(self, stage, fn, *args):
+        """Run a producer in a background thread"""
+        self._producers += 1
+
+        def run():
+            try:
+                fn(self.emit, *args)
+            except Exception as e:
+                self.emit("error", {"stage": stage, "error": str(e)})
+            finally:
+                self._queue.put(_DONE)
+
+        threading.Thread(target=run, name=f"stream-{stage}", daemon=True).start()
+
+    def __iter__(self):
+        remaining = self._producers
+        while remaining:
+            item = self._queue.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            yield item
@@ -0,0 +1,232 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import metrics
+
+# Cache locations and limits
+CACHE_DIR = os.environ.get(
+    "CLARIFY_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+)
+EXPLANATION_DB = os.path.join(CACHE_DIR, 'explanations.sqlite3')
+SEED_GLOSSARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'glossary', 'seed_terms.txt')
+EXPLANATION_LRU_SIZE = int(os.environ.get("EXPLAIN_LRU_SIZE", "4096"))
+EXPLANATION_TTL = int(os.environ.get("EXPLAIN_CACHE_TTL", str(30 * 24 * 3600)))  # 30 days
+EXPLANATION_MAX_ENTRIES = int(os.environ.get("EXPLAIN_CACHE_MAX_ENTRIES", "100000"))
+# Eviction runs after this many rows are written or this many seconds, whichever comes first
+EXPLANATION_EVICT_EVERY = int(os.environ.get("EXPLAIN_CACHE_EVICT_EVERY", "1000"))
+EXPLANATION_EVICT_INTERVAL = float(os.environ.get("EXPLAIN_CACHE_EVICT_INTERVAL", "600"))
+
+
+def normalize_term(term):
+    """Normalize a term for cache lookups (case and whitespace insensitive)"""
+    return " ".join(term.split()).casefold()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache"""
+
+    def __init__(self, capacity=EXPLANATION_LRU_SIZE):
+        self.capacity = capacity
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ExplanationStore:
+    """
+    On-disk SQLite store for explanations, keyed by normalized term,
+    prompt version and model. Entries expire after `ttl` seconds and the
+    least recently used rows are evicted beyond `max_entries`. Eviction runs
+    from put_many() once `evict_every` rows were written or `evict_interval`
+    seconds passed since the last run, so the store may briefly hold a few
+    rows over the cap.
+    """
+
+    def __init__(self, path=EXPLANATION_DB, ttl=EXPLANATION_TTL, max_entries=EXPLANATION_MAX_ENTRIES,
+                 evict_every=EXPLANATION_EVICT_EVERY, evict_interval=EXPLANATION_EVICT_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.evict_interval = evict_interval
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._evict_lock = threading.Lock()
+        self._written = 0
+        self._evicted_at = float("-inf")
+
+    def _connect(self):
+        """Return this thread's connection, creating the schema on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        with self._init_lock:
+            if not self._initialized:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._init_lock:
+            if not self._initialized:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS explanations (
+                        term TEXT NOT NULL,
+                        prompt_version TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        explanation TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL,
+                        PRIMARY KEY (term, prompt_version, model)
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_explanations_accessed ON explanations (accessed_at)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_explanations_created ON explanations (created_at)")
+                conn.commit()
+                self._initialized = True
+
+        self._local.conn = conn
+        return conn
+
+    def get_many(self, keys, prompt_version, model):
+        """Look up normalized terms. Returns dict of key -> explanation for fresh hits."""
+        if not keys:
+            return {}
+
+        conn = self._connect()
+        now = time.time()
+        found = {}
+        keys = list(keys)
+
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT term, explanation FROM explanations "
+                f"WHERE prompt_version = ? AND model = ? AND created_at >= ? AND term IN ({placeholders})",
+                [prompt_version, model, now - self.ttl, *chunk]
+            ).fetchall()
+            found.update(rows)
+
+        if found:
+            conn.executemany(
+                "UPDATE explanations SET accessed_at = ? WHERE term = ? AND prompt_version = ? AND model = ?",
+                [(now, key, prompt_version, model) for key in found]
+            )
+            conn.commit()
+        return found
+
+    def put_many(self, items, prompt_version, model):
+        """Store a dict of normalized term -> explanation"""
+        if not items:
+            return
+
+        conn = self._connect()
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO explanations (term, prompt_version, model, explanation, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(key, prompt_version, model, explanation, now, now) for key, explanation in items.items()]
+        )
+        conn.commit()
+
+        # Evict on a row threshold or interval rather than on every write
+        with self._evict_lock:
+            self._written += len(items)
+            due = self._written >= self.evict_every or time.monotonic() - self._evicted_at >= self.evict_interval
+            if due:
+                self._written = 0
+                self._evicted_at = time.monotonic()
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop expired rows, then the least recently used rows beyond max_entries"""
+        conn = self._connect()
+        conn.execute("DELETE FROM explanations WHERE created_at < ?", (time.time() - self.ttl,))
+
+        (count,) = conn.execute("SELECT COUNT(*) FROM explanations").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM explanations WHERE rowid IN "
+                "(SELECT rowid FROM explanations ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        conn.commit()
+
+
+class TieredCache:
+    """In-process LRU in front of the on-disk explanation store"""
+
+    def __init__(self, lru=None, store=None):
+        self.lru = lru if lru is not None else LRUCache()
+        self.store = store if store is not None else ExplanationStore()
+
+    def get_many(self, terms, prompt_version, model):
+        """
+        Look up explanations for terms.
+        Returns dict of term -> explanation for the terms that were cached.
+        """
+        results = {}
+        missing = {}
+        for term in terms:
+            key = normalize_term(term)
+            explanation = self.lru.get((key, prompt_version, model))
+            if explanation is not None:
+                results[term] = explanation
+            else:
+                missing.setdefault(key, []).append(term)
+
+        memory_hits = len(results)
+        if missing:
+            found = self.store.get_many(missing.keys(), prompt_version, model)
+            for key, explanation in found.items():
+                self.lru.put((key, prompt_version, model), explanation)
+                for term in missing[key]:
+                    results[term] = explanation
+            metrics.cache_result("explanation_disk", hits=len(found), misses=len(missing) - len(found))
+        metrics.cache_result("explanation_memory", hits=memory_hits, misses=len(missing))
+        return results
+
+    def put_many(self, explanations, prompt_version, model):
+        """Store a dict of term -> explanation in both tiers"""
+        items = {}
+        for term, explanation in explanations.items():
+            key = normalize_term(term)
+            self.lru.put((key, prompt_version, model), explanation)
+            items[key] = explanation
+        self.store.put_many(items, prompt_version, model)
+
+
+def load_glossary(path):
+    """Read a glossary file with one term per line; blank lines and '#' comments are skipped"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
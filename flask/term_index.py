@@ -0,0 +1,286 @@
+import os
+import re
+import time
+import threading
+from collections import deque
+
+from term_cache import CACHE_DIR, SEED_GLOSSARY, load_glossary
+
+# Lexicon of known terms and the file that accumulates terms returned by the LLM
+TERM_LEXICON_PATH = os.environ.get("TERM_LEXICON_PATH", SEED_GLOSSARY)
+LEARNED_TERMS_PATH = os.path.join(CACHE_DIR, 'learned_terms.txt')
+
+# Inputs up to this length may skip the LLM when the lexicon covers every content word
+LEXICON_ONLY_MAX_CHARS = int(os.environ.get("LEXICON_ONLY_MAX_CHARS", "500"))
+
+# Learned terms are unvetted LLM output: at most this many are kept, and the
+# automaton over them is rebuilt at most once per interval (seconds)
+LEARNED_TERMS_MAX = int(os.environ.get("LEARNED_TERMS_MAX", "5000"))
+LEARNED_REBUILD_INTERVAL = float(os.environ.get("LEARNED_REBUILD_INTERVAL", "30"))
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Words that do not need to be covered by a lexicon match
+STOPWORDS = {
+    "a", "about", "after", "all", "also", "an", "and", "any", "are", "as", "at", "be", "been",
+    "before", "between", "both", "but", "by", "can", "could", "did", "do", "does", "during",
+    "each", "for", "from", "had", "has", "have", "he", "her", "his", "how", "i", "if", "in",
+    "into", "is", "it", "its", "more", "most", "my", "no", "not", "of", "on", "or", "our",
+    "she", "so", "some", "such", "than", "that", "the", "their", "them", "then", "there",
+    "these", "they", "this", "those", "through", "to", "under", "up", "us", "very", "was",
+    "we", "were", "what", "when", "where", "which", "while", "who", "why", "will", "with",
+    "would", "you", "your"
+}
+
+
+def _fold(text):
+    """Lowercase text one character at a time so offsets in the folded text match the original"""
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def _is_word_char(c):
+    return c.isalnum() or c == "_"
+
+
+class AhoCorasick:
+    """
+    Case-insensitive Aho-Corasick automaton over a set of terms.
+    Scans text in a single pass and reports whole-word matches only.
+    """
+
+    def __init__(self, terms):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for term in terms:
+            self._add(_fold(term))
+        self._build()
+
+    def _add(self, key):
+        if not key:
+            return
+        state = 0
+        for c in key:
+            nxt = self._goto[state].get(c)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][c] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        if key not in self._out[state]:
+            self._out[state].append(key)
+
+    def _build(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and c not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(c, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text):
+        """Yield (start, end, key) for every whole-word match in text, key being the folded term"""
+        folded = _fold(text)
+        state = 0
+        for i, c in enumerate(folded):
+            while state and c not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(c, 0)
+            for key in self._out[state]:
+                start, end = i + 1 - len(key), i + 1
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(key[0]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]) and _is_word_char(key[-1]):
+                    continue
+                yield start, end, key
+
+
+def leftmost_longest(matches):
+    """Reduce overlapping matches to non-overlapping ones, preferring earlier then longer"""
+    selected = []
+    last_end = -1
+    for start, end, key in sorted(matches, key=lambda m: (m[0], -(m[1] - m[0]))):
+        if start >= last_end:
+            selected.append((start, end, key))
+            last_end = end
+    return selected
+
+
+def keyword_records(offsets):
+    """
+    Build keyword entries from a dict of term -> offset ranges.
+    Scores are occurrence counts relative to the most frequent term.
+    """
+    top = max((len(ranges) for ranges in offsets.values()), default=0) or 1
+    return [
+        {
+            "term": term,
+            "score": round(len(ranges) / top, 3),
+            "count": len(ranges),
+            "offsetRanges": ranges
+        }
+        for term, ranges in offsets.items()
+    ]
+
+
+class TermIndex:
+    """
+    Local index of known biological terms: a loadable lexicon plus up to
+    LEARNED_TERMS_MAX terms the LLM has returned before. Each has its own
+    automaton, so learning a term never rebuilds the lexicon's. Terms added at
+    runtime are appended to the learned-terms file; the learned automaton is
+    rebuilt outside the lock at most every LEARNED_REBUILD_INTERVAL seconds,
+    and scans in between use the previous build.
+    """
+
+    def __init__(self, lexicon_path=TERM_LEXICON_PATH, learned_path=LEARNED_TERMS_PATH,
+                 learned_max=LEARNED_TERMS_MAX, rebuild_interval=LEARNED_REBUILD_INTERVAL):
+        self.lexicon_path = lexicon_path
+        self.learned_path = learned_path
+        self.learned_max = learned_max
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self._lexicon = None
+        self._learned = None
+        self._lexicon_automaton = None
+        self._learned_automaton = None
+        self._learned_stale = False
+        self._learned_built_at = float("-inf")
+        self._rebuilding = False
+
+    def _load(self):
+        """Load lexicon and learned terms on first use (lock held)"""
+        if self._lexicon is not None:
+            return
+        self._lexicon = {}
+        self._learned = {}
+        if self.lexicon_path and os.path.exists(self.lexicon_path):
+            for term in load_glossary(self.lexicon_path):
+                self._lexicon.setdefault(_fold(term), term)
+        if self.learned_path and os.path.exists(self.learned_path):
+            for term in load_glossary(self.learned_path):
+                if len(self._learned) >= self.learned_max:
+                    break
+                if _fold(term) not in self._lexicon:
+                    self._learned.setdefault(_fold(term), term)
+        self._learned_stale = bool(self._learned)
+
+    def automata(self):
+        """
+        Return the (lexicon, learned) automata; learned is None until it is first built.
+        The lexicon automaton is built once; a stale learned one is rebuilt by one
+        caller outside the lock, once the rebuild interval has passed.
+        """
+        with self._lock:
+            self._load()
+            if self._lexicon_automaton is None:
+                self._lexicon_automaton = AhoCorasick(self._lexicon.values())
+            lexicon, learned = self._lexicon_automaton, self._learned_automaton
+            if (not self._learned_stale or self._rebuilding
+                    or time.monotonic() - self._learned_built_at < self.rebuild_interval):
+                return lexicon, learned
+            self._rebuilding = True
+            self._learned_stale = False
+            terms = list(self._learned.values())
+
+        try:
+            learned = AhoCorasick(terms)
+        except BaseException:
+            with self._lock:
+                self._rebuilding = False
+                self._learned_stale = True
+            raise
+        with self._lock:
+            self._learned_automaton = learned
+            self._learned_built_at = time.monotonic()
+            self._rebuilding = False
+        return lexicon, learned
+
+    def add_terms(self, terms):
+        """Learn new terms, up to learned_max in total; returns the ones that were added"""
+        with self._lock:
+            self._load()
+            new = []
+            for term in terms:
+                if len(self._learned) >= self.learned_max:
+                    break
+                term = term.strip()
+                key = _fold(term)
+                if term and "\n" not in term and key not in self._lexicon and key not in self._learned:
+                    self._learned[key] = term
+                    new.append(term)
+            if new:
+                os.makedirs(os.path.dirname(self.learned_path), exist_ok=True)
+                with open(self.learned_path, "a", encoding="utf-8") as f:
+                    f.writelines(f"{term}\n" for term in new)
+                self._learned_stale = True
+            return new
+
+    def contains(self, term):
+        """Check whether a term is known, ignoring case"""
+        key = _fold(term.strip())
+        with self._lock:
+            self._load()
+            return key in self._lexicon or key in self._learned
+
+    def _matches(self, text, learned=True):
+        """Non-overlapping (start, end, key) matches in text, from the lexicon and optionally learned terms"""
+        lexicon_automaton, learned_automaton = self.automata()
+        matches = list(lexicon_automaton.iter_matches(text))
+        if learned and learned_automaton is not None:
+            matches.extend(learned_automaton.iter_matches(text))
+        return leftmost_longest(matches)
+
+    def scan(self, text):
+        """
+        Find known terms in text.
+        Returns dict of term (exactly as written in text) -> list of {'start', 'end'}.
+        """
+        offsets = {}
+        for start, end, _ in self._matches(text):
+            offsets.setdefault(text[start:end], []).append({"start": start, "end": end})
+        return offsets
+
+    def covers(self, text):
+        """
+        Check whether every content word of a short text lies inside a lexicon term.
+        Learned terms are not vetted, so they never let a text skip the LLM.
+        """
+        if len(text) > LEXICON_ONLY_MAX_CHARS:
+            return False
+        spans = [(start, end) for start, end, _ in self._matches(text, learned=False)]
+        if not spans:
+            return False
+        for word in WORD_PATTERN.finditer(text):
+            if word.group(0).lower() in STOPWORDS or word.group(0).isdigit():
+                continue
+            if not any(start <= word.start() and word.end() <= end for start, end in spans):
+                return False
+        return True
+
+
+def find_offsets(text, terms):
+    """
+    Locate every whole-word occurrence of the given terms in text.
+    A match is attributed to the term spelled exactly like it when there is one,
+    otherwise to every term that differs from it only in case.
+    Returns dict of term -> list of {'start', 'end'}, in the order the terms were given.
+    """
+    by_key = {}
+    for term in terms:
+        by_key.setdefault(_fold(term), []).append(term)
+
+    offsets = {term: [] for term in terms}
+    for start, end, key in AhoCorasick(terms).iter_matches(text):
+        surface = text[start:end]
+        owners = [surface] if surface in offsets else by_key.get(key, [])
+        for term in owners:
+            offsets[term].append({"start": start, "end": end})
+    return offsets
@@ -0,0 +1,70 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import Checkpoint, iter_jsonl, run_batch
+
+
+def write_input(tmp_path, count):
+    path = tmp_path / "input.jsonl"
+    path.write_text("".join(json.dumps({"id": f"doc{i}", "transcript": f"text {i}"}) + "\n" for i in range(count)),
+                    encoding="utf-8")
+    return path
+
+
+def run(path, checkpoint, extract, stats=None):
+    with open(path, "r", encoding="utf-8") as f:
+        yield from run_batch(iter_jsonl(f), extract, max_workers=1, checkpoint=checkpoint, stats=stats)
+
+
+def test_rerun_skips_documents_completed_before_an_interruption(tmp_path):
+    path = write_input(tmp_path, 5)
+    checkpoint_file = tmp_path / "checkpoint.jsonl"
+    seen = []
+
+    def extract(text):
+        seen.append(text)
+        return {"keywords": [text]}
+
+    checkpoint = Checkpoint(str(checkpoint_file))
+    records = run(path, checkpoint, extract)
+    assert [next(records)["id"], next(records)["id"]] == ["doc0", "doc1"]
+    records.close()
+    checkpoint.close()
+    # The process died while writing the next record
+    with open(checkpoint_file, "a", encoding="utf-8") as f:
+        f.write('{"id": "doc2", "keyw')
+
+    seen.clear()
+    stats = {}
+    checkpoint = Checkpoint(str(checkpoint_file))
+    rerun = [record["id"] for record in run(path, checkpoint, extract, stats)]
+    checkpoint.close()
+
+    assert rerun == ["doc2", "doc3", "doc4"]
+    assert seen == ["text 2", "text 3", "text 4"]
+    assert stats == {"processed": 3, "failed": 0, "skipped": 2}
+    lines = checkpoint_file.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["doc0", "doc1", "doc2", "doc3", "doc4"]
+
+
+def test_failed_documents_are_retried_on_rerun(tmp_path):
+    path = write_input(tmp_path, 3)
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+
+    def flaky(text):
+        if text == "text 1":
+            raise RuntimeError("upstream error")
+        return {"keywords": []}
+
+    stats = {}
+    records = list(run(path, checkpoint, flaky, stats))
+    assert {"id": "doc1", "error": "upstream error"} in records
+    assert stats == {"processed": 2, "failed": 1, "skipped": 0}
+
+    stats = {}
+    assert [record["id"] for record in run(path, checkpoint, lambda text: {"keywords": []}, stats)] == ["doc1"]
+    assert stats == {"processed": 1, "failed": 0, "skipped": 2}
+    checkpoint.close()
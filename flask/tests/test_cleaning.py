@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cleaning import clean_local
+
+
+@pytest.mark.parametrize("transcript, expected", [
+    # All-caps terms and capitalised words are not hesitations
+    ("the ER stress response", "The ER stress response."),
+    ("The Hmm gene is expressed.", "The Hmm gene is expressed."),
+    ("ERM binds actin.", "ERM binds actin."),
+    # "err" and "like" are real words
+    ("We err on the side of caution.", "We err on the side of caution."),
+    ("I would like, first, to thank you.", "I would like, first, to thank you."),
+    # Only stutters of short function words are collapsed
+    ("He said that that was fine.", "He said that that was fine."),
+    ("She had had enough.", "She had had enough."),
+    ("I I think it is, is correct.", "I think it is correct."),
+    ("The the cell divides.", "The cell divides."),
+    ("No, no, no.", "No, no, no."),
+    # A repeated discourse marker is part of the text
+    ("Well, well, well.", "Well, well, well."),
+])
+def test_clean_local_keeps_content(transcript, expected):
+    assert clean_local(transcript) == expected
+
+
+@pytest.mark.parametrize("transcript, expected", [
+    ("Um, so today we, uh, talk about, you know, mitochondria.", "So today we talk about mitochondria."),
+    ("Hmm. The mito- mitochondria make ATP.", "The mitochondria make ATP."),
+    ("So, the cell, erm, divides.", "The cell divides."),
+    # A leading marker goes together with the fillers after it
+    ("So, um, we start.", "We start."),
+    ("So, you know, we start.", "We start."),
+    ("Well, um, okay, so, we begin.", "We begin."),
+    ("Okay. So, uh, next.", "Okay. Next."),
+])
+def test_clean_local_drops_fillers(transcript, expected):
+    assert clean_local(transcript) == expected
+
+
+def test_clean_local_keeps_known_terms():
+    known = {"uhm"}
+    assert clean_local("the uhm gene, um, matters", keep=lambda word: word.lower() in known) == "The uhm gene matters."
+    assert clean_local("So, uhm, the gene", keep=lambda word: word.lower() in known) == "Uhm, the gene."
@@ -0,0 +1,81 @@
+import os
+import re
+import sys
+import json
+import threading
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from explainer import explain_terms
+
+
+class StubMessages:
+    """
+    Messages endpoint that answers explanation prompts without a network call.
+    `batch(terms)` returns the items of a batched response (or raises).
+    """
+
+    def __init__(self, batch=None):
+        self.batch = batch or (lambda terms: [{"term": term, "explanation": f"About {term}."} for term in terms])
+        self.batches = []
+        self.singles = []
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        prompt = kwargs["messages"][0]["content"][0]["text"]
+        batch = re.search(r"<biological_terms>\n(.*)\n</biological_terms>", prompt, re.DOTALL)
+        if batch:
+            terms = batch.group(1).split("\n")
+            with self._lock:
+                self.batches.append(terms)
+            text = "```json\n" + json.dumps({"explanations": self.batch(terms)}) + "\n```"
+        else:
+            term = re.search(r"<biological_term>\n(.*)\n</biological_term>", prompt, re.DOTALL).group(1)
+            with self._lock:
+                self.singles.append(term)
+            text = f"<explanation>Just {term}.</explanation>"
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)])
+
+
+def stub_client(**options):
+    return SimpleNamespace(messages=StubMessages(**options))
+
+
+def test_terms_are_split_into_batches_and_reassembled_in_order():
+    client = stub_client()
+    terms = ["ATP", "ribosome", "kinase", "ATP", " ", "ligase", "actin"]
+
+    result = explain_terms(client, terms, batch_size=2)
+
+    assert list(result) == ["ATP", "ribosome", "kinase", "ligase", "actin"]
+    assert result["kinase"] == "About kinase."
+    assert sorted(client.messages.batches) == [["ATP", "ribosome"], ["actin"], ["kinase", "ligase"]]
+    assert client.messages.singles == []
+
+
+def test_terms_a_batch_misses_are_explained_one_by_one():
+    def batch(terms):
+        if "kinase" in terms:
+            raise RuntimeError("upstream error")
+        # Drops the last term and answers the first in another case
+        return [{"term": terms[0].upper(), "explanation": f"About {terms[0]}."}]
+
+    client = stub_client(batch=batch)
+
+    result = explain_terms(client, ["ATP", "ribosome", "kinase", "ligase"], batch_size=2)
+
+    assert result == {
+        "ATP": "About ATP.",
+        "ribosome": "Just ribosome.",
+        "kinase": "Just kinase.",
+        "ligase": "Just ligase."
+    }
+    assert sorted(client.messages.singles) == ["kinase", "ligase", "ribosome"]
+
+
+def test_batch_size_of_one_sends_one_prompt_per_term():
+    client = stub_client()
+
+    assert explain_terms(client, ["ATP", "actin"], batch_size=1) == {"ATP": "Just ATP.", "actin": "Just actin."}
+    assert client.messages.batches == []
@@ -0,0 +1,84 @@
+import os
+import re
+import sys
+import json
+import threading
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keywords import TOKEN_PATTERN, extract_keywords, split_windows
+
+
+class StubMessages:
+    """Messages endpoint that 'extracts' the G<n> gene names of each window, plus ATP synthase in lowercase"""
+
+    def __init__(self):
+        self.windows = []
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        prompt = kwargs["messages"][0]["content"][0]["text"]
+        window = re.search(r"<transcript>\n(.*)\n</transcript>", prompt, re.DOTALL).group(1)
+        with self._lock:
+            self.windows.append(window)
+        terms = sorted(set(re.findall(r"\bG\d+\b", window)))
+        if "ATP synthase" in window:
+            terms.append("atp synthase")
+        text = "Reasoning first.\n```json\n" + json.dumps({"biological_terms": terms}) + "\n```"
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)])
+
+
+def tokens(text):
+    return TOKEN_PATTERN.findall(text)
+
+
+def make_transcript(sentences):
+    return "ATP synthase powers the cell. " + " ".join(
+        f"Region {i} expresses gene G{i // 20}." for i in range(sentences)
+    )
+
+
+def test_windows_overlap_and_cover_the_text():
+    text = make_transcript(100)
+
+    windows = split_windows(text, window_tokens=120, overlap_tokens=12)
+
+    assert len(windows) > 1
+    for window in windows:
+        assert len(tokens(window)) <= 120
+    for previous, window in zip(windows, windows[1:]):
+        assert tokens(previous)[-12:] == tokens(window)[:12]
+        # Cut after a sentence end
+        assert previous.endswith(".")
+    covered = tokens(windows[0]) + [t for w in windows[1:] for t in tokens(w)[12:]]
+    assert covered == tokens(text)
+
+
+def test_short_text_is_one_window():
+    assert split_windows("The cell divides.", window_tokens=120) == ["The cell divides."]
+    assert split_windows("   ") == []
+
+
+def test_chunked_extraction_dedupes_terms_across_windows():
+    client = SimpleNamespace(messages=StubMessages())
+    transcript = make_transcript(600)
+
+    result = extract_keywords(client, transcript, mode="chunked")
+
+    expected = ["ATP synthase"] + sorted({f"G{i // 20}" for i in range(600)}, key=str.casefold)
+    assert result == {"keyword": expected, "total_count": len(expected)}
+    per_window = [set(re.findall(r"\bG\d+\b", window)) for window in client.messages.windows]
+    assert len(per_window) > 1
+    # Some gene straddles a window boundary, so it was returned twice and merged
+    assert sum(len(terms) for terms in per_window) > len(expected) - 1
+
+
+def test_single_mode_sends_the_whole_transcript():
+    client = SimpleNamespace(messages=StubMessages())
+    transcript = make_transcript(600)
+
+    result = extract_keywords(client, transcript, mode="single")
+
+    assert client.messages.windows == [transcript]
+    assert result["total_count"] == 31
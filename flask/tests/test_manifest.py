@@ -0,0 +1,127 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from manifest import TranscriptionManifest
+
+
+def write_audio(folder, filename, data, mtime_ns=None):
+    path = folder / filename
+    path.write_bytes(data)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def transcribe_all(output_path, input_dir, options):
+    """Run plan, reuse, record and merge as the app does; returns (transcribed, reused, merged)"""
+    runs = TranscriptionManifest(str(output_path))
+    transcribed, reused = [], []
+    for item in runs.plan(str(input_dir), sorted(os.listdir(input_dir)), options):
+        if runs.reuse(item, options) is not None:
+            reused.append(item["filename"])
+            continue
+        transcribed.append(item["filename"])
+        with open(item["path"], "rb") as f:
+            runs.record(item, f"{item['filename']}: {f.read().decode()} ({options['cleaning']})", options)
+    return transcribed, reused, runs.merge()
+
+
+def setup_dirs(tmp_path):
+    input_dir = tmp_path / "audio"
+    input_dir.mkdir()
+    return input_dir, tmp_path / "out" / "transcript.txt"
+
+
+def test_first_run_transcribes_every_file_and_merges_in_order(tmp_path):
+    input_dir, output = setup_dirs(tmp_path)
+    write_audio(input_dir, "b.mp3", b"beta")
+    write_audio(input_dir, "a.mp3", b"alpha")
+
+    transcribed, reused, merged = transcribe_all(output, input_dir, {"cleaning": "local"})
+
+    assert transcribed == ["a.mp3", "b.mp3"]
+    assert reused == []
+    assert merged == "### a.mp3\na.mp3: alpha (local)\n\n### b.mp3\nb.mp3: beta (local)\n\n"
+    assert output.read_text(encoding="utf-8") == merged
+
+
+def test_unchanged_files_are_not_planned(tmp_path):
+    input_dir, output = setup_dirs(tmp_path)
+    write_audio(input_dir, "a.mp3", b"alpha")
+    _, _, first = transcribe_all(output, input_dir, {"cleaning": "local"})
+
+    runs = TranscriptionManifest(str(output))
+    assert runs.plan(str(input_dir), ["a.mp3"], {"cleaning": "local"}) == []
+    assert transcribe_all(output, input_dir, {"cleaning": "local"}) == ([], [], first)
+
+
+def test_new_and_changed_files_are_transcribed(tmp_path):
+    input_dir, output = setup_dirs(tmp_path)
+    write_audio(input_dir, "a.mp3", b"alpha", mtime_ns=1_000_000_000)
+    write_audio(input_dir, "b.mp3", b"beta", mtime_ns=1_000_000_000)
+    transcribe_all(output, input_dir, {"cleaning": "local"})
+
+    write_audio(input_dir, "a.mp3", b"alpha v2", mtime_ns=2_000_000_000)
+    # Same size, new content: caught by the hash
+    write_audio(input_dir, "b.mp3", b"BETA", mtime_ns=2_000_000_000)
+    write_audio(input_dir, "c.mp3", b"gamma")
+    transcribed, reused, merged = transcribe_all(output, input_dir, {"cleaning": "local"})
+
+    assert transcribed == ["a.mp3", "b.mp3", "c.mp3"]
+    assert reused == []
+    assert merged == (
+        "### a.mp3\na.mp3: alpha v2 (local)\n\n"
+        "### b.mp3\nb.mp3: BETA (local)\n\n"
+        "### c.mp3\nc.mp3: gamma (local)\n\n"
+    )
+
+
+def test_touched_file_with_same_content_is_reused(tmp_path):
+    input_dir, output = setup_dirs(tmp_path)
+    write_audio(input_dir, "a.mp3", b"alpha", mtime_ns=1_000_000_000)
+    _, _, first = transcribe_all(output, input_dir, {"cleaning": "local"})
+
+    write_audio(input_dir, "a.mp3", b"alpha", mtime_ns=2_000_000_000)
+    assert transcribe_all(output, input_dir, {"cleaning": "local"}) == ([], ["a.mp3"], first)
+    # The new mtime was recorded, so the next plan skips the file without hashing it
+    runs = TranscriptionManifest(str(output))
+    assert runs.plan(str(input_dir), ["a.mp3"], {"cleaning": "local"}) == []
+
+
+def test_changed_options_transcribe_again(tmp_path):
+    input_dir, output = setup_dirs(tmp_path)
+    write_audio(input_dir, "a.mp3", b"alpha")
+    transcribe_all(output, input_dir, {"cleaning": "local"})
+
+    transcribed, reused, merged = transcribe_all(output, input_dir, {"cleaning": "llm"})
+
+    assert (transcribed, reused) == (["a.mp3"], [])
+    assert merged == "### a.mp3\na.mp3: alpha (llm)\n\n"
+
+
+def test_removed_files_are_dropped_from_the_output(tmp_path):
+    input_dir, output = setup_dirs(tmp_path)
+    write_audio(input_dir, "a.mp3", b"alpha")
+    write_audio(input_dir, "b.mp3", b"beta")
+    transcribe_all(output, input_dir, {"cleaning": "local"})
+
+    os.remove(input_dir / "b.mp3")
+    transcribed, _, merged = transcribe_all(output, input_dir, {"cleaning": "local"})
+
+    assert transcribed == []
+    assert merged == "### a.mp3\na.mp3: alpha (local)\n\n"
+    assert not os.path.exists(TranscriptionManifest(str(output)).part_path("b.mp3"))
+
+
+def test_output_written_without_a_manifest_is_imported(tmp_path):
+    input_dir, output = setup_dirs(tmp_path)
+    output.parent.mkdir()
+    output.write_text("Lecture notes\n\n### old.mp3\nOld transcript.\n\n", encoding="utf-8")
+    write_audio(input_dir, "a.mp3", b"alpha")
+
+    transcribed, _, merged = transcribe_all(output, input_dir, {"cleaning": "local"})
+
+    assert transcribed == ["a.mp3"]
+    assert merged == "Lecture notes\n\n### a.mp3\na.mp3: alpha (local)\n\n### old.mp3\nOld transcript.\n\n"
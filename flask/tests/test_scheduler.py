@@ -0,0 +1,210 @@
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scheduler
+from scheduler import ModelLimiter, Scheduler, SchedulerBusy, ScheduledAnthropic, TokenBucket
+
+
+class FakeClock:
+    """Stands in for the time module; time only moves when something sleeps or waits"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ClockCondition(threading.Condition):
+    """Condition whose timed waits advance the fake clock instead of blocking (single thread only)"""
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def wait(self, timeout=None):
+        self.clock.sleep(timeout)
+        return False
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler, "time", clock)
+    monkeypatch.setattr(scheduler, "backoff", lambda attempt: 1.0)
+    return clock
+
+
+@pytest.fixture
+def timed(clock, monkeypatch):
+    """Limiters created in the test wait on the fake clock"""
+    monkeypatch.setattr(scheduler, "threading", SimpleNamespace(
+        Lock=threading.Lock, Condition=lambda: ClockCondition(clock)
+    ))
+    return clock
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after)})
+
+
+class FakeMessages:
+    """Messages endpoint that blocks each call until released"""
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def create(self, **kwargs):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return SimpleNamespace(text=kwargs["messages"][0]["content"], usage=None)
+
+
+def wait_until(predicate):
+    for _ in range(500):
+        if predicate():
+            return
+        time.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_token_bucket_refills_over_a_minute():
+    bucket = TokenBucket(60)
+    bucket.updated = 0.0
+
+    assert bucket.wait_time(60, 0.0) == 0.0
+    bucket.take(60)
+    assert bucket.wait_time(1, 0.0) == pytest.approx(1.0)
+    assert bucket.wait_time(30, 10.0) == pytest.approx(20.0)
+    # An oversized call waits for a full bucket, then leaves it in debt
+    assert bucket.wait_time(120, 60.0) == 0.0
+    bucket.take(120)
+    assert bucket.wait_time(1, 60.0) == pytest.approx(61.0)
+
+
+def test_request_budget_delays_admission(timed):
+    limiter = ModelLimiter("model", rpm=2)
+    cost = {"requests": 1}
+
+    for _ in range(2):
+        limiter.acquire(cost, "interactive", deadline=100)
+        limiter.release(cost)
+    assert timed.now == 0.0
+
+    limiter.acquire(cost, "interactive", deadline=100)
+    assert timed.now == pytest.approx(30.0)
+
+
+def test_token_usage_corrects_the_estimate(timed):
+    limiter = ModelLimiter("model", itpm=1000)
+
+    limiter.acquire({"input_tokens": 800}, "interactive", deadline=100)
+    limiter.release({"input_tokens": 800}, {"input_tokens": 100})
+    limiter.acquire({"input_tokens": 800}, "interactive", deadline=100)
+    assert timed.now == 0.0
+
+
+def test_interactive_lane_is_admitted_before_batch(clock):
+    limiter = ModelLimiter("model", max_concurrency=1)
+    cost = {"requests": 1}
+    order = []
+
+    def call(lane_name):
+        limiter.acquire(cost, lane_name, deadline=100)
+        order.append(lane_name)
+        limiter.release(cost)
+
+    limiter.acquire(cost, "interactive", deadline=100)
+    batch = threading.Thread(target=call, args=("batch",))
+    batch.start()
+    wait_until(lambda: limiter.stats()["queued"]["batch"] == 1)
+    interactive = threading.Thread(target=call, args=("interactive",))
+    interactive.start()
+    wait_until(lambda: limiter.stats()["queued"]["interactive"] == 1)
+
+    limiter.release(cost)
+    batch.join(5)
+    interactive.join(5)
+    assert order == ["interactive", "batch"]
+
+
+def test_identical_calls_in_flight_are_coalesced(clock):
+    messages = FakeMessages()
+    sched = Scheduler(limits={})
+    client = ScheduledAnthropic(SimpleNamespace(messages=messages), sched)
+    request = {"model": "model", "max_tokens": 10, "messages": [{"role": "user", "content": "hello"}]}
+    results = []
+
+    owner = threading.Thread(target=lambda: results.append(client.messages.create(**request)))
+    owner.start()
+    assert messages.started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(client.messages.create(**request)))
+    follower.start()
+    wait_until(lambda: sched.coalesced == 1)
+
+    messages.release.set()
+    owner.join(5)
+    follower.join(5)
+    assert messages.calls == 1
+    assert [r.text for r in results] == ["hello", "hello"]
+    assert sched.stats()["models"]["model"]["admitted"] == 1
+
+
+def test_rate_limit_pauses_the_model_and_retries(timed):
+    sched = Scheduler(limits={}, max_wait=60)
+    calls = []
+
+    def fn():
+        calls.append(timed.now)
+        if len(calls) == 1:
+            raise RateLimited(retry_after=5)
+        return "ok"
+
+    assert sched.run("model", fn, {"requests": 1}) == "ok"
+    assert calls == [0.0, 5.0]
+    stats = sched.stats()["models"]["model"]
+    assert (stats["rate_limited"], stats["retried"], stats["in_flight"]) == (1, 1, 0)
+
+
+def test_rate_limits_give_up_at_the_deadline(timed):
+    sched = Scheduler(limits={}, max_wait=12)
+
+    def fn():
+        raise RateLimited(retry_after=5)
+
+    with pytest.raises(SchedulerBusy):
+        sched.run("model", fn, {"requests": 1})
+    assert sched.stats()["models"]["model"]["in_flight"] == 0
+
+
+def test_other_errors_are_retried_up_to_max_retries(timed):
+    sched = Scheduler(limits={})
+    calls = []
+
+    def fn():
+        calls.append(timed.now)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        sched.run("model", fn, {"requests": 1}, max_retries=2, retry_on=(ValueError,))
+    assert calls == [0.0, 1.0, 2.0]
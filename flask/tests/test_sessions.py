@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sessions import SESSION_MAX_PENDING, ChunkOrderError, LiveSession
+
+
+def test_chunks_are_appended_in_sequence_order():
+    session = LiveSession()
+    assert session.add(1, "second", 2.0) == []
+    assert sorted(session.pending) == [1]
+
+    appended = session.add(0, "first", 3.0)
+    assert [chunk["text"] for _, chunk in appended] == ["first", "second"]
+    assert [(chunk["start"], chunk["end"]) for _, chunk in appended] == [(0.0, 3.0), (3.0, 5.0)]
+    assert session.transcript == "first second"
+    assert not session.pending
+
+
+def test_repeated_sequence_numbers_are_rejected():
+    session = LiveSession()
+    session.add(0, "first")
+    session.add(2, "third")
+    with pytest.raises(ChunkOrderError):
+        session.add(0, "again")
+    with pytest.raises(ChunkOrderError):
+        session.add(2, "again")
+
+
+def test_chunks_are_claimed_before_transcription():
+    session = LiveSession()
+    session.reserve(0)
+    with pytest.raises(ChunkOrderError):
+        session.reserve(0)
+    with pytest.raises(ChunkOrderError):
+        session.reserve(SESSION_MAX_PENDING + 1)
+
+    session.release(0)
+    session.reserve(0)
+    assert [chunk["text"] for _, chunk in session.add(0, "first")] == ["first"]
+    assert not session.receiving
+
+
+def test_forgotten_terms_are_reported_again():
+    session = LiveSession()
+    assert session.new_terms(["ATP", "DNA"]) == ["ATP", "DNA"]
+    session.forget_terms(["DNA"])
+    assert session.new_terms(["atp", "DNA"]) == ["DNA"]
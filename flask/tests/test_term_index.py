@@ -0,0 +1,40 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from term_index import TermIndex
+
+
+def make_index(tmp_path, **options):
+    lexicon = tmp_path / "lexicon.txt"
+    lexicon.write_text("ATP synthase\nmitochondria\n", encoding="utf-8")
+    return TermIndex(str(lexicon), str(tmp_path / "learned.txt"), **options)
+
+
+def test_learned_terms_are_capped(tmp_path):
+    index = make_index(tmp_path, learned_max=2)
+
+    assert index.add_terms(["ribosome", "Mitochondria", "kinase", "ligase"]) == ["ribosome", "kinase"]
+    assert index.add_terms(["ligase"]) == []
+    assert (tmp_path / "learned.txt").read_text(encoding="utf-8").splitlines() == ["ribosome", "kinase"]
+
+
+def test_learned_terms_do_not_skip_the_llm(tmp_path):
+    index = make_index(tmp_path, rebuild_interval=0)
+    index.add_terms(["ribosome"])
+
+    assert "ribosome" in index.scan("The ribosome and mitochondria.")
+    assert index.covers("mitochondria")
+    assert not index.covers("ribosome")
+
+
+def test_learned_rebuilds_are_debounced(tmp_path):
+    index = make_index(tmp_path, rebuild_interval=3600)
+    index.add_terms(["ribosome"])
+    lexicon, learned = index.automata()
+
+    index.add_terms(["kinase"])
+    assert index.automata() == (lexicon, learned)
+    assert "kinase" not in index.scan("A kinase.")
+    assert index.contains("kinase")
@@ -0,0 +1,164 @@
+import os
+import json
+import hashlib
+import threading
+
+import metrics
+from term_cache import CACHE_DIR
+
+TRANSCRIPT_CACHE_DIR = os.path.join(CACHE_DIR, 'transcripts')
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def hash_file(filepath):
+    """Return the sha256 hex digest of a file on disk"""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Flight:
+    """
+    One in-flight computation of a record field. Waiters block on result();
+    a producer that builds the value in parts can publish() them, so waiters
+    can tail() the parts as they arrive.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._parts = []
+        self._done = False
+        self._value = None
+        self._error = None
+
+    def publish(self, part):
+        with self._cond:
+            self._parts.append(part)
+            self._cond.notify_all()
+
+    def set_result(self, value):
+        with self._cond:
+            self._value, self._done = value, True
+            self._cond.notify_all()
+
+    def set_exception(self, error):
+        with self._cond:
+            self._error, self._done = error, True
+            self._cond.notify_all()
+
+    def result(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._done)
+            if self._error is not None:
+                raise self._error
+            return self._value
+
+    def tail(self):
+        """Yield every published part, waiting for new ones until the computation ends"""
+        index = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: index < len(self._parts) or self._done)
+                parts, done = self._parts[index:], self._done
+            index += len(parts)
+            yield from parts
+            if done and not parts:
+                if self._error is not None:
+                    raise self._error
+                return
+
+
+class TranscriptCache:
+    """
+    Content-addressed store of transcripts keyed by the sha256 of the audio.
+
+    Each audio hash maps to one JSON record per transcription model holding
+    fields such as 'raw' and 'filtered'. Concurrent requests for the same
+    hash and field share a single in-flight computation.
+    """
+
+    def __init__(self, root=TRANSCRIPT_CACHE_DIR, namespace="default"):
+        self.root = os.path.join(root, namespace)
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], f"{digest}.json")
+
+    def get(self, digest):
+        """Return the cached record for a hash, or an empty dict"""
+        try:
+            with open(self._path(digest), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def update(self, digest, **fields):
+        """Merge fields into the record for a hash and write it atomically"""
+        path = self._path(digest)
+        with self._lock:
+            record = self.get(digest)
+            record.update(fields)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp_path, path)
+
+    def begin(self, digest, field):
+        """
+        Register a computation of a field. Returns (flight, owner): the owner
+        computes the value, stores it and calls finish(); other callers get the
+        owner's flight to wait on or tail.
+        """
+        key = (digest, field)
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._inflight[key] = Flight()
+            return flight, True
+
+    def finish(self, digest, field, flight, value=None, error=None):
+        """End a computation started with begin(), passing its value or error to waiters"""
+        with self._lock:
+            self._inflight.pop((digest, field), None)
+        if error is not None:
+            flight.set_exception(error)
+        else:
+            flight.set_result(value)
+
+    def get_or_compute(self, digest, field, compute):
+        """
+        Return (value, cached) for a field of the record, calling compute() on a miss.
+        Callers that arrive while the same field is being computed wait for that
+        result instead of starting their own.
+        """
+        # Counted without the prompt key, e.g. 'filtered_chunked@clean_chunk-v2-...'
+        cache = f"transcript_{field.partition('@')[0]}"
+        record = self.get(digest)
+        if field in record:
+            metrics.cache_result(cache, hits=1)
+            return record[field], True
+
+        flight, owner = self.begin(digest, field)
+        if not owner:
+            metrics.cache_result(cache, hits=1)
+            return flight.result(), True
+
+        try:
+            # Another caller may have finished between our read and taking ownership
+            record = self.get(digest)
+            if field in record:
+                value, cached = record[field], True
+            else:
+                value, cached = compute(), False
+                self.update(digest, **{field: value})
+            metrics.cache_result(cache, hits=int(cached), misses=int(not cached))
+        except BaseException as e:
+            self.finish(digest, field, flight, error=e)
+            raise
+        self.finish(digest, field, flight, value)
+        return value, cached
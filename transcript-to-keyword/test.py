@@ -1,53 +1,70 @@
 import os
-from anthropic import Anthropic
-from dotenv import load_dotenv
-import re
+import sys
+import argparse
 import json
+from dotenv import load_dotenv
 
+# Settings in .env apply to the Flask modules' settings, read when they are imported
 load_dotenv()
 
-template = "You are tasked with extracting biological terminology from a conference transcript. Your goal is to identify and catalog scientific terms specifically related to biology, genetics, molecular biology, and related fields.\n\nHere is the conference transcript to analyze:\n\n<transcript>\n{{TRANSCRIPT}}\n</transcript>\n\n## What Qualifies as a Biological Term\n\nInclude terms that fall into these categories:\n- Gene names (e.g., p53, BRCA1, myc)\n- Protein names (e.g., hemoglobin, insulin, collagen)\n- Biological processes (e.g., transcription, translation, mitosis)\n- Cellular components (e.g., mitochondria, ribosome, nucleus)\n- Organisms and species names (e.g., E. coli, Drosophila, Homo sapiens)\n- Biological molecules (e.g., DNA, RNA, ATP)\n- Medical/biological conditions (e.g., diabetes, cancer, mutation)\n- Biological techniques and methods (e.g., PCR, CRISPR, sequencing)\n- Anatomical terms (e.g., liver, neuron, tissue)\n\n## What to Exclude\n\nDo not include:\n- General scientific terms that aren't specifically biological (like \"data\", \"analysis\", \"significant\")\n- Common words that aren't technical terminology\n- General laboratory equipment or basic scientific concepts\n\n## Extraction Requirements\n\n1. **Preserve exact formatting**: Capture each term exactly as it appears in the transcript - maintain original spelling, capitalization, and formatting\n2. **Include variants**: If both abbreviated forms (like \"PCR\") and full forms (like \"polymerase chain reaction\") appear, include both\n3. **Include all nomenclature**: Capture species names in both common and scientific formats\n4. **No duplicates**: List each unique term only once, even if it appears multiple times\n5. **Focus on technical terms**: Prioritize specialized biological terminology over general words\n\n## Analysis Process\n\nBefore providing your final answer, work through the transcript systematically in <term_extraction> tags inside your thinking block:\n\n1. Scan through the entire transcript and quote all potential biological terms exactly as they appear in the text. It's OK for this section to be quite long.\n2. For each quoted term, evaluate whether it qualifies based on the criteria above, noting your reasoning for including or excluding each term\n3. Create a running list of accepted terms, preserving their exact formatting and capitalization\n4. Check for and eliminate any duplicates from your accepted terms list\n5. Verify that your final list is sorted alphabetically while maintaining exact formatting\n\n## Output Format\n\nProvide your final answer as a JSON object with this exact structure:\n\n```json\n{\n  \"biological_terms\": [\n    \"first_term_exactly_as_appears\",\n    \"second_term_exactly_as_appears\",\n    \"third_term_exactly_as_appears\"\n  ],\n  \"total_count\": number_of_unique_terms\n}\n```\n\nThe biological_terms array should:\n- Be sorted alphabetically\n- Preserve exact capitalization, spelling, and formatting from the original transcript\n- Contain only unique terms\n\nYour final output should contain only the JSON object and should not duplicate or rehash any of the extraction work you did in the thinking block."
-
-def main(transcript):
-    client = Anthropic(
-        api_key=os.environ.get("ANTHROPIC_API_KEY"),  # This is the default and can be omitted
-    )
-
-    message = client.messages.create(
-        model='claude-3-5-haiku-20241022',
-        # model="claude-haiku-4-5-20251001",
-        # model="claude-sonnet-4-5-20250929",
-        max_tokens=1024,
-        # temperature=1,
-        temperature=0,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": template.replace('{{TRANSCRIPT}}', TRANSCRIPT)
-                    }
-                ]
-            }
-        ]
-    )
-
-    match = re.search(r"```json\s*([\s\S]+?)\s*```", message.content[0].text)
-
-    if match:
-        json_string = match.group(1)
-        
-        try:
-            data = json.loads(json_string)
-            return data
-            
-        except json.JSONDecodeError as e:
-            print(f"Error in decoding JSON: {e}")
+# Batch helpers and keyword extraction shared with the Flask app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'flask'))
+import batch
+import clients
+import keywords
+
+
+def main(transcript, client=None, mode="auto"):
+    """
+    Extract biological keywords from a transcript with the Flask app's prompt and settings.
+    Returns dict with 'keyword' and 'total_count' fields; raises
+    keywords.KeywordExtractionError when the response holds no usable term list.
+    """
+    if client is None:
+        client = clients.anthropic_client()
+    return keywords.extract_keywords(client, transcript, mode)
+
+def run_batch(input_path, output, checkpoint_path=None, workers=batch.BATCH_MAX_WORKERS, mode="auto"):
+    """
+    Extract keywords from every transcript in a JSONL file or a directory,
+    writing one JSON line per transcript in completion order.
+    Transcripts already in the checkpoint file are skipped; failures are
+    written as error records, counted as failed and retried on the next run.
+    """
+    client = clients.anthropic_client()
+    checkpoint = batch.Checkpoint(checkpoint_path) if checkpoint_path else None
+
+    if os.path.isdir(input_path):
+        documents = batch.iter_directory(input_path)
+    elif input_path == '-':
+        documents = batch.iter_jsonl(sys.stdin)
     else:
-        print("No JSON found")
+        documents = batch.iter_jsonl(open(input_path, 'r'), os.path.basename(input_path))
+
+    stats = {}
+    try:
+        for record in batch.run_batch(documents, lambda text: main(text, client, mode), workers, checkpoint, stats):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if checkpoint:
+            checkpoint.close()
+    print(f"Done: {stats['processed']} processed, {stats['failed']} failed, {stats['skipped']} skipped", file=sys.stderr)
+
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    parser = argparse.ArgumentParser(description="Extract biological keywords from many transcripts")
+    parser.add_argument("input", help="JSONL file ('-' for stdin) with one {\"id\", \"transcript\"} per line, or a directory of transcripts")
+    parser.add_argument("-o", "--output", help="JSONL file to append results to (default: stdout)")
+    parser.add_argument("-c", "--checkpoint", help="checkpoint file; rerunning with it only processes missing transcripts")
+    parser.add_argument("-w", "--workers", type=int, default=batch.BATCH_MAX_WORKERS, help="transcripts processed in parallel")
+    parser.add_argument("-m", "--mode", choices=keywords.EXTRACTION_MODES, default="auto", help="extraction mode, as in /extract")
+    args = parser.parse_args()
+
+    output = open(args.output, "a") if args.output else sys.stdout
+    run_batch(args.input, output, args.checkpoint, args.workers, args.mode)
 
-if __name__ == "__main__":
+elif __name__ == "__main__":
     file = 'transcript.txt'
     TRANSCRIPT = open(f'../audio-to-transcript/transcript/{file}', 'r').read()
     # TRANSCRIPT = 'Generates synthetic spatial data to augment sparse Xenium and MERFISH data to iteratively improve feature learning'